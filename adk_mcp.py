@@ -0,0 +1,83 @@
+"""
+ADK toolset backed by a shared, pre-warmed MCP session (see mcp_session.py)
+Drop-in for MCPToolset: tool discovery is cached across agent turns and
+every tool call rides the same long-lived session
+"""
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.mcp_tool.mcp_tool import MCPTool
+from mcp import types
+
+from mcp_session import WarmSession, get_session
+
+
+class _SessionProxy:
+    """What MCPTool gets from create_session(): calls go through WarmSession's reconnect/retry."""
+
+    def __init__(self, warm: WarmSession):
+        self._warm = warm
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        return await self._warm.call_tool(name, arguments, **kwargs)
+
+    async def list_tools(self, *_args: Any, **_kwargs: Any) -> types.ListToolsResult:
+        return types.ListToolsResult(tools=await self._warm.list_tools())
+
+
+class _SharedSessionManager:
+    """Stands in for ADK's MCPSessionManager, which would open a session per toolset."""
+
+    def __init__(self, warm: WarmSession):
+        self._proxy = _SessionProxy(warm)
+
+    async def create_session(self, headers: Optional[Dict[str, str]] = None) -> _SessionProxy:
+        # Auth headers are added per HTTP request by the WarmSession itself
+        return self._proxy
+
+    async def close(self) -> None:
+        # The session outlives any one toolset; mcp_session.close_all() ends it
+        pass
+
+
+class WarmMCPToolset(BaseToolset):
+    """
+    MCP tools from a WarmSession.
+
+    get_tools() runs on every agent turn; here it only rebuilds the MCPTool
+    wrappers when the session refetched the tool list (server list_changed
+    notification or a reconnect), instead of opening a session and calling
+    tools/list each time.
+    """
+
+    def __init__(
+        self,
+        session: WarmSession,
+        tool_filter: Optional[List[str]] = None,
+        tool_name_prefix: Optional[str] = None,
+    ):
+        super().__init__(tool_filter=tool_filter, tool_name_prefix=tool_name_prefix)
+        self.session = session
+        self._manager = _SharedSessionManager(session)
+        self._tools: List[BaseTool] = []
+        self._tools_version = -1
+
+    @classmethod
+    def for_url(cls, url: str, prewarm: bool = True, tool_filter=None, tool_name_prefix=None, **session_kwargs: Any):
+        """Toolset on the process-wide session for `url`, connecting now if a loop is running."""
+        session = get_session(url, **session_kwargs)
+        if prewarm:
+            session.prewarm()
+        return cls(session, tool_filter=tool_filter, tool_name_prefix=tool_name_prefix)
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[BaseTool]:
+        mcp_tools = await self.session.list_tools()
+        if self._tools_version != self.session.tools_version:
+            self._tools = [MCPTool(mcp_tool=tool, mcp_session_manager=self._manager) for tool in mcp_tools]
+            self._tools_version = self.session.tools_version
+        return [tool for tool in self._tools if self._is_tool_selected(tool, readonly_context)]
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,331 @@
+"""
+Admission control for MCP tool calls
+Per-client token-bucket rate limits, per-client and global caps on in-flight
+tool calls, and a round-robin wait queue; overflow is refused with HTTP 429
+"""
+import asyncio
+import hashlib
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Tuple
+
+
+class Rejected(Exception):
+    """A request refused by admission control; retry_after is in seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token; returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class FairLimiter:
+    """
+    Caps concurrent work globally and per client.
+
+    Requests that can't start wait in a FIFO per client; when a slot frees up
+    clients are served round-robin, so a client with a deep backlog waits
+    behind its own requests rather than everyone else's.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = 32,
+        client_max_inflight: int = 8,
+        max_queue: int = 256,
+        client_max_queue: int = 16,
+        queue_timeout: float = 30.0,
+    ):
+        self.max_inflight = max_inflight
+        self.client_max_inflight = client_max_inflight
+        self.max_queue = max_queue
+        self.client_max_queue = client_max_queue
+        self.queue_timeout = queue_timeout
+
+        self.inflight = 0
+        self._client_inflight: Dict[str, int] = {}
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.queued = 0
+        # Moving average of how long a slot is held, for Retry-After estimates
+        self.hold_seconds = 1.0
+
+    def _can_start(self, client: str) -> bool:
+        return self.inflight < self.max_inflight and self._client_inflight.get(client, 0) < self.client_max_inflight
+
+    def _grant(self, client: str) -> None:
+        self.inflight += 1
+        self._client_inflight[client] = self._client_inflight.get(client, 0) + 1
+
+    def retry_after(self) -> float:
+        """Rough time until the current queue drains enough to admit one more."""
+        return max(1.0, self.hold_seconds * (self.queued + 1) / max(1, self.max_inflight))
+
+    async def acquire(self, client: str) -> None:
+        queue = self._queues.get(client)
+        if not queue and self._can_start(client):
+            self._grant(client)
+            return
+        if self.queued >= self.max_queue or (queue is not None and len(queue) >= self.client_max_queue):
+            raise Rejected("Too many queued requests", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(client, deque()).append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted at the same moment we gave up: hand the slot back
+                self.release(client, 0.0)
+            else:
+                waiter.cancel()
+                self._discard(client, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise Rejected(f"Queued longer than {self.queue_timeout:g}s", self.retry_after()) from None
+            raise
+
+    def _discard(self, client: str, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(client)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self.queued -= 1
+            if not queue:
+                del self._queues[client]
+
+    def release(self, client: str, held: float) -> None:
+        self.inflight -= 1
+        remaining = self._client_inflight.get(client, 1) - 1
+        if remaining:
+            self._client_inflight[client] = remaining
+        else:
+            self._client_inflight.pop(client, None)
+        self.hold_seconds = 0.9 * self.hold_seconds + 0.1 * held
+        self._wake()
+
+    def _wake(self) -> None:
+        """Grant free slots to waiting clients, one request per client per round."""
+        progressed = True
+        while self.inflight < self.max_inflight and self._queues and progressed:
+            progressed = False
+            for client in list(self._queues):
+                if self.inflight >= self.max_inflight:
+                    break
+                if not self._can_start(client):
+                    continue
+                queue = self._queues[client]
+                waiter = queue.popleft()
+                self.queued -= 1
+                progressed = True
+                if queue:
+                    # Back of the line for its next request
+                    self._queues.move_to_end(client)
+                else:
+                    del self._queues[client]
+                if not waiter.done():
+                    self._grant(client)
+                    waiter.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "queued_clients": len(self._queues),
+            "max_inflight": self.max_inflight,
+            "client_max_inflight": self.client_max_inflight,
+        }
+
+
+class Admission:
+    """
+    Admission decisions for tool calls.
+
+    Clients are identified by a hash of their bearer token, else the
+    `client_header` value, else their address. Each client has a token
+    bucket (`rate` calls per second, up to `burst` at once; rate 0 disables)
+    and calls past it are refused at once; the rest go through the
+    FairLimiter and may wait for a slot.
+    """
+
+    def __init__(
+        self,
+        limiter: FairLimiter,
+        rate: float = 10.0,
+        burst: float = 20.0,
+        client_header: str = "x-client-id",
+        max_clients: int = 10000,
+        enabled: bool = True,
+    ):
+        self.limiter = limiter
+        self.rate = rate
+        self.burst = burst
+        self.client_header = client_header.lower().encode("latin-1")
+        self.max_clients = max_clients
+        self.enabled = enabled
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.admitted = 0
+        self.rate_limited = 0
+        self.overloaded = 0
+
+    def client_id(self, scope) -> str:
+        headers = dict(scope["headers"])
+        authorization = headers.get(b"authorization", b"")
+        if authorization[:7].lower() == b"bearer ":
+            return "token:" + hashlib.sha256(authorization[7:].strip()).hexdigest()[:16]
+        if headers.get(self.client_header):
+            return "client:" + headers[self.client_header].decode("latin-1")[:128]
+        client = scope.get("client")
+        return f"addr:{client[0]}" if client else "anonymous"
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    async def acquire(self, client: str) -> None:
+        """Admit one call for `client` or raise Rejected; pair with release()."""
+        if self.rate > 0:
+            wait = self._bucket(client).take()
+            if wait:
+                self.rate_limited += 1
+                raise Rejected("Rate limit exceeded", wait)
+        try:
+            await self.limiter.acquire(client)
+        except Rejected as e:
+            self.overloaded += 1
+            raise Rejected(f"Server busy: {e}", e.retry_after) from None
+        self.admitted += 1
+
+    def release(self, client: str, held: float) -> None:
+        self.limiter.release(client, held)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "rate": self.rate,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "overloaded": self.overloaded,
+            **self.limiter.stats(),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware admitting `tools/call` POSTs to `path` through Admission.
+
+    Other MCP methods (initialize, tools/list, notifications) are cheap and
+    pass straight through. Refused calls get HTTP 429 with Retry-After and a
+    JSON-RPC error. Install it inside JSONRPCBatchMiddleware so each batch
+    element is admitted on its own.
+    """
+
+    def __init__(self, app, admission: Admission, path: str = "/mcp"):
+        self.app = app
+        self.admission = admission
+        self.path = path.rstrip("/")
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not self.admission.enabled
+            or scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") != self.path
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        request_id, is_tool_call = self._inspect(body)
+
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        if not is_tool_call:
+            await self.app(scope, replay, send)
+            return
+
+        client = self.admission.client_id(scope)
+        try:
+            await self.admission.acquire(client)
+        except Rejected as e:
+            await self._reject(send, request_id, str(e), e.retry_after)
+            return
+        start = time.monotonic()
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            self.admission.release(client, time.monotonic() - start)
+
+    @staticmethod
+    def _inspect(body: bytes) -> Tuple[Any, bool]:
+        try:
+            message = json.loads(body)
+        except ValueError:
+            return None, False
+        if not isinstance(message, dict):
+            return None, False
+        return message.get("id"), message.get("method") == "tools/call"
+
+    @staticmethod
+    async def _reject(send, request_id: Any, message: str, retry_after: float) -> None:
+        seconds = max(1, math.ceil(retry_after))
+        payload = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {
+                "code": -32000,
+                "message": f"{message}; retry after {seconds}s",
+                "data": {"retry_after": seconds},
+            },
+        }
+        body = json.dumps(payload).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(seconds).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
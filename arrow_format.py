@@ -0,0 +1,86 @@
+"""
+Apache Arrow IPC and Parquet encoding for tabular tool results
+Typed columns in a compact binary blob (base64 inside the JSON result);
+pyarrow is optional and only imported the first time it is asked for
+"""
+import base64
+from typing import Any, Dict, List
+
+from fast_json import dumps
+
+ARROW_FORMATS = ("arrow", "parquet")
+
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_pyarrow = None
+
+
+def _load():
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("output_format 'arrow'/'parquet' needs pyarrow installed on the server") from None
+        _pyarrow = pyarrow
+    return _pyarrow
+
+
+def available() -> bool:
+    try:
+        _load()
+        return True
+    except ValueError:
+        return False
+
+
+def _column(pa, values: List[Any]):
+    """Typed array inferred from the values; mixed-type columns fall back to strings."""
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        return pa.array(
+            [None if v is None else v if isinstance(v, str) else dumps(v) for v in values], type=pa.string()
+        )
+
+
+def encode(columns: Dict[str, List[Any]], output_format: str) -> Dict[str, Any]:
+    """
+    {column: [values]} -> an Arrow IPC stream or a Parquet file, base64
+    encoded, with the schema alongside for clients that only want to look.
+    Both are zstd-compressed when pyarrow has the codec.
+    """
+    if output_format not in ARROW_FORMATS:
+        raise ValueError(f"Unknown binary output_format {output_format!r}; expected one of {', '.join(ARROW_FORMATS)}")
+    pa = _load()
+    table = pa.table({name: _column(pa, values) for name, values in columns.items()})
+    compression = "zstd" if pa.Codec.is_available("zstd") else None
+    sink = pa.BufferOutputStream()
+    if output_format == "arrow":
+        with pa.ipc.new_stream(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=compression)) as writer:
+            writer.write_table(table)
+    else:
+        pa.parquet.write_table(table, sink, compression=compression or "snappy")
+    blob = sink.getvalue().to_pybytes()
+    return {
+        "encoding": "base64",
+        "media_type": MEDIA_TYPES[output_format],
+        "schema": [{"name": field.name, "type": str(field.type)} for field in table.schema],
+        "rows": table.num_rows,
+        "bytes": len(blob),
+        "base64": base64.b64encode(blob).decode("ascii"),
+    }
+
+
+def decode(payload: Dict[str, Any]):
+    """Client-side inverse of encode(): the pyarrow.Table (call .to_pandas() for a DataFrame)."""
+    pa = _load()
+    blob = pa.BufferReader(base64.b64decode(payload["base64"]))
+    if payload["media_type"] == MEDIA_TYPES["parquet"]:
+        return pa.parquet.read_table(blob)
+    return pa.ipc.open_stream(blob).read_all()
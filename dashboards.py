@@ -0,0 +1,93 @@
+"""
+Concurrent execution of a dashboard's tiles
+Tiles are grouped by the saved query they run, each distinct query runs once
+under a concurrency bound, and every tile is reported as soon as its query
+finishes, so a dashboard takes about as long as its slowest tile
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+def tile_query(element: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The saved query behind a dashboard element (its own, its Look's or its merge result's), or None for text tiles."""
+    query_id = element.get("query_id")
+    query = element.get("query") or {}
+    look = element.get("look") or {}
+    if not query_id and look.get("query_id"):
+        query_id = look["query_id"]
+        query = look.get("query") or {}
+    if not query_id:
+        query_id = (element.get("result_maker") or {}).get("query_id")
+    if not query_id:
+        return None
+    return {"query_id": str(query_id), "model": query.get("model"), "limit": query.get("limit")}
+
+
+def plan_tiles(dashboard: Dict[str, Any]) -> Tuple["OrderedDict[str, Dict[str, Any]]", List[Dict[str, Any]]]:
+    """
+    Group the dashboard's query tiles by query id, in dashboard order.
+    Returns ({query_id: {"query": ..., "tiles": [...]}}, skipped_tiles).
+    """
+    groups: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    skipped = []
+    for element in dashboard.get("dashboard_elements") or []:
+        tile = {
+            "element_id": str(element.get("id")),
+            "title": element.get("title") or element.get("title_text"),
+            "type": element.get("type"),
+        }
+        query = tile_query(element)
+        if query is None:
+            skipped.append(tile)
+            continue
+        group = groups.setdefault(query["query_id"], {"query": query, "tiles": []})
+        group["tiles"].append(tile)
+    return groups, skipped
+
+
+async def run_tiles(
+    groups: "OrderedDict[str, Dict[str, Any]]",
+    run: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    concurrency: int = 6,
+    on_tile: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run each distinct query once, at most `concurrency` at a time.
+
+    `run(query)` returns the query's result; every tile sharing that query
+    gets a copy. A failing query marks its tiles as errors without stopping
+    the others. `on_tile(tile)` is awaited for each tile as it completes.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_group(query_id: str, group: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result, error = await run(group["query"]), None
+            except Exception as e:
+                result, error = {}, str(e)
+            seconds = round(time.perf_counter() - started, 3)
+        # A page cut short upstream carries its own error next to the rows it got
+        error = error or result.get("error")
+        element_ids = [tile["element_id"] for tile in group["tiles"]]
+        tiles = []
+        for tile in group["tiles"]:
+            tile = {
+                **tile,
+                **result,
+                "query_id": query_id,
+                "shared_with": [other for other in element_ids if other != tile["element_id"]],
+                "status": "error" if error else "ok",
+                "error": error,
+                "seconds": seconds,
+            }
+            tiles.append(tile)
+            if on_tile is not None:
+                await on_tile(tile)
+        return tiles
+
+    batches = await asyncio.gather(*(run_group(query_id, group) for query_id, group in groups.items()))
+    return [tile for batch in batches for tile in batch]
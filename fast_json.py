@@ -0,0 +1,51 @@
+"""
+Compact JSON encoding with an optional fast backend
+orjson when it is installed, the stdlib json module otherwise; both produce
+compact output (no indentation or padding) that decodes to the same values
+"""
+import json
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Encode compactly to UTF-8 bytes; unknown types are encoded with str()."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers wider than 64 bits; stdlib handles those
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Encode compactly to a str."""
+    if orjson is None:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def to_columns(rows: List[Dict[str, Any]], fields: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+    """
+    Row objects -> {field: [values]}. Field names are written once instead of
+    once per row, which roughly halves the size of a tall result.
+    """
+    if fields is None:
+        fields = list(rows[0].keys()) if rows else []
+    return {field: [row.get(field) for row in rows] for field in fields}
+
+
+def tool_serializer(data: Any) -> str:
+    """FastMCP tool_serializer: strings pass through, everything else is compact JSON."""
+    return data if isinstance(data, str) else dumps(data)
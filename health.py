@@ -0,0 +1,111 @@
+"""
+Cached health and readiness for the MCP server
+Checks run in the background on an interval; probes are answered from a
+precomputed response body so they cost nothing under load
+"""
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# A check returns (ok, detail); raising or timing out counts as a failure
+Check = Callable[[], Awaitable[Tuple[bool, str]]]
+
+
+class HealthMonitor:
+    """
+    Runs registered readiness checks every `interval` seconds and keeps the
+    last result as ready-to-send JSON.
+
+    Non-critical checks are reported but do not make the server unready.
+    Failures are logged only when a check changes state, not on every probe.
+    """
+
+    def __init__(self, interval: float = 30.0, timeout: float = 5.0, info: Optional[Dict[str, Any]] = None):
+        self.interval = interval
+        self.timeout = timeout
+        self.info = info or {}
+        self.checks: List[Tuple[str, Check, bool]] = []
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.ready = False
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.live_body = json.dumps({"status": "ok", **self.info}).encode("utf-8")
+        self.ready_body = self._render()
+
+    def check(self, name: str, critical: bool = True) -> Callable[[Check], Check]:
+        """Decorator registering a readiness check."""
+        def register(fn: Check) -> Check:
+            self.checks.append((name, fn, critical))
+            return fn
+        return register
+
+    async def _run_check(self, name: str, fn: Check, critical: bool) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            ok, detail = await asyncio.wait_for(fn(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            ok, detail = False, f"timed out after {self.timeout:g}s"
+        except Exception as e:
+            ok, detail = False, str(e) or type(e).__name__
+        previous = self.results.get(name)
+        if (previous["ok"] if previous else True) != ok:
+            state = "recovered" if ok else "failing"
+            print(f"{'INFO' if ok else 'WARNING'}: health check {name} {state}: {detail}", file=sys.stderr)
+        return {
+            "ok": ok,
+            "critical": critical,
+            "detail": detail,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    async def refresh(self) -> bool:
+        """Run every check once and rebuild the cached responses."""
+        results = await asyncio.gather(*(self._run_check(*check) for check in self.checks))
+        self.results = {name: result for (name, _, _), result in zip(self.checks, results)}
+        self.ready = all(result["ok"] for result in self.results.values() if result["critical"])
+        self.checked_at = time.time()
+        self.ready_body = self._render()
+        return self.ready
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self.checked_at is None:
+            status = "starting"
+        else:
+            status = "ok" if self.ready else "error"
+        return {
+            "status": status,
+            **self.info,
+            "ready": self.ready,
+            "checked_at": self.checked_at,
+            "checks": self.results,
+        }
+
+    def _render(self) -> bytes:
+        return json.dumps(self.snapshot()).encode("utf-8")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"WARNING: health refresh failed: {e}", file=sys.stderr)
+            # Re-check quickly while starting up or unready so recovery is seen promptly
+            await asyncio.sleep(self.interval if self.ready else min(self.interval, 2.0))
+
+    def start(self) -> None:
+        """Start the background check loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,171 @@
+"""
+Cached Cloud Run identity-token provider shared by the MCP client entry points
+Tokens are minted once per audience and refreshed in the background before
+they expire, so request paths never wait on the metadata server
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import timezone
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _mint_credentials(audience: str):
+    """
+    Create refreshable ID-token credentials for an audience.
+    - Locally: service account file from GOOGLE_APPLICATION_CREDENTIALS
+    - Cloud Run / GCE / Agent Engine: metadata server
+    """
+    from google.auth import compute_engine
+    from google.auth.transport.requests import Request
+    from google.oauth2 import service_account
+
+    sa_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    if sa_path and os.path.exists(sa_path):
+        return service_account.IDTokenCredentials.from_service_account_file(
+            sa_path,
+            target_audience=audience,
+        )
+    return compute_engine.IDTokenCredentials(
+        request=Request(),
+        target_audience=audience,
+        use_metadata_identity_endpoint=True,
+    )
+
+
+class _CachedToken:
+    def __init__(self, audience: str):
+        self.audience = audience
+        self.credentials = None
+        self.token: Optional[str] = None
+        self.expires_at = 0.0
+        # When the background thread should refresh, ahead of the request path
+        self.refresh_at = 0.0
+        self.lock = threading.Lock()
+
+
+class IdentityTokenProvider:
+    """
+    Per-audience ID-token cache.
+
+    get_token() returns the cached token while it has more than
+    `refresh_margin` seconds left. A daemon thread refreshes tokens that are
+    about to expire, so after the first call tokens are always served from
+    memory. Safe to call from many threads and from asyncio code
+    (get_token_async moves the rare blocking refresh off the event loop).
+    """
+
+    def __init__(self, refresh_margin: float = 300.0, background_refresh: bool = True):
+        self.refresh_margin = refresh_margin
+        self.background_refresh = background_refresh
+        self._tokens: Dict[str, _CachedToken] = {}
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.refreshes = 0
+        self.failures = 0
+
+    def _entry(self, audience: str) -> _CachedToken:
+        with self._lock:
+            entry = self._tokens.get(audience)
+            if entry is None:
+                entry = self._tokens[audience] = _CachedToken(audience)
+            return entry
+
+    def _is_fresh(self, entry: _CachedToken) -> bool:
+        return entry.token is not None and time.time() < entry.expires_at - self.refresh_margin
+
+    def _refresh(self, entry: _CachedToken) -> None:
+        from google.auth.transport.requests import Request
+
+        try:
+            if entry.credentials is None:
+                entry.credentials = _mint_credentials(entry.audience)
+            entry.credentials.refresh(Request())
+        except Exception as e:
+            self.failures += 1
+            raise RuntimeError(f"Identity token fetch failed: {e}")
+        entry.token = entry.credentials.token
+        expiry = entry.credentials.expiry
+        # google-auth reports expiry as a naive UTC datetime
+        entry.expires_at = (
+            expiry.replace(tzinfo=timezone.utc).timestamp() if expiry else time.time() + 3600
+        )
+        lifetime = max(entry.expires_at - time.time(), 0.0)
+        entry.refresh_at = entry.expires_at - min(self.refresh_margin * 1.5, lifetime / 2)
+        self.refreshes += 1
+        logger.info("Refreshed identity token for %s", entry.audience)
+
+    def get_token(self, audience: str) -> str:
+        """Return a valid ID token for `audience`, minting it only when needed."""
+        entry = self._entry(audience)
+        if not self._is_fresh(entry):
+            with entry.lock:
+                if not self._is_fresh(entry):
+                    self._refresh(entry)
+        self._ensure_refresher()
+        return entry.token
+
+    async def get_token_async(self, audience: str) -> str:
+        entry = self._entry(audience)
+        if self._is_fresh(entry):
+            return entry.token
+        return await asyncio.to_thread(self.get_token, audience)
+
+    def auth_headers(self, audience: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.get_token(audience)}"}
+
+    def header_provider(self, audience: str) -> Callable[..., Dict[str, str]]:
+        """
+        Per-request auth hook, e.g. for MCPToolset(header_provider=...).
+        Accepts and ignores the caller's context argument.
+        """
+        def provide(*_args: Any, **_kwargs: Any) -> Dict[str, str]:
+            return self.auth_headers(audience)
+
+        return provide
+
+    def _ensure_refresher(self) -> None:
+        if not self.background_refresh:
+            return
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(
+                    target=self._refresh_loop, name="id-token-refresher", daemon=True
+                )
+                self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                entries = list(self._tokens.values())
+            next_wake = 60.0
+            for entry in entries:
+                remaining = entry.refresh_at - time.time()
+                if remaining <= 0:
+                    with entry.lock:
+                        try:
+                            self._refresh(entry)
+                        except Exception as e:
+                            logger.warning("Background token refresh failed for %s: %s", entry.audience, e)
+                    remaining = entry.refresh_at - time.time()
+                next_wake = min(next_wake, max(remaining, 5.0))
+            self._stop.wait(next_wake)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+# Shared provider for every entry point in this process
+default_provider = IdentityTokenProvider(
+    refresh_margin=float(os.getenv("ID_TOKEN_REFRESH_MARGIN", "300")),
+)
+
+
+def get_identity_token(audience: str) -> str:
+    """Cached equivalent of the old per-call get_identity_token helpers."""
+    return default_provider.get_token(audience)
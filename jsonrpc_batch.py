@@ -0,0 +1,193 @@
+"""
+JSON-RPC 2.0 batch support for the MCP endpoint
+ASGI middleware that splits a batch array into single requests, runs them
+concurrently against the wrapped app and returns all responses in one body
+"""
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fast_json import dumps_bytes, loads
+
+SESSION_HEADER = b"mcp-session-id"
+
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def messages_from_body(content_type: str, body: bytes) -> List[Dict[str, Any]]:
+    """JSON-RPC messages from a JSON or SSE response body."""
+    if "text/event-stream" in content_type:
+        messages = []
+        data_lines: List[str] = []
+        for line in body.decode("utf-8").splitlines() + [""]:
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
+            elif not line and data_lines:
+                messages.append(loads("\n".join(data_lines)))
+                data_lines = []
+        return messages
+    if not body:
+        return []
+    payload = loads(body)
+    return payload if isinstance(payload, list) else [payload]
+
+
+class JSONRPCBatchMiddleware:
+    """
+    Accept JSON-RPC batch arrays on the MCP endpoint.
+
+    Each element is replayed as its own POST through the wrapped app, so the
+    MCP server, sessions and any inner middleware see ordinary requests.
+    `initialize` elements run first so the rest of the batch can use the new
+    session; everything else runs concurrently.
+    """
+
+    def __init__(self, app, path: str = "/mcp", max_batch: int = 50):
+        self.app = app
+        self.path = path.rstrip("/")
+        self.max_batch = max_batch
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") != self.path
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        if not body.lstrip().startswith(b"["):
+            await self.app(scope, self._replay(body, receive), send)
+            return
+
+        try:
+            batch = loads(body)
+        except json.JSONDecodeError:
+            await self._respond(send, [_error(None, -32700, "Parse error")], None)
+            return
+        if not batch:
+            await self._respond(send, [_error(None, -32600, "Empty batch")], None)
+            return
+        if len(batch) > self.max_batch:
+            await self._respond(
+                send, [_error(None, -32600, f"Batch exceeds {self.max_batch} requests")], None
+            )
+            return
+
+        headers = [(k, v) for k, v in scope["headers"] if k not in (b"content-length", b"accept")]
+        headers.append((b"accept", b"application/json, text/event-stream"))
+        session_id = dict(scope["headers"]).get(SESSION_HEADER)
+
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        initializers = [i for i, item in enumerate(batch) if isinstance(item, dict) and item.get("method") == "initialize"]
+        for index in initializers:
+            responses[index], new_session = await self._dispatch(scope, headers, session_id, batch[index])
+            session_id = new_session or session_id
+
+        rest = [i for i in range(len(batch)) if i not in initializers]
+        results = await asyncio.gather(
+            *(self._dispatch(scope, headers, session_id, batch[i]) for i in rest)
+        )
+        for index, (response, _) in zip(rest, results):
+            responses[index] = response
+
+        # Notifications have no response entry
+        await self._respond(send, [r for r in responses if r is not None], session_id)
+
+    @staticmethod
+    def _replay(body: bytes, upstream=None):
+        """A receive callable that yields the already-read body once."""
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            if upstream is not None:
+                return await upstream()
+            # Batch elements have no connection of their own; never disconnect
+            await asyncio.Event().wait()
+
+        return receive
+
+    async def _dispatch(
+        self, scope, headers, session_id: Optional[bytes], item: Any
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+        """Run one batch element through the wrapped app."""
+        if not isinstance(item, dict) or item.get("jsonrpc") != "2.0":
+            return _error(None, -32600, "Invalid Request"), None
+        request_id = item.get("id")
+
+        body = dumps_bytes(item)
+        sub_headers = [(k, v) for k, v in headers if k != SESSION_HEADER]
+        if session_id:
+            sub_headers.append((SESSION_HEADER, session_id))
+        sub_headers.append((b"content-length", str(len(body)).encode("ascii")))
+        sub_scope = dict(scope, headers=sub_headers)
+
+        status = 500
+        response_headers: Dict[bytes, bytes] = {}
+        chunks: List[bytes] = []
+        done = asyncio.Event()
+
+        async def capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.update({k.lower(): v for k, v in message.get("headers", [])})
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        app_task = asyncio.ensure_future(self.app(sub_scope, self._replay(body), capture))
+        done_task = asyncio.ensure_future(done.wait())
+        await asyncio.wait({app_task, done_task}, return_when=asyncio.FIRST_COMPLETED)
+        done_task.cancel()
+        if not app_task.done():
+            # Response is complete; let the app finish its cleanup on its own
+            app_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        elif app_task.exception() is not None:
+            return _error(request_id, -32603, str(app_task.exception())), None
+
+        new_session = response_headers.get(SESSION_HEADER)
+        if "id" not in item:
+            return None, new_session
+        content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+        try:
+            messages = messages_from_body(content_type, b"".join(chunks))
+        except ValueError:
+            messages = []
+        for message in messages:
+            if isinstance(message, dict) and message.get("id") == request_id and ("result" in message or "error" in message):
+                # Includes JSON-RPC errors sent with a 4xx status (e.g. admission 429s)
+                return message, new_session
+        if status >= 400:
+            return _error(request_id, -32603, f"HTTP {status}: {b''.join(chunks)[:200].decode('utf-8', 'replace')}"), new_session
+        return _error(request_id, -32603, "No response from server"), new_session
+
+    @staticmethod
+    async def _respond(send, messages: List[Dict[str, Any]], session_id: Optional[bytes]) -> None:
+        if not messages:
+            await send({"type": "http.response.start", "status": 202, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        body = dumps_bytes(messages)
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ]
+        if session_id:
+            headers.append((SESSION_HEADER, session_id))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
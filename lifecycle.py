@@ -0,0 +1,60 @@
+"""
+Startup/shutdown hooks for the MCP ASGI app
+Background services (index refresh, health checks, ...) register here and are
+started from the ASGI lifespan so they run once per server process
+"""
+import sys
+from typing import Awaitable, Callable, List
+
+Hook = Callable[[], Awaitable[None]]
+
+
+class Lifecycle:
+    """Collects async startup/shutdown hooks and runs them around an ASGI app."""
+
+    def __init__(self):
+        self.startup_hooks: List[Hook] = []
+        self.shutdown_hooks: List[Hook] = []
+
+    def on_startup(self, hook: Hook) -> Hook:
+        """Decorator registering a hook that runs before the first request."""
+        self.startup_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook: Hook) -> Hook:
+        """Decorator registering a hook that runs when the server stops."""
+        self.shutdown_hooks.append(hook)
+        return hook
+
+    async def startup(self) -> None:
+        for hook in self.startup_hooks:
+            await hook()
+
+    async def shutdown(self) -> None:
+        # Shut down in reverse order; one failing hook must not skip the rest
+        for hook in reversed(self.shutdown_hooks):
+            try:
+                await hook()
+            except Exception as e:
+                print(f"WARNING: shutdown hook {hook.__name__} failed: {e}", file=sys.stderr)
+
+    def wrap(self, app):
+        """Return an ASGI app that runs the hooks inside `app`'s own lifespan."""
+        lifecycle = self
+
+        async def lifespan_app(scope, receive, send):
+            if scope["type"] != "lifespan":
+                await app(scope, receive, send)
+                return
+
+            async def wrapped_receive():
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await lifecycle.startup()
+                elif message["type"] == "lifespan.shutdown":
+                    await lifecycle.shutdown()
+                return message
+
+            await app(scope, wrapped_receive, send)
+
+        return lifespan_app
@@ -0,0 +1,313 @@
+"""
+Async Looker API client shared by the MCP tools in server.py
+Keeps one pooled keep-alive HTTP connection set and a cached OAuth access token
+"""
+import asyncio
+import hashlib
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+
+class LookerAPIError(Exception):
+    """Raised when the Looker API returns a non-success response."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Looker API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+class LookerClient:
+    """
+    Async client for the Looker REST API.
+
+    A single httpx.AsyncClient is created lazily and reused for every call so
+    TCP/TLS connections stay warm. The access token returned by /login is
+    cached and refreshed `token_refresh_margin` seconds before it expires;
+    concurrent callers share one login round trip.
+
+    `observer(method, path, status, seconds)` is called after every API round
+    trip (e.g. to record metrics); `logins` and `token_rejections` count token
+    refreshes and tokens the server refused.
+
+    With a shared `token_store` (see shared_store.py) the access token is
+    shared by every worker process, so N workers don't mean N logins.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        client_id: str,
+        client_secret: str,
+        verify_ssl: bool = True,
+        api_version: str = "4.0",
+        timeout: float = 120.0,
+        max_connections: int = 20,
+        token_refresh_margin: float = 60.0,
+        observer: Optional[Callable[[str, str, int, float], None]] = None,
+        token_store=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_url = f"{self.base_url}/api/{api_version}"
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.verify_ssl = verify_ssl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.token_refresh_margin = token_refresh_margin
+        self.observer = observer
+        self.token_store = token_store
+        self._token_key = "looker_token:" + hashlib.sha256(f"{self.api_url} {client_id}".encode("utf-8")).hexdigest()[:16]
+        self.logins = 0
+        self.token_rejections = 0
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, str], **kwargs: Any) -> "LookerClient":
+        """Build a client from the LOOKER_CONFIG mapping used by server.py."""
+        return cls(
+            base_url=config["LOOKER_BASE_URL"],
+            client_id=config["LOOKER_CLIENT_ID"],
+            client_secret=config["LOOKER_CLIENT_SECRET"],
+            verify_ssl=config.get("LOOKER_VERIFY_SSL", "true").lower() not in ("false", "0", "no"),
+            api_version=config.get("LOOKER_API_VERSION", "4.0"),
+            **kwargs,
+        )
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """The pooled HTTP client, created on first use."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.api_url,
+                verify=self.verify_ssl,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=300.0,
+                ),
+            )
+        return self._http
+
+    def token_is_fresh(self) -> bool:
+        """True when the cached token is usable without a refresh."""
+        return self._token is not None and time.monotonic() < self._token_expires_at - self.token_refresh_margin
+
+    async def access_token(self) -> str:
+        """Return a valid access token, logging in only when needed."""
+        if self.token_is_fresh():
+            return self._token
+        async with self._token_lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self.token_is_fresh():
+                return self._token
+            if not self._adopt_shared_token():
+                await self._login()
+            return self._token
+
+    def _adopt_shared_token(self) -> bool:
+        """Use a token another worker already obtained, if it is still fresh."""
+        if self.token_store is None:
+            return False
+        shared = self.token_store.get(self._token_key)
+        if not shared:
+            return False
+        remaining = shared["expires_at"] - time.time()
+        if remaining <= self.token_refresh_margin:
+            return False
+        self._token = shared["token"]
+        self._token_expires_at = time.monotonic() + remaining
+        return True
+
+    def _observe(self, method: str, path: str, status: int, started: float) -> None:
+        if self.observer is not None:
+            self.observer(method, path, status, time.perf_counter() - started)
+
+    async def _login(self) -> None:
+        self.logins += 1
+        started = time.perf_counter()
+        response = await self.http.post(
+            "/login",
+            data={"client_id": self.client_id, "client_secret": self.client_secret},
+        )
+        self._observe("POST", "/login", response.status_code, started)
+        if response.status_code != 200:
+            raise LookerAPIError(response.status_code, response.text)
+        payload = response.json()
+        self._token = payload["access_token"]
+        expires_in = float(payload.get("expires_in", 3600))
+        self._token_expires_at = time.monotonic() + expires_in
+        if self.token_store is not None:
+            self.token_store.set(
+                self._token_key, {"token": self._token, "expires_at": time.time() + expires_in}, ttl=expires_in
+            )
+
+    def invalidate_token(self) -> None:
+        """Drop the cached token so the next call logs in again."""
+        if self.token_store is not None and self._token is not None:
+            shared = self.token_store.get(self._token_key)
+            # Only drop the shared copy if it is the token that was rejected
+            if shared and shared.get("token") == self._token:
+                self.token_store.delete(self._token_key)
+        self._token = None
+        self._token_expires_at = 0.0
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+    ) -> Any:
+        """Send an authenticated API request and return the decoded JSON body."""
+        for attempt in range(2):
+            token = await self.access_token()
+            started = time.perf_counter()
+            response = await self.http.request(
+                method,
+                path,
+                params=params,
+                json=json,
+                headers={"Authorization": f"token {token}"},
+            )
+            self._observe(method, path, response.status_code, started)
+            # The token can be revoked server-side before it expires; retry once
+            if response.status_code == 401 and attempt == 0:
+                self.token_rejections += 1
+                self.invalidate_token()
+                continue
+            break
+
+        if response.status_code >= 400:
+            raise LookerAPIError(response.status_code, response.text)
+        if not response.content:
+            return None
+        return response.json()
+
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Any = None,
+    ) -> AsyncIterator[bytes]:
+        """Send an authenticated API request and yield the response body in chunks."""
+        for attempt in range(2):
+            token = await self.access_token()
+            started = time.perf_counter()
+            async with self.http.stream(
+                method,
+                path,
+                params=params,
+                json=json,
+                headers={"Authorization": f"token {token}"},
+            ) as response:
+                if response.status_code == 401 and attempt == 0:
+                    self._observe(method, path, response.status_code, started)
+                    self.token_rejections += 1
+                    self.invalidate_token()
+                    continue
+                if response.status_code >= 400:
+                    body = await response.aread()
+                    self._observe(method, path, response.status_code, started)
+                    raise LookerAPIError(response.status_code, body.decode("utf-8", "replace"))
+                # Time to the first byte: the query's cost on the Looker side
+                self._observe(method, path, response.status_code, started)
+                async for chunk in response.aiter_bytes():
+                    yield chunk
+                return
+
+    async def ping(self) -> int:
+        """Unauthenticated GET /api/versions; returns the HTTP status code."""
+        started = time.perf_counter()
+        response = await self.http.get(f"{self.base_url}/api/versions")
+        self._observe("GET", "/versions", response.status_code, started)
+        return response.status_code
+
+    async def get_models(self) -> List[Dict[str, Any]]:
+        return await self.request(
+            "GET", "/lookml_models", params={"fields": "name,label,project_name,explores"}
+        )
+
+    async def get_explore(self, model: str, explore: str) -> Dict[str, Any]:
+        return await self.request(
+            "GET",
+            f"/lookml_models/{model}/explores/{explore}",
+            params={"fields": "name,label,description,fields"},
+        )
+
+    async def create_query(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        """Save a query (Looker reuses the id of an identical one) without running it."""
+        return await self.request("POST", "/queries", params={"fields": "id,slug"}, json=query)
+
+    def stream_query(self, query_id: str, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        params = {"limit": limit} if limit is not None else None
+        return self.stream("GET", f"/queries/{query_id}/run/json", params=params)
+
+    async def get_dashboard(
+        self,
+        dashboard_id: str,
+        fields: str = (
+            "id,title,dashboard_elements(id,title,title_text,type,query_id,"
+            "query(model,view,limit),look(query_id,query(model,view,limit)),result_maker(query_id))"
+        ),
+    ) -> Dict[str, Any]:
+        return await self.request("GET", f"/dashboards/{dashboard_id}", params={"fields": fields})
+
+    async def get_look(self, look_id: str, fields: str = "id,title,query_id,query(limit)") -> Dict[str, Any]:
+        return await self.request("GET", f"/looks/{look_id}", params={"fields": fields})
+
+    async def kill_query(self, query_id: str) -> int:
+        """
+        Kill the running execution of a saved query; returns how many were
+        killed (0 or 1).
+
+        Looker reuses the id of identical queries, so other callers can be
+        running the same query_id and the run endpoints do not say which
+        execution is ours. Only a lone execution is killed; with more than
+        one running, none is.
+        """
+        executions = [
+            running
+            for running in await self.request("GET", "/running_queries") or []
+            if str(running.get("query_id") or (running.get("query") or {}).get("id")) == str(query_id)
+            and running.get("query_task_id")
+        ]
+        if len(executions) != 1:
+            return 0
+        await self.kill_query_task(executions[0]["query_task_id"])
+        return 1
+
+    async def create_query_task(self, query_id: str, result_format: str = "json") -> Dict[str, Any]:
+        """Start a saved query as an async query task; poll it with get_query_task."""
+        return await self.request(
+            "POST", "/query_tasks", params={"fields": "id,status"},
+            json={"query_id": query_id, "result_format": result_format},
+        )
+
+    async def get_query_task(self, task_id: str) -> Dict[str, Any]:
+        return await self.request("GET", f"/query_tasks/{task_id}", params={"fields": "id,status,runtime"})
+
+    def stream_query_task_results(self, task_id: str) -> AsyncIterator[bytes]:
+        """Results of a complete query task, in its result_format."""
+        return self.stream("GET", f"/query_tasks/{task_id}/results")
+
+    async def kill_query_task(self, task_id: str) -> None:
+        await self.request("DELETE", f"/running_queries/{task_id}")
+
+    def stream_look(self, look_id: str, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        params = {"limit": limit} if limit is not None else None
+        return self.stream("GET", f"/looks/{look_id}/run/json", params=params)
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
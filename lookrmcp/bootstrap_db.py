@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Fast SQLite database bootstrap from SQL, CSV and Parquet seed files
+Loads everything in one transaction with the journal off, creates indexes
+after the data is in, and can emit a read-only snapshot at image-build time
+
+Examples:
+    # Schema plus sample rows from init-db.sql
+    python3 bootstrap_db.py --schema init-db.sql --output data/sample.db
+
+    # Schema, then bulk CSV/Parquet data (file name = table name), aggregate
+    # tables from aggregates.json, read-only snapshot
+    python3 bootstrap_db.py --schema init-db.sql seed/users.csv seed/orders.parquet \\
+        --aggregates aggregates.json --output /app/snapshot/sample.db --snapshot
+"""
+
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+CREATE_INDEX = re.compile(r"^\s*CREATE\s+(UNIQUE\s+)?INDEX\b", re.IGNORECASE)
+
+
+def split_statements(script: str) -> List[str]:
+    """Split a SQL script into complete statements (handles ; inside strings)."""
+    statements = []
+    current = ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statement = current.strip()
+            if statement:
+                statements.append(statement)
+            current = ""
+    if current.strip():
+        statements.append(current.strip())
+    return statements
+
+
+def strip_comments(statement: str) -> str:
+    lines = [line for line in statement.splitlines() if not line.strip().startswith("--")]
+    return "\n".join(lines).strip()
+
+
+def infer_type(values: Sequence[str]) -> str:
+    """SQLite column type from a sample of CSV values."""
+    kinds = set()
+    for value in values:
+        if value == "":
+            continue
+        try:
+            int(value)
+            kinds.add("INTEGER")
+            continue
+        except ValueError:
+            pass
+        try:
+            float(value)
+            kinds.add("REAL")
+            continue
+        except ValueError:
+            kinds.add("TEXT")
+    if not kinds or "TEXT" in kinds:
+        return "TEXT"
+    return "REAL" if "REAL" in kinds else "INTEGER"
+
+
+def batched(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    batch: List[tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({quote(table)})")]
+
+
+def ensure_table(conn: sqlite3.Connection, table: str, columns: List[str], types: List[str]) -> None:
+    if table_columns(conn, table):
+        return
+    definition = ", ".join(f"{quote(name)} {kind}" for name, kind in zip(columns, types))
+    conn.execute(f"CREATE TABLE {quote(table)} ({definition})")
+
+
+def insert_rows(
+    conn: sqlite3.Connection, table: str, columns: List[str], rows: Iterable[tuple], batch_size: int
+) -> int:
+    sql = f"INSERT INTO {quote(table)} ({', '.join(quote(c) for c in columns)}) VALUES ({', '.join('?' * len(columns))})"
+    count = 0
+    for batch in batched(rows, batch_size):
+        conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def load_csv(conn: sqlite3.Connection, path: str, table: str, batch_size: int) -> int:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        sample = [row for _, row in zip(range(1000), reader)]
+        types = [infer_type([row[i] for row in sample if i < len(row)]) for i in range(len(columns))]
+        ensure_table(conn, table, columns, types)
+        # Empty CSV fields become NULL rather than ''
+        rows = ([value if value != "" else None for value in row] for row in sample)
+        count = insert_rows(conn, table, columns, (tuple(r) for r in rows), batch_size)
+        rest = (tuple(value if value != "" else None for value in row) for row in reader)
+        return count + insert_rows(conn, table, columns, rest, batch_size)
+
+
+def load_parquet(conn: sqlite3.Connection, path: str, table: str, batch_size: int) -> int:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit(f"❌ {path}: Parquet seed files need pyarrow (pip install pyarrow)")
+
+    parquet = pq.ParquetFile(path)
+    columns = parquet.schema_arrow.names
+    types = []
+    for field in parquet.schema_arrow:
+        kind = str(field.type)
+        if kind.startswith(("int", "uint", "bool")):
+            types.append("INTEGER")
+        elif kind.startswith(("float", "double", "decimal")):
+            types.append("REAL")
+        elif kind.startswith(("binary", "large_binary")):
+            types.append("BLOB")
+        else:
+            types.append("TEXT")
+    ensure_table(conn, table, columns, types)
+
+    def rows() -> Iterator[tuple]:
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+    return insert_rows(conn, table, columns, rows(), batch_size)
+
+
+def bootstrap(
+    output: str,
+    schema: Optional[str] = None,
+    data_files: Sequence[str] = (),
+    batch_size: int = 10000,
+    snapshot: bool = False,
+    force: bool = False,
+    aggregates: Optional[str] = None,
+) -> Tuple[int, float]:
+    """Build `output`; returns (rows loaded from data files, seconds)."""
+    start = time.perf_counter()
+    if os.path.exists(output) and not force:
+        raise SystemExit(f"❌ {output} already exists (use --force to rebuild)")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    # Build next to the target and rename, so a half-built file is never served
+    building = f"{output}.building"
+    if os.path.exists(building):
+        os.remove(building)
+    conn = sqlite3.connect(building, isolation_level=None)
+    # Nothing to protect while building: no journal, no fsyncs, one exclusive lock
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -262144")
+
+    deferred_indexes: List[str] = []
+    total_rows = 0
+    conn.execute("BEGIN")
+    if schema:
+        with open(schema, encoding="utf-8") as f:
+            for statement in split_statements(f.read()):
+                if CREATE_INDEX.match(strip_comments(statement)):
+                    deferred_indexes.append(statement)
+                else:
+                    conn.execute(statement)
+    for path in data_files:
+        table, extension = os.path.splitext(os.path.basename(path))
+        extension = extension.lower()
+        if extension == ".csv":
+            count = load_csv(conn, path, table, batch_size)
+        elif extension in (".parquet", ".pq"):
+            count = load_parquet(conn, path, table, batch_size)
+        elif extension == ".sql":
+            with open(path, encoding="utf-8") as f:
+                for statement in split_statements(f.read()):
+                    conn.execute(statement)
+            count = 0
+        else:
+            raise SystemExit(f"❌ Unsupported seed file: {path}")
+        total_rows += count
+        print(f"  ✓ {path} → {table}: {count} rows", file=sys.stderr)
+
+    # Building each index once over loaded data beats updating it per row
+    for statement in deferred_indexes:
+        conn.execute(statement)
+    # Aggregate tables are filled in one GROUP BY each, then kept current by their triggers
+    if aggregates:
+        from sqlite_aggregates import load_aggregates
+
+        for name in load_aggregates(aggregates).install(conn):
+            print(f"  ✓ aggregate {name}", file=sys.stderr)
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+
+    os.replace(building, output)
+    if snapshot:
+        os.chmod(output, 0o444)
+    return total_rows, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk-load a SQLite database from SQL, CSV and Parquet files")
+    parser.add_argument("data", nargs="*", help="CSV/Parquet/SQL seed files; the file name is the table name")
+    parser.add_argument("--schema", help="SQL script run first; its CREATE INDEX statements run after the data load")
+    parser.add_argument("--output", default=os.getenv("SQLITE_DATABASE", "data/sample.db"), help="Database to create")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per executemany batch (default: 10000)")
+    parser.add_argument("--snapshot", action="store_true", help="Mark the result read-only (image-build snapshot)")
+    parser.add_argument("--force", action="store_true", help="Replace an existing database")
+    parser.add_argument("--aggregates", help="Aggregate declarations (JSON) to build after the data load")
+    args = parser.parse_args()
+
+    print(f"📝 Building {args.output}...", file=sys.stderr)
+    rows, seconds = bootstrap(
+        args.output,
+        schema=args.schema,
+        data_files=args.data,
+        batch_size=args.batch_size,
+        snapshot=args.snapshot,
+        force=args.force,
+        aggregates=args.aggregates,
+    )
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"✓ Database built in {seconds:.2f}s ({rows} seed rows, {size_mb:.1f} MB)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for tool results
+
+Encodes synthetic tall (many rows) and wide (many columns) result sets the way
+the servers used to (stdlib json, indent=2) and the way they do now (compact,
+orjson when installed, optionally column-wise, or Arrow IPC / Parquet when
+pyarrow is installed) and reports time and size.
+
+Examples:
+    python json_bench.py
+    python json_bench.py --tall-rows 200000 --wide-columns 500 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# fast_json / arrow_format live at the repo root, shared with the Looker server
+# (the Docker build copies them next to this file)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arrow_format
+import fast_json
+
+
+def make_rows(n_rows: int, n_columns: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Rows shaped like SQL/Looker results: ints, floats, strings, dates, nulls."""
+    rng = random.Random(seed)
+    kinds = ["int", "float", "str", "date", "nullable"]
+    columns = [(f"{kinds[i % len(kinds)]}_{i}", kinds[i % len(kinds)]) for i in range(n_columns)]
+    words = ["complete", "pending", "shipped", "returned", "cancelled", "processing"]
+
+    def value(kind: str) -> Any:
+        if kind == "int":
+            return rng.randint(0, 10_000_000)
+        if kind == "float":
+            return round(rng.uniform(0, 10_000), 2)
+        if kind == "str":
+            return rng.choice(words)
+        if kind == "date":
+            return f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        return None if rng.random() < 0.3 else rng.choice(words)
+
+    return [{name: value(kind) for name, kind in columns} for _ in range(n_rows)]
+
+
+def encoders(rows: List[Dict[str, Any]]) -> List[Tuple[str, Callable[[], bytes], Callable[[bytes], Any]]]:
+    """(name, encode, decode) triples; decode turns the encoded body back into data."""
+    fields = list(rows[0].keys())
+    result = [
+        ("stdlib indent=2 (before)", lambda: json.dumps(rows, indent=2).encode("utf-8"), fast_json.loads),
+        ("stdlib compact", lambda: json.dumps(rows, separators=(",", ":")).encode("utf-8"), fast_json.loads),
+        (f"fast_json rows ({fast_json.BACKEND})", lambda: fast_json.dumps_bytes(rows), fast_json.loads),
+        (f"fast_json columns ({fast_json.BACKEND})", lambda: fast_json.dumps_bytes(fast_json.to_columns(rows, fields)), fast_json.loads),
+    ]
+    if arrow_format.available():
+        for output_format in arrow_format.ARROW_FORMATS:
+            # Timed the way a client sees it: the JSON tool result, decoded to a table
+            result.append((
+                f"{output_format} (base64)",
+                lambda output_format=output_format: fast_json.dumps_bytes(
+                    arrow_format.encode(fast_json.to_columns(rows, fields), output_format)
+                ),
+                lambda body: arrow_format.decode(fast_json.loads(body)),
+            ))
+    return result
+
+
+def time_call(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def bench(label: str, rows: List[Dict[str, Any]], repeat: int) -> None:
+    print(f"\n{label}: {len(rows):,} rows x {len(rows[0])} columns")
+    print(f"  {'encoder':<32} {'encode ms':>10} {'decode ms':>10} {'MB':>8} {'speedup':>8}")
+    baseline = None
+    for name, encode, decode in encoders(rows):
+        encode_seconds, body = time_call(encode, repeat)
+        decode_seconds, _ = time_call(lambda: decode(body), repeat)
+        baseline = baseline or encode_seconds
+        print(
+            f"  {name:<32} {encode_seconds * 1000:>10.1f} {decode_seconds * 1000:>10.1f} "
+            f"{len(body) / 1e6:>8.2f} {baseline / encode_seconds:>7.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tall-rows", type=int, default=50_000)
+    parser.add_argument("--tall-columns", type=int, default=8)
+    parser.add_argument("--wide-rows", type=int, default=2_000)
+    parser.add_argument("--wide-columns", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per encoder; the median is reported")
+    args = parser.parse_args()
+
+    print(f"JSON backend: {fast_json.BACKEND}, pyarrow: {'yes' if arrow_format.available() else 'no'}")
+    bench("Tall", make_rows(args.tall_rows, args.tall_columns), args.repeat)
+    bench("Wide", make_rows(args.wide_rows, args.wide_columns), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Async MCP client over streamable HTTP
+One pooled httpx.AsyncClient (HTTP/2 when the h2 package is installed) and
+one MCP session shared by any number of concurrent tool calls
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import random
+import sys
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# fast_json lives at the repo root, shared with the Looker server
+# (the Docker build copies it next to this file)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fast_json import dumps_bytes, loads
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2025-03-26"
+SESSION_HEADER = "mcp-session-id"
+RETRY_STATUS = {429, 502, 503, 504}
+# Failures that mean the server never ran the request, so even a tool call can be resent
+UNSENT_STATUS = {429}
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class MCPError(Exception):
+    """JSON-RPC error returned by the MCP server."""
+
+    def __init__(self, error: Dict[str, Any]):
+        super().__init__(f"MCP error {error.get('code')}: {error.get('message')}")
+        self.code = error.get("code")
+        self.message = error.get("message")
+        self.data = error.get("data")
+
+
+class SessionExpired(Exception):
+    """The server no longer recognises our mcp-session-id."""
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def is_session_error(response: httpx.Response) -> bool:
+    """True when the server rejected our mcp-session-id (404 per spec; some servers send 400)."""
+    if response.status_code == 404:
+        return True
+    return response.status_code == 400 and "session" in response.text.lower()
+
+
+def calls_tools(payload: Any) -> bool:
+    """True when a JSON-RPC payload (or batch) contains a tools/call request."""
+    messages = payload if isinstance(payload, list) else [payload]
+    return any(message.get("method") == "tools/call" for message in messages)
+
+
+def parse_mcp_response(response: httpx.Response) -> List[Dict[str, Any]]:
+    """Return the JSON-RPC messages in a plain JSON or SSE response body."""
+    content_type = response.headers.get("content-type", "")
+    if "text/event-stream" in content_type:
+        messages = []
+        data_lines: List[str] = []
+        for line in response.text.splitlines() + [""]:
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
+            elif not line and data_lines:
+                messages.append(loads("\n".join(data_lines)))
+                data_lines = []
+        return messages
+    if not response.content:
+        return []
+    payload = loads(response.content)
+    return payload if isinstance(payload, list) else [payload]
+
+
+class AsyncMCPClient:
+    """
+    Asyncio MCP client for streamable-HTTP servers.
+
+    - initialize() runs once; the server's mcp-session-id is sent on every
+      later request and the session is re-established if the server drops it
+    - request()/call_tool() are safe to run concurrently on one client
+    - transport errors and 429/5xx responses are retried with jittered
+      exponential backoff; tool calls are not idempotent, so they are only
+      retried when the server cannot have run them (429, connection
+      failures) unless retry_tool_calls is set
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30.0,
+        max_connections: int = 100,
+        http2: bool = True,
+        retries: int = 3,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        client_info: Optional[Dict[str, str]] = None,
+        verify_ssl: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        retry_tool_calls: bool = False,
+    ):
+        self.endpoint_url = endpoint_url
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",
+            **(headers or {}),
+        }
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.http2 = http2 and _http2_available()
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client_info = client_info or {"name": "mcp-async-client", "version": "1.0.0"}
+        self.verify_ssl = verify_ssl
+        # Custom transport, e.g. httpx.ASGITransport to drive an in-process app
+        self.transport = transport
+        self.retry_tool_calls = retry_tool_calls
+
+        self.session_id: Optional[str] = None
+        self.server_info: Dict[str, Any] = {}
+        self.server_capabilities: Dict[str, Any] = {}
+        self._http: Optional[httpx.AsyncClient] = None
+        self._ids = itertools.count(1)
+        self._init_lock = asyncio.Lock()
+        self._initialized = False
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """The pooled HTTP client, created on first use."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                http2=self.http2,
+                follow_redirects=True,
+                timeout=self.timeout,
+                verify=self.verify_ssl,
+                headers=self.headers,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._http
+
+    async def __aenter__(self) -> "AsyncMCPClient":
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spread retries from many callers instead of syncing them
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def post(self, payload: Any) -> httpx.Response:
+        """POST a JSON-RPC payload with session header, timeouts and retries."""
+        headers = {SESSION_HEADER: self.session_id} if self.session_id else {}
+        # A 502 or read timeout may come after the tool already ran (e.g. a Looker query)
+        replayable = self.retry_tool_calls or not calls_tools(payload)
+        retry_status = RETRY_STATUS if replayable else UNSENT_STATUS
+        retry_errors = httpx.TransportError if replayable else UNSENT_ERRORS
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.http.post(self.endpoint_url, content=dumps_bytes(payload), headers=headers)
+            except retry_errors as e:
+                if attempt == self.retries:
+                    raise
+                logger.debug("MCP transport error (%s), retrying", e)
+            else:
+                if response.status_code not in retry_status or attempt == self.retries:
+                    return response
+                retry_after = response.headers.get("retry-after")
+                if retry_after and retry_after.isdigit():
+                    await asyncio.sleep(min(float(retry_after), self.backoff_max))
+                    continue
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def initialize(self) -> Dict[str, Any]:
+        """Open the MCP session (once, even if called concurrently)."""
+        async with self._init_lock:
+            if self._initialized:
+                return self.server_capabilities
+            self.session_id = None
+            result = await self._request(
+                "initialize",
+                {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {"roots": {"listChanged": True}, "sampling": {}},
+                    "clientInfo": self.client_info,
+                },
+                capture_session=True,
+            )
+            self.server_info = result.get("serverInfo", {})
+            self.server_capabilities = result.get("capabilities", {})
+            await self.notify("notifications/initialized")
+            self._initialized = True
+            return self.server_capabilities
+
+    async def _request(
+        self, method: str, params: Optional[Dict[str, Any]] = None, capture_session: bool = False
+    ) -> Any:
+        request_id = next(self._ids)
+        payload: Dict[str, Any] = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            payload["params"] = params
+        response = await self.post(payload)
+        if capture_session and response.headers.get(SESSION_HEADER):
+            self.session_id = response.headers[SESSION_HEADER]
+        if self.session_id and not capture_session and is_session_error(response):
+            raise SessionExpired()
+        response.raise_for_status()
+        for message in parse_mcp_response(response):
+            if message.get("id") == request_id:
+                if "error" in message:
+                    raise MCPError(message["error"])
+                return message.get("result", {})
+        raise MCPError({"code": -32603, "message": f"No response for request {request_id}"})
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Send a JSON-RPC request on the session and return its result."""
+        if not self._initialized:
+            await self.initialize()
+        session_id = self.session_id
+        try:
+            return await self._request(method, params)
+        except SessionExpired:
+            # Server restarted or evicted the session: open a new one once,
+            # unless a concurrent call already did
+            if self.session_id == session_id:
+                self._initialized = False
+            await self.initialize()
+            return await self._request(method, params)
+
+    async def notify(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
+        payload: Dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            payload["params"] = params
+        await self.post(payload)
+
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        tools: List[Dict[str, Any]] = []
+        cursor = None
+        while True:
+            result = await self.request("tools/list", {"cursor": cursor} if cursor else None)
+            tools.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                return tools
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.request("tools/call", {"name": name, "arguments": arguments or {}})
+
+    async def call_tools(self, calls: List[Dict[str, Any]], concurrency: int = 32) -> List[Any]:
+        """
+        Run many {"name", "arguments"} tool calls concurrently on this session.
+        Failures are returned in place as exceptions rather than raised.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(call: Dict[str, Any]) -> Any:
+            async with semaphore:
+                return await self.call_tool(call["name"], call.get("arguments"))
+
+        return await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+
+    async def batch(self, requests: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Send {"method", "params"} requests as one JSON-RPC batch POST.
+        Returns results in request order; JSON-RPC errors are returned in place
+        as MCPError instances.
+        """
+        if not self._initialized:
+            await self.initialize()
+        ids = [next(self._ids) for _ in requests]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": req["method"], **({"params": req["params"]} if req.get("params") is not None else {})}
+            for request_id, req in zip(ids, requests)
+        ]
+        response = await self.post(payload)
+        response.raise_for_status()
+        by_id = {message.get("id"): message for message in parse_mcp_response(response)}
+        results: List[Any] = []
+        for request_id in ids:
+            message = by_id.get(request_id)
+            if message is None:
+                results.append(MCPError({"code": -32603, "message": f"No response for request {request_id}"}))
+            elif "error" in message:
+                results.append(MCPError(message["error"]))
+            else:
+                results.append(message.get("result", {}))
+        return results
+
+    async def call_tools_batch(self, calls: List[Dict[str, Any]], batch_size: int = 50) -> List[Any]:
+        """
+        Run {"name", "arguments"} tool calls as JSON-RPC batches: one round
+        trip per `batch_size` calls instead of one per call.
+        """
+        requests = [
+            {"method": "tools/call", "params": {"name": call["name"], "arguments": call.get("arguments") or {}}}
+            for call in calls
+        ]
+        chunks = [requests[i:i + batch_size] for i in range(0, len(requests), batch_size)]
+        try:
+            results = await asyncio.gather(*(self.batch(chunk) for chunk in chunks))
+        except httpx.HTTPStatusError:
+            # Server does not accept batch arrays; fall back to concurrent calls
+            return await self.call_tools(calls)
+        return [result for chunk in results for result in chunk]
+
+    async def aclose(self) -> None:
+        if self._http is not None and not self._http.is_closed:
+            if self.session_id:
+                try:
+                    await self._http.delete(self.endpoint_url, headers={SESSION_HEADER: self.session_id})
+                except httpx.HTTPError:
+                    pass
+            await self._http.aclose()
+        self._http = None
+        self._initialized = False
+        self.session_id = None
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Load generator and latency benchmark for MCP endpoints
+
+Drives a configurable mix of initialize / tools/list / tools/call requests at a
+fixed concurrency (closed loop) or a fixed arrival rate (open loop) and reports
+throughput and p50/p95/p99 latency per operation.
+
+Examples:
+    # In-process stub toolbox, no network
+    python mcp_bench.py --stub --concurrency 50 --duration 10
+
+    # Local SQLite MCP server, 200 req/s, compare with a saved baseline
+    python mcp_bench.py --url http://localhost:8080/mcp --rate 200 \\
+        --mix "tools/call:execute_sql=8,tools/call:list_tables=1,tools/list=1" \\
+        --output bench.json --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from mcp_async_client import PROTOCOL_VERSION, SESSION_HEADER, AsyncMCPClient, MCPError
+
+DEFAULT_MIX = "tools/call:execute_sql=6,tools/call:list_tables=2,tools/list=1,initialize=1"
+
+DEFAULT_TOOL_ARGS = {
+    "execute_sql": {"sql": "SELECT COUNT(*) AS total FROM users;"},
+    "list_tables": {"output_format": "simple"},
+    "query": {"model": "ecommerce", "explore": "orders", "fields": ["orders.count"], "limit": 10},
+    "get_models": {},
+}
+
+
+def parse_mix(mix: str) -> List[Tuple[str, int]]:
+    """Parse "op=weight,..." where op is initialize, tools/list or tools/call:<tool>."""
+    operations = []
+    for part in mix.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        operations.append((name.strip(), int(weight or 1)))
+    return operations
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def stub_toolbox_app(latency_ms: float = 2.0):
+    """
+    Minimal in-process MCP server mimicking `toolbox --prebuilt sqlite`.
+    Used to measure client/harness overhead with no network or database.
+    """
+    tools = [
+        {"name": "execute_sql", "description": "Execute SQL", "inputSchema": {"type": "object"}},
+        {"name": "list_tables", "description": "List tables", "inputSchema": {"type": "object"}},
+    ]
+
+    async def handle(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if "id" not in message:
+            return None
+        method = message.get("method")
+        if method == "initialize":
+            result = {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": {"name": "stub-toolbox", "version": "0.0.0"},
+            }
+        elif method == "tools/list":
+            result = {"tools": tools}
+        elif method == "tools/call":
+            await asyncio.sleep(latency_ms / 1000.0)
+            result = {"content": [{"type": "text", "text": json.dumps([{"total": 4}])}]}
+        else:
+            return {"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32601, "message": "Method not found"}}
+        return {"jsonrpc": "2.0", "id": message["id"], "result": result}
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        payload = json.loads(body) if body else {}
+        if isinstance(payload, list):
+            responses = [r for r in await asyncio.gather(*(handle(m) for m in payload)) if r is not None]
+        else:
+            responses = await handle(payload)
+        status = 200 if responses else 202
+        out = json.dumps(responses).encode("utf-8") if responses else b""
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"mcp-session-id", b"stub-session")],
+        })
+        await send({"type": "http.response.body", "body": out})
+
+    return app
+
+
+class Benchmark:
+    """Runs one load test and collects per-operation latencies."""
+
+    def __init__(
+        self,
+        client: AsyncMCPClient,
+        operations: List[Tuple[str, int]],
+        tool_args: Dict[str, Dict[str, Any]],
+    ):
+        self.client = client
+        self.operations = operations
+        self.tool_args = tool_args
+        self.latencies: Dict[str, List[float]] = {name: [] for name, _ in operations}
+        self.errors: Dict[str, int] = {name: 0 for name, _ in operations}
+        self._names = [name for name, _ in operations]
+        self._weights = [weight for _, weight in operations]
+
+    async def execute(self, operation: str) -> None:
+        if operation == "initialize":
+            # A fresh session each time, opened and closed outside the shared one
+            response = await self.client.http.post(self.client.endpoint_url, json={
+                "jsonrpc": "2.0",
+                "id": 0,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": self.client.client_info,
+                },
+            })
+            response.raise_for_status()
+            session_id = response.headers.get(SESSION_HEADER)
+            if session_id:
+                await self.client.http.delete(self.client.endpoint_url, headers={SESSION_HEADER: session_id})
+        elif operation == "tools/list":
+            await self.client.request("tools/list")
+        elif operation.startswith("tools/call:"):
+            tool = operation.split(":", 1)[1]
+            result = await self.client.call_tool(tool, self.tool_args.get(tool, {}))
+            if result.get("isError"):
+                raise MCPError({"code": -32000, "message": f"{tool} returned isError"})
+        else:
+            raise ValueError(f"Unknown operation {operation!r}")
+
+    async def timed(self, operation: str, started: Optional[float] = None) -> None:
+        # Open-loop runs measure from the scheduled start so queueing delay counts
+        start = started if started is not None else time.perf_counter()
+        try:
+            await self.execute(operation)
+        except Exception:
+            self.errors[operation] += 1
+            return
+        self.latencies[operation].append(time.perf_counter() - start)
+
+    def pick(self) -> str:
+        return random.choices(self._names, weights=self._weights)[0]
+
+    async def run_closed_loop(self, concurrency: int, duration: float, total: Optional[int]) -> float:
+        """`concurrency` workers each issue the next request as soon as one finishes."""
+        deadline = time.perf_counter() + duration
+        issued = 0
+
+        async def worker() -> None:
+            nonlocal issued
+            while time.perf_counter() < deadline and (total is None or issued < total):
+                issued += 1
+                await self.timed(self.pick())
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    async def run_open_loop(self, rate: float, duration: float, total: Optional[int], max_inflight: int) -> float:
+        """Start requests on a fixed schedule regardless of how fast they complete."""
+        interval = 1.0 / rate
+        count = total if total is not None else int(rate * duration)
+        inflight = asyncio.Semaphore(max_inflight)
+        tasks = []
+
+        async def launch(operation: str, scheduled: float) -> None:
+            async with inflight:
+                await self.timed(operation, scheduled)
+
+        start = time.perf_counter()
+        for i in range(count):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(launch(self.pick(), scheduled)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        operations = {}
+        all_latencies: List[float] = []
+        for name in self._names:
+            values = sorted(self.latencies[name])
+            all_latencies.extend(values)
+            operations[name] = summarize(values, self.errors[name], elapsed)
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "total": summarize(sorted(all_latencies), sum(self.errors.values()), elapsed),
+            "operations": operations,
+        }
+
+
+def summarize(values: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    count = len(values)
+    return {
+        "count": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def compare_with_baseline(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return human-readable regressions beyond `tolerance` (fraction)."""
+    regressions = []
+    # Throughput is only comparable between runs driven the same way
+    same_mode = results.get("config", {}).get("mode") == baseline.get("config", {}).get("mode")
+    for name, current in results["operations"].items():
+        previous = baseline.get("operations", {}).get(name)
+        if not previous or not previous.get("count"):
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name} {metric}: {previous[metric]:.2f} -> {current[metric]:.2f} "
+                    f"(+{(current[metric] / previous[metric] - 1) * 100:.0f}%)"
+                )
+        if same_mode and previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name} throughput: {previous['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} rps"
+            )
+    return regressions
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print("=" * 96)
+    print(f"{'operation':<34}{'count':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    print("-" * 96)
+    rows = list(results["operations"].items()) + [("TOTAL", results["total"])]
+    for name, stats in rows:
+        print(
+            f"{name:<34}{stats['count']:>8}{stats['errors']:>8}{stats['throughput_rps']:>10.1f}"
+            f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+    print("=" * 96)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    tool_args = dict(DEFAULT_TOOL_ARGS)
+    if args.args_file:
+        with open(args.args_file, encoding="utf-8") as f:
+            tool_args.update(json.load(f))
+
+    transport = httpx.ASGITransport(app=stub_toolbox_app(args.stub_latency_ms)) if args.stub else None
+    url = "http://stub/mcp" if args.stub else args.url
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else None
+    client = AsyncMCPClient(
+        url,
+        headers=headers,
+        timeout=args.timeout,
+        max_connections=max(args.concurrency, args.max_inflight if args.rate else 0),
+        retries=0,
+        client_info={"name": "mcp-bench", "version": "1.0.0"},
+        transport=transport,
+    )
+    bench = Benchmark(client, parse_mix(args.mix), tool_args)
+
+    try:
+        await client.initialize()
+        # Warm up connections and server-side caches before measuring
+        for _ in range(args.warmup):
+            await bench.timed(bench.pick())
+        bench.latencies = {name: [] for name in bench.latencies}
+        bench.errors = {name: 0 for name in bench.errors}
+
+        if args.rate:
+            elapsed = await bench.run_open_loop(args.rate, args.duration, args.requests, args.max_inflight)
+        else:
+            elapsed = await bench.run_closed_loop(args.concurrency, args.duration, args.requests)
+    finally:
+        await client.aclose()
+
+    results = bench.report(elapsed)
+    results["config"] = {
+        "target": "stub" if args.stub else args.url,
+        "mode": f"open-loop {args.rate} rps" if args.rate else f"closed-loop x{args.concurrency}",
+        "mix": args.mix,
+        "duration_s": args.duration,
+        "requests": args.requests,
+        "http2": client.http2,
+    }
+    results["started_at"] = datetime.now(timezone.utc).isoformat()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="MCP endpoint load generator and latency benchmark")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="MCP endpoint, e.g. http://localhost:8080/mcp")
+    target.add_argument("--stub", action="store_true", help="Benchmark an in-process stub toolbox")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted operation mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--args-file", help="JSON file mapping tool name -> arguments")
+    parser.add_argument("--concurrency", type=int, default=10, help="Closed-loop workers (default: 10)")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests/second")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="Open-loop cap on outstanding requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run (default: 10)")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests instead")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured warm-up requests (default: 20)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--token", help="Bearer token for authenticated endpoints")
+    parser.add_argument("--stub-latency-ms", type=float, default=2.0, help="Stub tools/call latency")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON results file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression vs baseline (default: 0.10)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) vs {args.baseline}:")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print(f"✅ No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,11 +3,12 @@
 MCP client to test SQLite server functionality
 """
 
-import json
+import asyncio
 import sys
-import requests
 from typing import Dict, Any, List
 
+from mcp_async_client import AsyncMCPClient
+
 SERVICE_URL = "https://sqlite-mcp-646005218605.us-central1.run.app"
 
 class MCPClient:
@@ -15,13 +16,21 @@ class MCPClient:
     
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        })
+        # Probes share the MCP client's pooled (HTTP/2 when available) connections
+        self.mcp = AsyncMCPClient(f"{self.base_url}/mcp", timeout=10, retries=0)
+        self.session = self.mcp.http
+    
+    async def probe(self, method: str, path: str, payload: Any = None) -> Any:
+        """Send one probe request; returns the response or the exception"""
+        url = f"{self.base_url}{path}"
+        try:
+            if method == 'GET':
+                return await self.session.get(url)
+            return await self.session.post(url, json=payload)
+        except Exception as e:
+            return e
     
-    def test_mcp_endpoints(self) -> Dict[str, Any]:
+    async def test_mcp_endpoints(self) -> Dict[str, Any]:
         """Test various MCP-related endpoints"""
         results = {}
         
@@ -38,24 +47,23 @@ class MCPClient:
         ]
         
         print("🔍 Testing various endpoints:")
-        for endpoint in endpoints_to_test:
-            url = f"{self.base_url}{endpoint}"
-            try:
-                response = self.session.get(url, timeout=10)
-                result = {
-                    'status': response.status_code,
-                    'content_type': response.headers.get('content-type', ''),
-                    'content': response.text[:200] + '...' if len(response.text) > 200 else response.text
-                }
-                results[endpoint] = result
-                print(f"  {endpoint}: {response.status_code} - {result['content'][:50]}...")
-            except Exception as e:
-                results[endpoint] = {'error': str(e)}
-                print(f"  {endpoint}: ERROR - {e}")
+        responses = await asyncio.gather(*(self.probe('GET', endpoint) for endpoint in endpoints_to_test))
+        for endpoint, response in zip(endpoints_to_test, responses):
+            if isinstance(response, Exception):
+                results[endpoint] = {'error': str(response)}
+                print(f"  {endpoint}: ERROR - {response}")
+                continue
+            result = {
+                'status': response.status_code,
+                'content_type': response.headers.get('content-type', ''),
+                'content': response.text[:200] + '...' if len(response.text) > 200 else response.text
+            }
+            results[endpoint] = result
+            print(f"  {endpoint}: {response.status_code} - {result['content'][:50]}...")
         
         return results
     
-    def test_sqlite_queries_direct(self) -> List[Dict[str, Any]]:
+    async def test_sqlite_queries_direct(self) -> List[Dict[str, Any]]:
         """Test SQLite queries using different approaches"""
         results = []
         
@@ -92,66 +100,60 @@ class MCPClient:
         
         print("\n📊 Testing SQLite query methods:")
         
+        # Build every probe up front, then send them all concurrently
+        probes = []
         for method, path in methods_and_paths:
-            print(f"\n  Testing {method} {path}:")
-            
             if method == 'GET':
-                # Simple GET request
-                try:
-                    url = f"{self.base_url}{path}"
-                    response = self.session.get(url, timeout=10)
-                    result = {
+                probes.append((method, path, None, None, None))
+                continue
+            # POST requests with different payload formats; only the first
+            # test case per method/path combo to avoid spam
+            test_case = test_cases[0]
+            payloads_to_try = [
+                {'query': test_case['query']},
+                {'sql': test_case['query']},
+                {'statement': test_case['query']},
+                {'command': test_case['query']},
+                test_case['query']  # Raw string
+            ]
+            for i, payload in enumerate(payloads_to_try):
+                probes.append((method, path, test_case, i, payload))
+        
+        responses = await asyncio.gather(*(
+            self.probe(method, path, payload) for method, path, _, _, payload in probes
+        ))
+        
+        for (method, path, test_case, i, _), response in zip(probes, responses):
+            if method == 'GET':
+                print(f"\n  Testing {method} {path}:")
+                if isinstance(response, Exception):
+                    results.append({'method': method, 'path': path, 'error': str(response)})
+                    print(f"    ERROR: {response}")
+                else:
+                    results.append({
                         'method': method,
                         'path': path,
                         'status': response.status_code,
                         'response': response.text[:200]
-                    }
-                    results.append(result)
+                    })
                     print(f"    Status: {response.status_code}, Response: {response.text[:100]}...")
-                except Exception as e:
-                    result = {
-                        'method': method,
-                        'path': path,
-                        'error': str(e)
-                    }
-                    results.append(result)
-                    print(f"    ERROR: {e}")
-                    
-            else:
-                # POST requests with different payload formats
-                for test_case in test_cases[:2]:  # Limit to first 2 test cases to avoid spam
-                    payloads_to_try = [
-                        {'query': test_case['query']},
-                        {'sql': test_case['query']},
-                        {'statement': test_case['query']},
-                        {'command': test_case['query']},
-                        test_case['query']  # Raw string
-                    ]
-                    
-                    for i, payload in enumerate(payloads_to_try):
-                        try:
-                            url = f"{self.base_url}{path}"
-                            response = self.session.post(url, json=payload, timeout=10)
-                            
-                            if response.status_code not in [404, 405]:  # Skip obvious failures
-                                result = {
-                                    'method': method,
-                                    'path': path,
-                                    'test_case': test_case['name'],
-                                    'payload_format': f"format_{i}",
-                                    'status': response.status_code,
-                                    'response': response.text[:200]
-                                }
-                                results.append(result)
-                                print(f"    {test_case['name']} (fmt{i}): {response.status_code}")
-                                if response.status_code == 200:
-                                    print(f"      SUCCESS: {response.text[:100]}...")
-                                
-                        except Exception as e:
-                            if "404" not in str(e) and "405" not in str(e):
-                                print(f"    {test_case['name']} (fmt{i}): ERROR - {e}")
-                    
-                    break  # Only try first test case per method/path combo to avoid spam
+                continue
+            
+            if isinstance(response, Exception):
+                print(f"    {method} {path} {test_case['name']} (fmt{i}): ERROR - {response}")
+                continue
+            if response.status_code not in [404, 405]:  # Skip obvious failures
+                results.append({
+                    'method': method,
+                    'path': path,
+                    'test_case': test_case['name'],
+                    'payload_format': f"format_{i}",
+                    'status': response.status_code,
+                    'response': response.text[:200]
+                })
+                print(f"    {method} {path} {test_case['name']} (fmt{i}): {response.status_code}")
+                if response.status_code == 200:
+                    print(f"      SUCCESS: {response.text[:100]}...")
         
         return results
 
@@ -205,7 +207,7 @@ class MCPClient:
         
         return "\n".join(report)
 
-def main():
+async def run_tests():
     """Main test function"""
     print("🚀 Starting comprehensive MCP SQLite server test...")
     print(f"Target: {SERVICE_URL}")
@@ -213,11 +215,14 @@ def main():
     
     client = MCPClient(SERVICE_URL)
     
-    # Test endpoints
-    endpoint_results = client.test_mcp_endpoints()
-    
-    # Test query functionality
-    query_results = client.test_sqlite_queries_direct()
+    try:
+        # Test endpoints
+        endpoint_results = await client.test_mcp_endpoints()
+        
+        # Test query functionality
+        query_results = await client.test_sqlite_queries_direct()
+    finally:
+        await client.mcp.aclose()
     
     # Generate report
     report = client.create_summary_report(endpoint_results, query_results)
@@ -227,5 +232,8 @@ def main():
     successful_queries = [r for r in query_results if r.get('status') == 200]
     return 0 if successful_queries else 1
 
+def main():
+    return asyncio.run(run_tests())
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained aggregate tables for the Python SQLite MCP server
+Aggregates over a fact table and the dimension tables it references are
+declared in a JSON file, built once, then kept current by triggers; a router
+answers aggregate requests from the smallest table that covers them
+
+Example declaration (see aggregates.json):
+    {"aggregates": [{
+        "name": "agg_sales_by_category_status",
+        "table": "orders",
+        "joins": {"products": {"on": "product_id", "key": "id"}},
+        "group_by": {"category": "products.category", "status": "orders.status"},
+        "measures": {"order_count": "count(*)", "revenue": "sum(orders.total_price)"},
+        "indexes": [["revenue"]]
+    }]}
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+META_TABLE = "_aggregates"
+
+IDENTIFIER = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+MEASURE = re.compile(r"^\s*(count|sum|avg)\s*\((.*)\)\s*$", re.IGNORECASE | re.DOTALL)
+QUALIFIED_COLUMN = re.compile(r'\b([A-Za-z_]\w*)\s*\.\s*"?([A-Za-z_]\w*)"?')
+WORD = re.compile(r"\b[A-Za-z_]\w*\b")
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+class AggregateError(ValueError):
+    """A declaration that cannot be maintained, or a request no declaration answers."""
+
+
+def quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _name(value: Any, what: str) -> str:
+    # "__" is reserved for the helper columns of sum/avg measures
+    if not isinstance(value, str) or not IDENTIFIER.match(value) or "__" in value:
+        raise AggregateError(f"Invalid {what} name {value!r}: letters, digits and single underscores only")
+    return value
+
+
+class Aggregate:
+    """
+    One declared aggregate: `table` (the fact table) inner-joined to each
+    dimension in `joins` on fact.<on> = dimension.<key>, grouped by the
+    `group_by` expressions, with count/sum/avg `measures`.
+
+    Expressions are SQL over table.column references (qualified, so the
+    triggers know which column updates matter). min/max are not supported:
+    they cannot be maintained when rows are deleted.
+
+    Storage: one row per group, keyed by json_array(group values) so NULL
+    groups upsert like any other, with _rows counting the fact rows behind
+    it. count measures store their count; sum(x) stores sum and count(x) so
+    an all-NULL group still reports NULL; avg(x) stores both and is divided
+    at query time. Groups emptied by deletes stay with _rows = 0 until the
+    next rebuild and are filtered out by the router. Joins are inner joins:
+    fact rows whose foreign key matches no dimension row are not counted.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        table: str,
+        group_by: Dict[str, str],
+        measures: Dict[str, str],
+        joins: Optional[Dict[str, Tuple[str, str]]] = None,
+        indexes: Iterable[Iterable[str]] = (),
+    ):
+        self.name = _name(name, "aggregate")
+        self.table = table
+        self.joins: "OrderedDict[str, Tuple[str, str]]" = OrderedDict(joins or {})
+        if table in self.joins:
+            raise AggregateError(f"{name}: the fact table {table} cannot also be a join")
+        self.group_by: "OrderedDict[str, str]" = OrderedDict(
+            (_name(dimension, "dimension"), expression) for dimension, expression in group_by.items()
+        )
+        self.measures: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        for measure, definition in measures.items():
+            match = MEASURE.match(definition)
+            if not match:
+                raise AggregateError(
+                    f"{name}.{measure}: {definition!r} is not count(...), sum(...) or avg(...); "
+                    "min/max cannot be maintained incrementally"
+                )
+            func, argument = match.group(1).lower(), match.group(2).strip()
+            if argument.lower().startswith("distinct"):
+                raise AggregateError(f"{name}.{measure}: DISTINCT aggregates cannot be maintained incrementally")
+            if func != "count" and argument == "*":
+                raise AggregateError(f"{name}.{measure}: {func}(*) is not valid")
+            self.measures[_name(measure, "measure")] = (func, argument)
+        if not self.measures:
+            raise AggregateError(f"{name}: declare at least one measure")
+        overlap = set(self.group_by) & set(self.measures)
+        if overlap:
+            raise AggregateError(f"{name}: {', '.join(sorted(overlap))} is both a dimension and a measure")
+        self.indexes = [list(columns) for columns in indexes]
+        for columns in self.indexes:
+            for column in columns:
+                if column not in self.group_by and self.measures.get(column, ("avg",))[0] == "avg":
+                    raise AggregateError(f"{name}: can only index dimensions and count/sum measures, not {column!r}")
+
+    @classmethod
+    def from_dict(cls, declaration: Dict[str, Any]) -> "Aggregate":
+        try:
+            joins = {}
+            for dimension, join in (declaration.get("joins") or {}).items():
+                if isinstance(join, str):
+                    join = {"on": join}
+                joins[dimension] = (join["on"], join.get("key", "id"))
+            return cls(
+                name=declaration["name"],
+                table=declaration["table"],
+                group_by=declaration.get("group_by") or {},
+                measures=declaration["measures"],
+                joins=joins,
+                indexes=declaration.get("indexes") or (),
+            )
+        except KeyError as e:
+            raise AggregateError(f"Aggregate declaration {declaration.get('name', '?')!r} is missing {e}") from None
+
+    def definition(self) -> str:
+        """Canonical form stored with the table; a change means a rebuild."""
+        return json.dumps(
+            {
+                "table": self.table,
+                "joins": self.joins,
+                "group_by": self.group_by,
+                "measures": self.measures,
+                "indexes": self.indexes,
+            },
+            sort_keys=True,
+        )
+
+    # Storage
+
+    def measure_columns(self, measure: str) -> List[str]:
+        func = self.measures[measure][0]
+        if func == "count":
+            return [measure]
+        if func == "sum":
+            return [measure, f"{measure}__n"]
+        return [f"{measure}__sum", f"{measure}__n"]
+
+    def storage_columns(self) -> List[str]:
+        columns = ["_key", *self.group_by, "_rows"]
+        for measure in self.measures:
+            columns.extend(self.measure_columns(measure))
+        return columns
+
+    def _measure_sources(self, measure: str) -> List[str]:
+        func, argument = self.measures[measure]
+        if func == "count":
+            return [f"count({argument})"]
+        return [f"coalesce(sum({argument}), 0)", f"count({argument})"]
+
+    def _from(self) -> str:
+        sql = f"FROM {quote(self.table)}"
+        for dimension, (on, key) in self.joins.items():
+            sql += f" JOIN {quote(dimension)} ON {quote(dimension)}.{quote(key)} = {quote(self.table)}.{quote(on)}"
+        return sql
+
+    def delta_select(self, where: str = "1", sign: int = 1) -> str:
+        """The group rows contributed by the fact rows matching `where`, negated for sign=-1."""
+        minus = "-" if sign < 0 else ""
+        groups = list(self.group_by.values())
+        values = [f"json_array({', '.join(groups)})", *groups, f"{minus}count(*)"]
+        for measure in self.measures:
+            values.extend(f"{minus}{source}" for source in self._measure_sources(measure))
+        sql = f"SELECT {', '.join(values)} {self._from()} WHERE {where}"
+        if groups:
+            sql += f" GROUP BY {', '.join(str(i) for i in range(2, len(groups) + 2))}"
+        return sql
+
+    def upsert(self, where: str, sign: int) -> str:
+        columns = self.storage_columns()
+        counters = columns[1 + len(self.group_by):]
+        updates = ", ".join(f"{quote(c)} = {quote(c)} + excluded.{quote(c)}" for c in counters)
+        return (
+            f"INSERT INTO {quote(self.name)} ({', '.join(quote(c) for c in columns)}) "
+            f"{self.delta_select(where, sign)} ON CONFLICT(_key) DO UPDATE SET {updates}"
+        )
+
+    def expressions(self) -> List[str]:
+        return list(self.group_by.values()) + [argument for _, argument in self.measures.values()]
+
+    def referenced_columns(self) -> Dict[str, Set[str]]:
+        """{table: columns} read by the aggregate, join columns included."""
+        tables = [self.table, *self.joins]
+        referenced: Dict[str, Set[str]] = {table: set() for table in tables}
+        for expression in self.expressions():
+            for table, column in QUALIFIED_COLUMN.findall(STRING_LITERAL.sub("''", expression)):
+                if table in referenced:
+                    referenced[table].add(column)
+        for dimension, (on, key) in self.joins.items():
+            referenced[self.table].add(on)
+            referenced[dimension].add(key)
+        return referenced
+
+    def triggers(self) -> "OrderedDict[str, str]":
+        """{trigger name: CREATE TRIGGER} keeping the table current under writes to any source table."""
+        fact = quote(self.table)
+        referenced = self.referenced_columns()
+        triggers: "OrderedDict[str, str]" = OrderedDict()
+
+        def add(table: str, suffix: str, timing: str, event: str, where: str, sign: int) -> None:
+            name = f"{self.name}__{table}__{suffix}"
+            triggers[name] = (
+                f"CREATE TRIGGER {quote(name)} {timing} {event} ON {quote(table)} "
+                f"BEGIN {self.upsert(where, sign)}; END"
+            )
+
+        # A changed fact row leaves its old group before the update and joins its new one after
+        add(self.table, "insert", "AFTER", "INSERT", f"{fact}.rowid = NEW.rowid", 1)
+        add(self.table, "delete", "BEFORE", "DELETE", f"{fact}.rowid = OLD.rowid", -1)
+        if referenced[self.table]:
+            columns = ", ".join(quote(c) for c in sorted(referenced[self.table]))
+            add(self.table, "update_old", "BEFORE", f"UPDATE OF {columns}", f"{fact}.rowid = OLD.rowid", -1)
+            add(self.table, "update_new", "AFTER", f"UPDATE OF {columns}", f"{fact}.rowid = NEW.rowid", 1)
+        # A changed dimension row moves every fact row that references it
+        for dimension, (on, key) in self.joins.items():
+            fk, pk = f"{fact}.{quote(on)}", quote(key)
+            columns = ", ".join(quote(c) for c in sorted(referenced[dimension]))
+            add(dimension, "insert", "AFTER", "INSERT", f"{fk} = NEW.{pk}", 1)
+            add(dimension, "delete", "BEFORE", "DELETE", f"{fk} = OLD.{pk}", -1)
+            add(dimension, "update_old", "BEFORE", f"UPDATE OF {columns}", f"{fk} = OLD.{pk}", -1)
+            add(dimension, "update_new", "AFTER", f"UPDATE OF {columns}", f"{fk} = NEW.{pk}", 1)
+        return triggers
+
+    def check(self, conn: sqlite3.Connection) -> None:
+        """Fail early on unknown tables/columns and on unqualified column references."""
+        columns = {}
+        for table in [self.table, *self.joins]:
+            columns[table] = {row[1] for row in conn.execute(f"PRAGMA table_info({quote(table)})")}
+            if not columns[table]:
+                raise AggregateError(f"{self.name}: no table {table!r}")
+        for table, names in self.referenced_columns().items():
+            missing = names - columns[table]
+            if missing:
+                raise AggregateError(f"{self.name}: {table} has no column {', '.join(sorted(missing))}")
+        known = set().union(*columns.values())
+        for expression in self.expressions():
+            bare = QUALIFIED_COLUMN.sub("", STRING_LITERAL.sub("''", expression))
+            for word in WORD.findall(bare):
+                if word in known:
+                    raise AggregateError(f"{self.name}: qualify {word!r} in {expression!r} as table.{word}")
+        conn.execute(f"EXPLAIN {self.delta_select()}")
+
+    def build(self, conn: sqlite3.Connection) -> None:
+        """(Re)create the table, its indexes and triggers, and fill it from the source tables."""
+        # Measure columns have no declared type, so sums keep the type SUM() gives them
+        columns = ["_key TEXT PRIMARY KEY", *(quote(g) for g in self.group_by), "_rows INTEGER NOT NULL"]
+        columns.extend(f"{quote(c)} NOT NULL" for m in self.measures for c in self.measure_columns(m))
+        conn.execute(f"CREATE TABLE {quote(self.name)} ({', '.join(columns)}) WITHOUT ROWID")
+        for index in self.indexes:
+            conn.execute(
+                f"CREATE INDEX {quote(self.name + '__' + '_'.join(index))} "
+                f"ON {quote(self.name)} ({', '.join(quote(c) for c in index)})"
+            )
+        # Dimension triggers look fact rows up by their foreign key
+        for dimension, (on, _) in self.joins.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(f'idx_{self.table}_{on}')} ON {quote(self.table)} ({quote(on)})")
+        conn.execute(
+            f"INSERT INTO {quote(self.name)} ({', '.join(quote(c) for c in self.storage_columns())}) {self.delta_select()}"
+        )
+        for sql in self.triggers().values():
+            conn.execute(sql)
+
+
+class AggregateRouter:
+    """
+    The declared aggregates plus the query planner over them.
+
+    Dimension and measure names form one vocabulary: the same name must mean
+    the same expression in every aggregate that declares it. A request for
+    some measures by some dimensions (with equality filters on dimensions) is
+    served from the aggregate with the fewest group columns that has all of
+    them, re-aggregating when it is finer than asked; with no such aggregate
+    it runs as a GROUP BY over the source tables.
+    """
+
+    def __init__(self, aggregates: List[Aggregate]):
+        self.aggregates = aggregates
+        self.ready: Set[str] = set()
+        self.dimensions: Dict[str, Tuple[str, str]] = {}
+        self.measures: Dict[str, Tuple[str, Tuple[str, str]]] = {}
+        self.joins: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        names = set()
+        for aggregate in aggregates:
+            if aggregate.name in names:
+                raise AggregateError(f"Aggregate {aggregate.name} is declared twice")
+            names.add(aggregate.name)
+            for dimension, expression in aggregate.group_by.items():
+                self._define(self.dimensions, dimension, (aggregate.table, expression), aggregate)
+            for measure, definition in aggregate.measures.items():
+                self._define(self.measures, measure, (aggregate.table, definition), aggregate)
+            for dimension, join in aggregate.joins.items():
+                self._define(self.joins, (aggregate.table, dimension), join, aggregate)
+        clash = set(self.dimensions) & set(self.measures)
+        if clash:
+            raise AggregateError(f"{', '.join(sorted(clash))} is both a dimension and a measure")
+        self.routed = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def _define(vocabulary: Dict, name: Any, meaning: Any, aggregate: Aggregate) -> None:
+        if vocabulary.setdefault(name, meaning) != meaning:
+            raise AggregateError(f"{aggregate.name}: {name} is already declared as {vocabulary[name]}")
+
+    # Installation
+
+    def install(self, conn: sqlite3.Connection, rebuild: bool = False) -> Dict[str, str]:
+        """
+        Create or refresh every aggregate on a writable connection; returns
+        {name: "built" | "current"}. A table is rebuilt only when its
+        declaration changed or one of its triggers is gone (e.g. a source
+        table was recreated); otherwise the triggers have kept it current.
+        Aggregates no longer declared are dropped.
+
+        Also turns on recursive_triggers for `conn`, so rows that INSERT OR
+        REPLACE deletes leave their groups.
+        """
+        conn.execute("PRAGMA recursive_triggers = ON")
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {META_TABLE} "
+                "(name TEXT PRIMARY KEY, definition TEXT NOT NULL, triggers TEXT NOT NULL, built_at REAL NOT NULL)"
+            )
+            installed = {row[0]: (row[1], json.loads(row[2])) for row in conn.execute(f"SELECT * FROM {META_TABLE}")}
+            objects = {row[0]: row[1] for row in conn.execute("SELECT name, type FROM sqlite_master")}
+            declared = {aggregate.name for aggregate in self.aggregates}
+            for name in set(installed) - declared:
+                self._drop(conn, name, installed[name][1], objects)
+                conn.execute(f"DELETE FROM {META_TABLE} WHERE name = ?", (name,))
+
+            status = {}
+            for aggregate in self.aggregates:
+                triggers = list(aggregate.triggers())
+                previous = installed.get(aggregate.name)
+                if aggregate.name in objects and previous is None:
+                    raise AggregateError(f"{aggregate.name} already exists and is not a declared aggregate")
+                if (
+                    not rebuild
+                    and previous is not None
+                    and previous[0] == aggregate.definition()
+                    and objects.get(aggregate.name) == "table"
+                    and all(objects.get(trigger) == "trigger" for trigger in triggers)
+                ):
+                    status[aggregate.name] = "current"
+                    continue
+                aggregate.check(conn)
+                if previous is not None:
+                    self._drop(conn, aggregate.name, previous[1], objects)
+                aggregate.build(conn)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {META_TABLE} VALUES (?, ?, ?, ?)",
+                    (aggregate.name, aggregate.definition(), json.dumps(triggers), time.time()),
+                )
+                status[aggregate.name] = "built"
+            if own_transaction:
+                conn.execute("COMMIT")
+        except BaseException:
+            if own_transaction and conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        self.ready = set(status)
+        return status
+
+    @staticmethod
+    def _drop(conn: sqlite3.Connection, name: str, triggers: List[str], objects: Dict[str, str]) -> None:
+        for trigger in triggers:
+            if objects.get(trigger) == "trigger":
+                conn.execute(f"DROP TRIGGER {quote(trigger)}")
+        conn.execute(f"DROP TABLE IF EXISTS {quote(name)}")
+
+    def attach(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        """
+        Read-only databases: route only to aggregates built from the current
+        declaration (e.g. by bootstrap_db.py --aggregates); returns
+        {name: "current" | "missing" | "stale"}.
+        """
+        try:
+            installed = {row[0]: row[1] for row in conn.execute(f"SELECT name, definition FROM {META_TABLE}")}
+        except sqlite3.OperationalError:
+            installed = {}
+        status = {}
+        for aggregate in self.aggregates:
+            if aggregate.name not in installed:
+                status[aggregate.name] = "missing"
+            elif installed[aggregate.name] != aggregate.definition():
+                status[aggregate.name] = "stale"
+            else:
+                status[aggregate.name] = "current"
+        self.ready = {name for name, state in status.items() if state == "current"}
+        return status
+
+    # Routing
+
+    def plan(
+        self,
+        measures: List[str],
+        dimensions: List[str] = (),
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: str = "",
+        limit: int = 100,
+    ) -> Tuple[Optional[str], str, List[Any]]:
+        """(aggregate used or None, SQL, parameters) for the request."""
+        filters = filters or {}
+        if not measures:
+            raise AggregateError(f"Ask for at least one measure: {', '.join(sorted(self.measures))}")
+        for name in measures:
+            if name not in self.measures:
+                raise AggregateError(f"Unknown measure {name!r}; available: {', '.join(sorted(self.measures))}")
+        for name in [*dimensions, *filters]:
+            if name not in self.dimensions:
+                raise AggregateError(f"Unknown dimension {name!r}; available: {', '.join(sorted(self.dimensions))}")
+        facts = {self.measures[name][0] for name in measures} | {self.dimensions[name][0] for name in [*dimensions, *filters]}
+        if len(facts) > 1:
+            raise AggregateError(f"Measures and dimensions come from different tables: {', '.join(sorted(facts))}")
+        order = self._order(order_by, [*dimensions, *measures])
+        needed = set(dimensions) | set(filters)
+        tables = self._tables(measures, [*dimensions, *filters])
+
+        # An aggregate joining tables the request doesn't need could drop fact
+        # rows (inner joins), so it only qualifies if its joins are all needed
+        candidates = [
+            aggregate for aggregate in self.aggregates
+            if aggregate.name in self.ready
+            and needed <= set(aggregate.group_by)
+            and set(measures) <= set(aggregate.measures)
+            and set(aggregate.joins) <= tables
+        ]
+        if candidates:
+            aggregate = min(candidates, key=lambda a: len(a.group_by))
+            self.routed += 1
+            return (aggregate.name, *self._from_aggregate(aggregate, measures, dimensions, filters, order, limit))
+        self.fallbacks += 1
+        return (None, *self._from_source(facts.pop(), tables, measures, dimensions, filters, order, limit))
+
+    def _tables(self, measures: List[str], dimensions: List[str]) -> Set[str]:
+        """Tables read by the expressions behind these names."""
+        expressions = [self.dimensions[name][1] for name in dimensions]
+        expressions += [self.measures[name][1][1] for name in measures]
+        return {table for text in expressions for table, _ in QUALIFIED_COLUMN.findall(STRING_LITERAL.sub("''", text))}
+
+    @staticmethod
+    def _order(order_by: str, columns: List[str]) -> List[Tuple[str, str]]:
+        order = []
+        for term in filter(None, (part.strip() for part in order_by.split(","))):
+            parts = term.split()
+            direction = parts[1].upper() if len(parts) > 1 else "ASC"
+            if len(parts) > 2 or direction not in ("ASC", "DESC") or parts[0] not in columns:
+                raise AggregateError(f"Bad order_by term {term!r}: use '<requested column> [asc|desc]'")
+            order.append((parts[0], direction))
+        return order
+
+    @staticmethod
+    def _where(filters: Dict[str, Any], column) -> Tuple[List[str], List[Any]]:
+        conditions, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                conditions.append(f"{column(name)} IS NULL")
+            elif isinstance(value, (list, tuple)):
+                conditions.append(f"{column(name)} IN ({', '.join('?' * len(value))})" if value else "0")
+                params.extend(value)
+            else:
+                conditions.append(f"{column(name)} = ?")
+                params.append(value)
+        return conditions, params
+
+    @staticmethod
+    def _tail(sql: str, order: List[Tuple[str, str]], limit: int) -> str:
+        if order:
+            sql += " ORDER BY " + ", ".join(f"{column} {direction}" for column, direction in order)
+        if limit and limit > 0:
+            sql += f" LIMIT {int(limit)}"
+        return sql
+
+    def _from_aggregate(
+        self, aggregate: Aggregate, measures: List[str], dimensions: List[str],
+        filters: Dict[str, Any], order: List[Tuple[str, str]], limit: int,
+    ) -> Tuple[str, List[Any]]:
+        conditions, params = self._where(filters, quote)
+        select = [quote(d) for d in dimensions]
+        if set(dimensions) == set(aggregate.group_by):
+            # Same granularity: one stored row per result row, and ORDER BY
+            # can use an index on the stored column
+            for measure in measures:
+                func = aggregate.measures[measure][0]
+                if func == "count":
+                    select.append(quote(measure))
+                elif func == "sum":
+                    select.append(f"CASE WHEN {quote(measure + '__n')} > 0 THEN {quote(measure)} END AS {quote(measure)}")
+                else:
+                    select.append(
+                        f"{quote(measure + '__sum')} * 1.0 / NULLIF({quote(measure + '__n')}, 0) AS {quote(measure)}"
+                    )
+            sql = f"SELECT {', '.join(select)} FROM {quote(aggregate.name)} WHERE {' AND '.join(['_rows > 0', *conditions])}"
+            # Stored columns rather than the output aliases, so an index can serve the ORDER BY
+            table = quote(aggregate.name)
+            order = [
+                (f"{table}.{quote(c)}" if c in dimensions or aggregate.measures[c][0] != "avg" else quote(c), d)
+                for c, d in order
+            ]
+            return self._tail(sql, order, limit), params
+
+        for measure in measures:
+            func = aggregate.measures[measure][0]
+            if func == "count":
+                select.append(f"COALESCE(SUM({quote(measure)}), 0) AS {quote(measure)}")
+            elif func == "sum":
+                select.append(f"CASE WHEN SUM({quote(measure + '__n')}) > 0 THEN SUM({quote(measure)}) END AS {quote(measure)}")
+            else:
+                select.append(
+                    f"SUM({quote(measure + '__sum')}) * 1.0 / NULLIF(SUM({quote(measure + '__n')}), 0) AS {quote(measure)}"
+                )
+        sql = f"SELECT {', '.join(select)} FROM {quote(aggregate.name)}"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        if dimensions:
+            sql += f" GROUP BY {', '.join(quote(d) for d in dimensions)} HAVING SUM(_rows) > 0"
+        return self._tail(sql, [(quote(c), d) for c, d in order], limit), params
+
+    def _from_source(
+        self, fact: str, tables: Set[str], measures: List[str], dimensions: List[str],
+        filters: Dict[str, Any], order: List[Tuple[str, str]], limit: int,
+    ) -> Tuple[str, List[Any]]:
+        def expression(name: str) -> str:
+            return self.dimensions[name][1]
+
+        conditions, params = self._where(filters, expression)
+        select = [f"{expression(d)} AS {quote(d)}" for d in dimensions]
+        for measure in measures:
+            func, argument = self.measures[measure][1]
+            select.append(f"{func}({argument}) AS {quote(measure)}")
+        sql = f"SELECT {', '.join(select)} FROM {quote(fact)}"
+        for (joined_fact, dimension), (on, key) in self.joins.items():
+            if joined_fact == fact and dimension in tables:
+                sql += f" JOIN {quote(dimension)} ON {quote(dimension)}.{quote(key)} = {quote(fact)}.{quote(on)}"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        if dimensions:
+            sql += f" GROUP BY {', '.join(str(i) for i in range(1, len(dimensions) + 1))}"
+        return self._tail(sql, [(quote(c), d) for c, d in order], limit), params
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": aggregate.name,
+                "table": aggregate.table,
+                "dimensions": list(aggregate.group_by),
+                "measures": {name: f"{func}({argument})" for name, (func, argument) in aggregate.measures.items()},
+                "ready": aggregate.name in self.ready,
+            }
+            for aggregate in self.aggregates
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "aggregates": len(self.aggregates),
+            "ready": len(self.ready),
+            "routed": self.routed,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def load_aggregates(path: str) -> AggregateRouter:
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return AggregateRouter([Aggregate.from_dict(declaration) for declaration in config.get("aggregates", [])])
+
+
+def aggregates_from_env() -> Optional[AggregateRouter]:
+    """The router for SQLITE_AGGREGATES (a JSON file); None when unset/empty or the default file is absent."""
+    path = os.getenv("SQLITE_AGGREGATES", "/app/aggregates.json")
+    if not path:
+        return None
+    if not os.path.exists(path):
+        if "SQLITE_AGGREGATES" in os.environ:
+            raise FileNotFoundError(f"SQLITE_AGGREGATES={path} does not exist")
+        return None
+    return load_aggregates(path)
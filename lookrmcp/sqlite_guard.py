@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Query guardrails for the Python SQLite MCP server
+Caps returned rows, rejects large full-table scans found by EXPLAIN QUERY PLAN,
+and interrupts statements that run past a per-call deadline
+"""
+
+import contextlib
+import re
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# FROM/JOIN <table> [AS] <alias>, to map EXPLAIN QUERY PLAN aliases back to tables
+TABLE_REFERENCE = re.compile(
+    r'\b(?:from|join)\s+(?:"([^"]+)"|\[([^\]]+)\]|`([^`]+)`|([A-Za-z_][\w$]*))'
+    r'(?:\s+(?:as\s+)?(?!(?:on|using|where|join|inner|left|right|full|cross|natural|group|order|limit|union|except|intersect|window|having)\b)([A-Za-z_][\w$]*))?',
+    re.IGNORECASE,
+)
+SCAN_DETAIL = re.compile(r"^SCAN (?:TABLE )?(\S+)")
+
+# Statements that can be wrapped in SELECT * FROM (...) LIMIT n
+LIMITABLE_KEYWORDS = ("select", "with", "values")
+# What the statement after a WITH clause can be
+STATEMENT_KEYWORDS = ("select", "values", "insert", "update", "delete", "replace")
+# Clauses that make a scan read rows it does not return, so LIMIT cannot stop it early
+FILTERING_KEYWORDS = ("where", "group", "having", "distinct", "join", "over", "offset")
+AGGREGATE_FUNCTIONS = (
+    "count", "sum", "avg", "min", "max", "total", "group_concat", "string_agg",
+    "json_group_array", "json_group_object",
+)
+
+
+def leading_keyword(sql: str) -> str:
+    """First keyword of a statement, lower-cased, skipping comments and '('."""
+    stripped = sql.lstrip().lstrip("(").lower()
+    while stripped.startswith("--") or stripped.startswith("/*"):
+        if stripped.startswith("--"):
+            stripped = stripped.split("\n", 1)[1] if "\n" in stripped else ""
+        else:
+            stripped = stripped.split("*/", 1)[1] if "*/" in stripped else ""
+        stripped = stripped.lstrip().lstrip("(")
+    match = re.match(r"[a-z]+", stripped)
+    return match.group(0) if match else ""
+
+
+def scan(sql: str) -> Iterator[Tuple[str, int]]:
+    """(token, end offset) for each word, quoted string/name or punctuation mark; comments are skipped."""
+    i, n = 0, len(sql)
+    while i < n:
+        char = sql[i]
+        if char.isspace():
+            i += 1
+        elif sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end < 0 else end + 1
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        elif char in "'\"`[":
+            close = "]" if char == "[" else char
+            end = i + 1
+            while True:
+                end = sql.find(close, end)
+                if end < 0:
+                    end = n
+                    break
+                # '' inside a string is an escaped quote
+                if close != "]" and sql.startswith(close * 2, end):
+                    end += 2
+                    continue
+                end += 1
+                break
+            yield sql[i:end], end
+            i = end
+        elif char.isalnum() or char in "_$":
+            end = i
+            while end < n and (sql[end].isalnum() or sql[end] in "_$"):
+                end += 1
+            yield sql[i:end], end
+            i = end
+        else:
+            yield char, i + 1
+            i += 1
+
+
+def strip_statement(sql: str) -> str:
+    """`sql` without trailing semicolons, comments and whitespace."""
+    end = 0
+    for token, stop in scan(sql):
+        if token != ";":
+            end = stop
+    return sql[:end]
+
+
+def statement_keyword(sql: str) -> str:
+    """
+    What the statement does: its first keyword, or for WITH the keyword of
+    the statement after the common table expressions ("with" if none is found).
+    """
+    depth = 0
+    first = ""
+    for token, _ in scan(sql):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and token[0].isalpha():
+            word = token.lower()
+            if not first:
+                first = word
+                if word != "with":
+                    return word
+            elif word in STATEMENT_KEYWORDS:
+                return word
+    return first
+
+
+def streams_into_limit(sql: str, details: List[str]) -> bool:
+    """
+    True when the plan is a single bare SCAN whose rows all flow into the
+    outer LIMIT: no WHERE, join, aggregate, grouping, sort or OFFSET, so the
+    scan stops as soon as the LIMIT is reached.
+    """
+    # An inner LIMIT keeps the statement as a co-routine, which still streams
+    table_scans = [
+        detail for detail in details
+        if not detail.startswith("CO-ROUTINE") and not detail.startswith("SCAN (subquery")
+    ]
+    if len(table_scans) != 1 or not SCAN_DETAIL.match(table_scans[0]):
+        return False
+    tokens = [token.lower() for token, _ in scan(sql)]
+    for index, token in enumerate(tokens):
+        if token in FILTERING_KEYWORDS:
+            return False
+        following = tokens[index + 1] if index + 1 < len(tokens) else ""
+        if token in AGGREGATE_FUNCTIONS and following == "(":
+            return False
+        # LIMIT skip, count reads the skipped rows too
+        if token == "limit" and "," in tokens[index + 1:]:
+            return False
+    return True
+
+
+class QueryRejected(ValueError):
+    """Raised when a statement would scan more rows than the guard allows."""
+
+
+class QueryGuard:
+    """
+    Per-statement limits applied by SQLitePool.execute.
+
+    - max_rows: SELECT/WITH/VALUES statements are wrapped in an outer LIMIT,
+      so no call returns more rows than this (0 disables). The LIMIT is one
+      higher, so the caller can tell a truncated result from one that fit.
+      A query that cannot be wrapped is rejected rather than run uncapped.
+    - max_scan_rows: the plan is checked with EXPLAIN QUERY PLAN; a full scan
+      of a table estimated above this size is rejected unless it is a bare
+      scan whose rows stream straight into the LIMIT (no WHERE, aggregate,
+      join, sort or grouping), which stops the scan early (0 disables).
+    - timeout: seconds before a running statement is interrupted through the
+      sqlite3 progress handler, freeing its connection for other callers
+      (0 disables).
+    """
+
+    def __init__(self, max_rows: int = 1000, max_scan_rows: int = 100000, timeout: float = 30.0):
+        self.max_rows = max_rows
+        self.max_scan_rows = max_scan_rows
+        self.timeout = timeout
+        self.limited = 0
+        self.truncated = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def prepare(self, conn: sqlite3.Connection, sql: str, params: Tuple = ()) -> Tuple[str, int]:
+        """
+        Return (statement to run for `sql`, the row cap it carries or 0);
+        raises QueryRejected. DML (including WITH ... INSERT), DDL and PRAGMAs
+        run as written.
+        """
+        statement = strip_statement(sql)
+        if statement_keyword(statement) not in LIMITABLE_KEYWORDS:
+            return sql, 0
+        wrapped = statement
+        if self.max_rows > 0:
+            # Newlines keep comments inside the statement away from the wrapper
+            wrapped = f"SELECT * FROM (\n{statement}\n) LIMIT {int(self.max_rows) + 1}"
+        try:
+            details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {wrapped}", params)]
+        except sqlite3.OperationalError as e:
+            if wrapped is statement:
+                raise
+            # The statement's own error (e.g. a typo) says more than the wrapper's
+            conn.execute(f"EXPLAIN QUERY PLAN {statement}", params)
+            self.rejected += 1
+            raise QueryRejected(f"Query rejected: it cannot be run under the row limit ({e})") from None
+        if wrapped is not statement:
+            self.limited += 1
+        if self.max_scan_rows > 0:
+            self._check_plan(conn, wrapped, details)
+        return wrapped, self.max_rows if wrapped is not statement else 0
+
+    def _check_plan(self, conn: sqlite3.Connection, sql: str, details: List[str]) -> None:
+        # A bare scan under the LIMIT stops once enough rows are out
+        if self.max_rows > 0 and streams_into_limit(sql, details):
+            return
+        aliases = self._aliases(sql)
+        for detail in details:
+            match = SCAN_DETAIL.match(detail)
+            if not match:
+                continue
+            table = aliases.get(match.group(1).lower(), match.group(1))
+            rows = self._estimate_rows(conn, table)
+            if rows is not None and rows > self.max_scan_rows:
+                self.rejected += 1
+                raise QueryRejected(
+                    f"Query rejected: full scan of {table} (~{rows} rows, limit {self.max_scan_rows}). "
+                    f"Filter on an indexed column, or aggregate over a smaller table."
+                )
+
+    @staticmethod
+    def _aliases(sql: str) -> Dict[str, str]:
+        aliases = {}
+        for match in TABLE_REFERENCE.finditer(sql):
+            table = next(group for group in match.groups()[:4] if group)
+            aliases[table.lower()] = table
+            if match.group(5):
+                aliases[match.group(5).lower()] = table
+        return aliases
+
+    @staticmethod
+    def _estimate_rows(conn: sqlite3.Connection, table: str) -> Optional[int]:
+        """Row estimate from ANALYZE statistics, else max(rowid); None if unknown."""
+        quoted = '"' + table.replace('"', '""') + '"'
+        try:
+            row = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)).fetchone()
+            if row and row[0]:
+                return int(row[0].split()[0])
+        except sqlite3.OperationalError:
+            pass
+        try:
+            row = conn.execute(f"SELECT max(rowid) FROM {quoted}").fetchone()
+        except sqlite3.OperationalError:
+            # Not a table (CTE, view, subquery) or WITHOUT ROWID
+            return None
+        return row[0] if row and row[0] is not None else 0
+
+    @contextlib.contextmanager
+    def deadline(self, conn: sqlite3.Connection) -> Iterator[None]:
+        """Interrupt statements on `conn` that run longer than the timeout."""
+        if self.timeout <= 0:
+            yield
+            return
+        expires = time.monotonic() + self.timeout
+        # A non-zero return aborts the statement with OperationalError("interrupted")
+        conn.set_progress_handler(lambda: time.monotonic() > expires, 10000)
+        try:
+            yield
+        except sqlite3.OperationalError as e:
+            if "interrupted" not in str(e):
+                raise
+            self.timeouts += 1
+            raise TimeoutError(f"Query interrupted after {self.timeout:g}s") from None
+        finally:
+            conn.set_progress_handler(None, 0)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "max_rows": self.max_rows,
+            "max_scan_rows": self.max_scan_rows,
+            "timeout": self.timeout,
+            "limited": self.limited,
+            "truncated": self.truncated,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Read-only SQLite connection pool for the Python SQLite MCP server
+WAL-mode database, one read-only connection per worker thread, each with its
+own prepared-statement LRU; queries run off the event loop
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlite_guard import QueryGuard, leading_keyword
+
+READ_KEYWORDS = ("select", "with", "explain", "pragma", "values")
+
+
+def is_read_statement(sql: str) -> bool:
+    """Cheap routing hint: statements that can start on a read-only connection."""
+    return leading_keyword(sql) in READ_KEYWORDS
+
+
+class SQLitePool:
+    """
+    A fixed set of read-only connections served from a thread pool.
+
+    sqlite3 releases the GIL while a statement runs, so concurrent SELECTs on
+    separate connections use separate cores; WAL mode lets them proceed while
+    a write is in progress. Writes (when allowed) go through one dedicated
+    read-write connection, serialized by a lock.
+
+    An optional QueryGuard caps rows, rejects large full scans and interrupts
+    statements that overrun their deadline (see sqlite_guard.py).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 4,
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size_kb: int = 16 * 1024,
+        statement_cache: int = 128,
+        allow_writes: bool = True,
+        busy_timeout_ms: int = 5000,
+        guard: Optional[QueryGuard] = None,
+    ):
+        self.path = path
+        self.size = max(1, size)
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.statement_cache = statement_cache
+        self.allow_writes = allow_writes
+        self.busy_timeout_ms = busy_timeout_ms
+        self.guard = guard
+
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.journal_mode: Optional[str] = None
+        self.immutable = False
+        self.reads = 0
+        self.writes = 0
+
+    def _configure(self, conn: sqlite3.Connection) -> sqlite3.Connection:
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        # Negative cache_size is in KiB rather than pages
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        # cached_statements is sqlite3's per-connection LRU of prepared statements
+        # immutable=1 skips locking and change detection entirely (snapshot files)
+        mode = "mode=ro&immutable=1" if self.immutable else "mode=ro"
+        conn = sqlite3.connect(
+            f"file:{self.path}?{mode}",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.statement_cache,
+        )
+        self._configure(conn)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def open(self) -> None:
+        """Switch the database to WAL and open the connections."""
+        # Read-only snapshot (bootstrap_db.py --snapshot): serve it as-is. Mode
+        # bits rather than os.access, which is always true for root
+        if not os.stat(self.path).st_mode & 0o222:
+            self.immutable = True
+            self.allow_writes = False
+            self._open_readers()
+            self.journal_mode = self._all_readers[0].execute("PRAGMA journal_mode").fetchone()[0]
+            return
+
+        writer = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache,
+            isolation_level=None,
+        )
+        self._configure(writer)
+        # journal_mode=WAL is persistent: set once, every later connection sees it
+        self.journal_mode = writer.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        writer.execute("PRAGMA synchronous = NORMAL")
+        if self.allow_writes:
+            self._writer = writer
+        else:
+            writer.close()
+        self._open_readers()
+
+    def _open_readers(self) -> None:
+        for _ in range(self.size):
+            conn = self._connect_reader()
+            self._all_readers.append(conn)
+            self._readers.put(conn)
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="sqlite-read")
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for conn in self._all_readers:
+            conn.close()
+        self._all_readers.clear()
+        self._readers = queue.Queue()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _with_reader(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._readers.get()
+        try:
+            return fn(conn)
+        finally:
+            self._readers.put(conn)
+
+    def _with_writer(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        if self._writer is None:
+            reason = "read-only snapshot" if self.immutable else "SQLITE_ALLOW_WRITES=false"
+            raise PermissionError(f"This server is read-only ({reason})")
+        with self._write_lock:
+            return fn(self._writer)
+
+    def run_sync(self, fn: Callable[[sqlite3.Connection], Any], write: bool = False) -> Any:
+        """Run fn(connection) from synchronous code (startup), on the writer or a pooled reader."""
+        return self._with_writer(fn) if write else self._with_reader(fn)
+
+    async def read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(connection) on a pooled read-only connection in a worker thread."""
+        self.reads += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._with_reader, fn)
+
+    async def write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(connection) on the single read-write connection."""
+        self.writes += 1
+        return await asyncio.to_thread(self._with_writer, fn)
+
+    async def execute(self, sql: str, params: Tuple = ()) -> Tuple[List[str], List[Tuple], bool]:
+        """
+        Run one statement and return (column names, rows, truncated), where
+        truncated means the guard's row cap cut the result short.
+        Reads use the pool; anything else needs the writer.
+        """
+        def fetch(conn: sqlite3.Connection, statement: str) -> Tuple[List[str], List[Tuple]]:
+            cursor = conn.execute(statement, params)
+            try:
+                columns = [d[0] for d in cursor.description or ()]
+                rows = [tuple(row) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+            return columns, rows
+
+        def run(conn: sqlite3.Connection) -> Tuple[List[str], List[Tuple], bool]:
+            if self.guard is None:
+                return (*fetch(conn, sql), False)
+            with self.guard.deadline(conn):
+                statement, row_cap = self.guard.prepare(conn, sql, params)
+                columns, rows = fetch(conn, statement)
+            # The cap is applied one row high: a row past it means rows were cut
+            if 0 < row_cap < len(rows):
+                self.guard.truncated += 1
+                return columns, rows[:row_cap], True
+            return columns, rows, False
+
+        if is_read_statement(sql):
+            try:
+                return await self.read(run)
+            except sqlite3.OperationalError as e:
+                # e.g. WITH ... INSERT, or a PRAGMA that writes
+                if "readonly" not in str(e) or not self.allow_writes:
+                    raise
+        return await self.write(run)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "database": self.path,
+            "journal_mode": self.journal_mode,
+            "immutable": self.immutable,
+            "pool_size": self.size,
+            "idle_connections": self._readers.qsize(),
+            "mmap_size": self.mmap_size,
+            "cache_size_kb": self.cache_size_kb,
+            "statement_cache": self.statement_cache,
+            "allow_writes": self.allow_writes,
+            "reads": self.reads,
+            "writes": self.writes,
+            "guard": self.guard.stats() if self.guard is not None else None,
+        }
+
+
+def pool_from_env() -> SQLitePool:
+    """Build a pool from the SQLITE_* environment variables."""
+    return SQLitePool(
+        path=os.getenv("SQLITE_DATABASE", "/app/data/sample.db"),
+        size=int(os.getenv("SQLITE_POOL_SIZE", str(os.cpu_count() or 4))),
+        mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        cache_size_kb=int(os.getenv("SQLITE_CACHE_SIZE_KB", str(16 * 1024))),
+        statement_cache=int(os.getenv("SQLITE_STATEMENT_CACHE", "128")),
+        allow_writes=os.getenv("SQLITE_ALLOW_WRITES", "true").lower() not in ("false", "0", "no"),
+        guard=QueryGuard(
+            max_rows=int(os.getenv("SQLITE_MAX_ROWS", "1000")),
+            max_scan_rows=int(os.getenv("SQLITE_MAX_SCAN_ROWS", "100000")),
+            timeout=float(os.getenv("SQLITE_QUERY_TIMEOUT", "30")),
+        ),
+    )
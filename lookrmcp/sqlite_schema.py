@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Schema introspection cache for the Python SQLite MCP server
+Table, column and index metadata is read once and kept until
+PRAGMA schema_version moves; row estimates from sqlite_stat1 are re-read only
+when PRAGMA data_version says another connection committed
+"""
+
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def read_structure(conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+    """Columns, indexes and foreign keys of every user table, keyed by table name."""
+    names = [
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+    ]
+    tables: Dict[str, Dict[str, Any]] = {}
+    for name in names:
+        columns = [
+            {
+                "name": column[1],
+                "type": column[2],
+                "not_null": bool(column[3]),
+                "default": column[4],
+                "primary_key": bool(column[5]),
+            }
+            for column in conn.execute(f"PRAGMA table_info({_quote(name)})")
+        ]
+        indexes = []
+        # index_list rows: seq, name, unique, origin (c = CREATE INDEX, u = UNIQUE, pk), partial
+        for _, index_name, unique, origin, partial in conn.execute(f"PRAGMA index_list({_quote(name)})"):
+            index_columns = [
+                # Expression index columns have no name
+                info[2] if info[2] is not None else "<expression>"
+                for info in conn.execute(f"PRAGMA index_info({_quote(index_name)})")
+            ]
+            indexes.append({
+                "name": index_name,
+                "columns": index_columns,
+                "unique": bool(unique),
+                "origin": {"c": "index", "u": "unique_constraint", "pk": "primary_key"}.get(origin, origin),
+                "partial": bool(partial),
+            })
+        foreign_keys = [
+            {"column": fk[3], "references_table": fk[2], "references_column": fk[4]}
+            for fk in conn.execute(f"PRAGMA foreign_key_list({_quote(name)})")
+        ]
+        tables[name] = {"name": name, "columns": columns, "indexes": indexes, "foreign_keys": foreign_keys}
+    return tables
+
+
+def read_row_estimates(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Row counts as of the last ANALYZE: the first number of a table's
+    sqlite_stat1 entries. Tables never analyzed are absent.
+    """
+    try:
+        rows = conn.execute("SELECT tbl, stat FROM sqlite_stat1").fetchall()
+    except sqlite3.OperationalError:
+        # No sqlite_stat1 until ANALYZE has run once
+        return {}
+    estimates: Dict[str, int] = {}
+    for table, stat in rows:
+        try:
+            estimates[table] = max(estimates.get(table, 0), int(str(stat).split()[0]))
+        except (ValueError, IndexError):
+            continue
+    return estimates
+
+
+class SchemaCache:
+    """
+    Introspection results shared by every pooled connection.
+
+    schema_version is stored in the database header and bumped by any schema
+    change from any process, so comparing it is enough to know the structure
+    is current. data_version is per connection and moves when some other
+    connection commits; only then is sqlite_stat1 (which ANALYZE rewrites
+    without touching the schema) read again. A warm call is two PRAGMAs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schema_version: Optional[int] = None
+        self._structure: Dict[str, Dict[str, Any]] = {}
+        self._estimates: Dict[str, int] = {}
+        # id(connection) -> the data_version it reported when estimates were last read
+        self._data_versions: Dict[int, int] = {}
+        self.hits = 0
+        self.structure_reloads = 0
+        self.estimate_reloads = 0
+
+    def tables(self, conn: sqlite3.Connection) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+        """(structure by table, row estimates by table), refreshed as needed; runs on a pool thread."""
+        # One read transaction so the versions match what is read after them
+        conn.execute("BEGIN")
+        try:
+            schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            with self._lock:
+                if schema_version != self._schema_version:
+                    self._structure = read_structure(conn)
+                    self._estimates = read_row_estimates(conn)
+                    self._schema_version = schema_version
+                    self._data_versions = {id(conn): data_version}
+                    self.structure_reloads += 1
+                elif self._data_versions.get(id(conn)) != data_version:
+                    self._estimates = read_row_estimates(conn)
+                    self._data_versions[id(conn)] = data_version
+                    self.estimate_reloads += 1
+                else:
+                    self.hits += 1
+                return self._structure, self._estimates
+        finally:
+            conn.execute("COMMIT")
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._schema_version = None
+            self._data_versions = {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "schema_version": self._schema_version,
+            "tables": len(self._structure),
+            "hits": self.hits,
+            "structure_reloads": self.structure_reloads,
+            "estimate_reloads": self.estimate_reloads,
+        }
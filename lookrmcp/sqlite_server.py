@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Python SQLite MCP server
+Drop-in for `toolbox --prebuilt sqlite` (same execute_sql and list_tables
+tools) backed by a pooled, read-only, WAL-mode connection set
+"""
+
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, List, Optional, Union
+
+import uvicorn
+from fastmcp import FastMCP
+from fastmcp.tools.tool import ToolResult
+from mcp.types import TextContent
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+# fast_json / arrow_format live at the repo root, shared with the Looker server
+# (the Docker build copies them next to this file)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import arrow_format
+    from fast_json import tool_serializer
+except ImportError:
+    # Image built without the shared context (see Dockerfile): stdlib JSON, no Arrow formats
+    arrow_format = None
+    tool_serializer = None
+from sqlite_aggregates import aggregates_from_env
+from sqlite_pool import pool_from_env
+from sqlite_schema import SchemaCache
+
+mcp = FastMCP(name="SQLite MCP Server", tool_serializer=tool_serializer)
+
+OUTPUT_FORMATS = ("rows", "columns") + (arrow_format.ARROW_FORMATS if arrow_format else ())
+
+pool = pool_from_env()
+
+# Table metadata for list_tables, refreshed only when the schema or statistics change
+schema_cache = SchemaCache()
+
+# Trigger-maintained aggregate tables and the router over them (SQLITE_AGGREGATES)
+aggregates = aggregates_from_env()
+
+
+def rows_to_dicts(columns: List[str], rows: List[tuple]) -> List[Dict[str, Any]]:
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def split_names(names: str) -> List[str]:
+    return [name.strip() for name in names.split(",") if name.strip()]
+
+
+def format_rows(
+    columns: List[str], rows: List[tuple], output_format: str
+) -> Union[List[Dict[str, Any]], Dict[str, List[Any]], Dict[str, Any]]:
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output_format {output_format!r}; expected {', '.join(OUTPUT_FORMATS)}")
+    if output_format == "rows":
+        return rows_to_dicts(columns, rows)
+    by_column = {column: [row[i] for row in rows] for i, column in enumerate(columns)}
+    if output_format == "columns":
+        return by_column
+    return arrow_format.encode(by_column, output_format)
+
+
+@mcp.tool()
+async def execute_sql(
+    sql: str, output_format: str = "rows"
+) -> Union[List[Dict[str, Any]], Dict[str, List[Any]], Dict[str, Any]]:
+    """
+    Execute a SQL statement against the SQLite database and return the rows.
+    output_format is "rows" (one object per row), "columns" ({column: [values]},
+    much smaller for large results), or "arrow" / "parquet" (typed columns as a
+    base64 Arrow IPC stream / Parquet file, when the server has pyarrow).
+    At most SQLITE_MAX_ROWS rows come back; the structured result's
+    "truncated" flag (and a note in the text) says when more were cut off.
+    """
+    format_rows([], [], output_format)
+    columns, rows, truncated = await pool.execute(sql)
+    data = format_rows(columns, rows, output_format)
+    content = [TextContent(type="text", text=tool_serializer(data))]
+    if truncated:
+        content.append(TextContent(
+            type="text",
+            text=f"Truncated: only the first {len(rows)} rows are shown (SQLITE_MAX_ROWS). "
+            "Narrow the query, aggregate, or page with LIMIT/OFFSET.",
+        ))
+    return ToolResult(content=content, structured_content={"result": data, "truncated": truncated})
+
+
+@mcp.tool()
+async def list_tables(table_names: str = "", output_format: str = "detailed") -> List[Dict[str, Any]]:
+    """
+    List tables in the database. table_names is an optional comma-separated
+    filter; output_format is "simple" (names only) or "detailed" (columns,
+    indexes, foreign keys and row_estimate, the row count recorded by the last
+    ANALYZE or null if the table was never analyzed).
+    """
+    wanted = [name.strip() for name in table_names.split(",") if name.strip()]
+    structure, estimates = await pool.read(schema_cache.tables)
+    names = [name for name in structure if name in wanted] if wanted else list(structure)
+    if output_format == "simple":
+        return [{"name": name} for name in names]
+    return [dict(structure[name], row_estimate=estimates.get(name)) for name in names]
+
+
+@mcp.tool()
+async def list_aggregates() -> List[Dict[str, Any]]:
+    """
+    List the precomputed aggregates: their dimensions and measures. Ask for
+    those with query_aggregates instead of writing the GROUP BY in SQL.
+    """
+    if aggregates is None:
+        return []
+    return aggregates.describe()
+
+
+@mcp.tool()
+async def query_aggregates(
+    measures: str,
+    dimensions: str = "",
+    filters: Optional[Dict[str, Any]] = None,
+    order_by: str = "",
+    limit: int = 100,
+    output_format: str = "rows",
+) -> Dict[str, Any]:
+    """
+    Aggregate analytics from the precomputed aggregate tables, e.g. revenue by
+    category or top users by revenue. measures and dimensions are
+    comma-separated names from list_aggregates; filters maps a dimension to a
+    value or a list of values; order_by is "<name> [asc|desc], ...".
+    Answered from the smallest matching aggregate table (milliseconds), or by
+    a GROUP BY over the source tables when none matches. Returns the
+    aggregate used, the SQL run, and the data in output_format (as execute_sql).
+    """
+    if aggregates is None:
+        raise ValueError("No aggregates are declared on this server (SQLITE_AGGREGATES)")
+    format_rows([], [], output_format)
+    aggregate, sql, params = aggregates.plan(split_names(measures), split_names(dimensions), filters, order_by, limit)
+    columns, rows, truncated = await pool.execute(sql, tuple(params))
+    return {
+        "aggregate": aggregate,
+        "sql": sql,
+        "data": format_rows(columns, rows, output_format),
+        "truncated": truncated,
+    }
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({
+        "status": "ok",
+        "server": "python",
+        **pool.stats(),
+        "schema_cache": schema_cache.stats(),
+        "aggregates": aggregates.stats() if aggregates is not None else None,
+    })
+
+
+def main() -> None:
+    port = int(os.getenv("PORT", "8080"))
+    host = os.getenv("HOST", "0.0.0.0")
+
+    pool.open()
+    stats = pool.stats()
+    print(f"✓ Opened {stats['database']} (journal_mode={stats['journal_mode']})", file=sys.stderr)
+    print(
+        f"✓ {stats['pool_size']} read-only connections, mmap_size={stats['mmap_size']}, "
+        f"cache_size={stats['cache_size_kb']} KiB, statement cache={stats['statement_cache']}",
+        file=sys.stderr,
+    )
+    if aggregates is not None:
+        try:
+            if pool.allow_writes:
+                status = pool.run_sync(aggregates.install, write=True)
+            else:
+                # Read-only: use only what bootstrap_db.py --aggregates built into the snapshot
+                status = pool.run_sync(aggregates.attach)
+            print(f"✓ Aggregates: {', '.join(f'{name} ({state})' for name, state in status.items())}", file=sys.stderr)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"⚠️  Aggregates disabled, queries run on the source tables: {e}", file=sys.stderr)
+    if pool.guard is not None:
+        guard = pool.guard.stats()
+        print(
+            f"✓ Guardrails: max_rows={guard['max_rows']}, max_scan_rows={guard['max_scan_rows']}, "
+            f"timeout={guard['timeout']:g}s",
+            file=sys.stderr,
+        )
+    try:
+        uvicorn.run(mcp.http_app(path="/mcp"), host=host, port=port, log_level="info")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,21 +9,56 @@ echo "============================================================"
 # Create data directory if it doesn't exist
 mkdir -p "$(dirname "$SQLITE_DATABASE")"
 
-# Initialize SQLite database if it doesn't exist
+# Initialize SQLite database if it doesn't exist. The image ships a snapshot
+# built at image-build time (bootstrap_db.py), so this costs the same whatever
+# the seed size: "link" points at the read-only snapshot, "copy" makes a
+# writable copy (a plain file copy, still far cheaper than replaying SQL).
+# "auto" links when writes are disabled and copies otherwise
+SQLITE_SNAPSHOT="${SQLITE_SNAPSHOT:-/app/snapshot/sample.db}"
+SQLITE_SNAPSHOT_MODE="${SQLITE_SNAPSHOT_MODE:-auto}"
+if [ "$SQLITE_SNAPSHOT_MODE" = "auto" ]; then
+    case "${SQLITE_ALLOW_WRITES:-true}" in
+        false|0|no) SQLITE_SNAPSHOT_MODE=link ;;
+        *) SQLITE_SNAPSHOT_MODE=copy ;;
+    esac
+fi
 if [ ! -f "$SQLITE_DATABASE" ]; then
-    echo "📝 Initializing SQLite database..."
-    sqlite3 "$SQLITE_DATABASE" < /app/init-db.sql
-    echo "✓ Database created with sample data"
+    if [ -f "$SQLITE_SNAPSHOT" ] && [ "$SQLITE_SNAPSHOT_MODE" = "link" ]; then
+        ln -s "$SQLITE_SNAPSHOT" "$SQLITE_DATABASE"
+        echo "✓ Linked read-only snapshot ${SQLITE_SNAPSHOT}"
+    elif [ -f "$SQLITE_SNAPSHOT" ]; then
+        cp "$SQLITE_SNAPSHOT" "$SQLITE_DATABASE"
+        chmod u+w "$SQLITE_DATABASE"
+        echo "✓ Database copied from snapshot ${SQLITE_SNAPSHOT}"
+    else
+        echo "📝 Initializing SQLite database..."
+        python3 /app/bootstrap_db.py --schema /app/init-db.sql --output "$SQLITE_DATABASE" \
+            ${SQLITE_AGGREGATES:+--aggregates "$SQLITE_AGGREGATES"}
+        echo "✓ Database created with sample data"
+    fi
 else
     echo "✓ Using existing database"
 fi
 
+# Server implementation: "toolbox" (GenAI Toolbox binary) or "python"
+# (sqlite_server.py: pooled read-only WAL connections)
+SQLITE_MCP_SERVER="${SQLITE_MCP_SERVER:-toolbox}"
+
 echo ""
 echo "Configuration:"
 echo "  Database: ${SQLITE_DATABASE}"
 echo "  Port: ${PORT}"
+echo "  Server: ${SQLITE_MCP_SERVER}"
 echo "------------------------------------------------------------"
 
+if [ "$SQLITE_MCP_SERVER" = "python" ]; then
+    echo "Starting Python SQLite MCP Server..."
+    echo "  Pool size: ${SQLITE_POOL_SIZE:-$(nproc)} read-only connections"
+    echo "  Health endpoint: http://0.0.0.0:${PORT}/health"
+    echo "============================================================"
+    exec python3 /app/sqlite_server.py
+fi
+
 # Start GenAI Toolbox with prebuilt SQLite tools
 echo "Starting GenAI Toolbox (SQLite MCP Server)..."
 echo "MCP Protocol Mode: stdio/SSE"
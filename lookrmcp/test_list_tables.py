@@ -3,35 +3,27 @@
 Quick test of the list_tables MCP tool
 """
 
+import asyncio
 import json
-import requests
-import uuid
+
+from mcp_async_client import AsyncMCPClient
 
 SERVICE_URL = "https://sqlite-mcp-646005218605.us-central1.run.app"
 MCP_ENDPOINT = f"{SERVICE_URL}/mcp"
 
-def send_mcp_request(method, params=None):
-    payload = {
-        "jsonrpc": "2.0",
-        "id": str(uuid.uuid4()),
-        "method": method
-    }
-    if params:
-        payload["params"] = params
-    
-    response = requests.post(MCP_ENDPOINT, json=payload, timeout=30)
-    return response.json()
-
-# Test list_tables tool
-print("🛠️ Testing list_tables tool")
-response = send_mcp_request("tools/call", {
-    "name": "list_tables",
-    "arguments": {"output_format": "detailed"}
-})
+async def main():
+    # Test list_tables tool
+    print("🛠️ Testing list_tables tool")
+    async with AsyncMCPClient(MCP_ENDPOINT, timeout=30) as client:
+        try:
+            result = await client.call_tool("list_tables", {"output_format": "detailed"})
+        except Exception as e:
+            print(f"❌ Tool failed: {e}")
+            return
 
-if "result" in response:
     print("✅ list_tables tool successful!")
     print("📊 Result:")
-    print(json.dumps(response["result"], indent=2))
-else:
-    print(f"❌ Tool failed: {response.get('error')}")
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
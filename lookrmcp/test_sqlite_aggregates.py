@@ -0,0 +1,98 @@
+"""
+Tests for trigger-maintained aggregate tables and their router (sqlite_aggregates.py)
+Builds the sample database from init-db.sql and aggregates.json, mutates the
+source tables and checks that routed answers match a GROUP BY over the sources
+Run with: python -m pytest test_sqlite_aggregates.py
+"""
+import os
+import sqlite3
+
+import pytest
+
+from bootstrap_db import bootstrap
+from sqlite_aggregates import load_aggregates
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCHEMA = os.path.join(HERE, "init-db.sql")
+AGGREGATES = os.path.join(HERE, "aggregates.json")
+
+REQUESTS = [
+    {"measures": ["order_count", "units", "revenue", "avg_order_value"], "dimensions": ["category"]},
+    {"measures": ["revenue", "order_count"], "dimensions": ["category", "status"]},
+    {"measures": ["revenue"], "dimensions": ["status"], "filters": {"status": "completed"}},
+    {"measures": ["units", "avg_order_value"], "dimensions": ["order_month"]},
+    {"measures": ["revenue", "order_count"], "dimensions": ["user_name", "user_email"]},
+    {"measures": ["order_count", "revenue"]},
+]
+
+MUTATIONS = [
+    "INSERT INTO orders (user_id, product_id, quantity, total_price, status, order_date) "
+    "VALUES (2, 8, 3, 899.97, 'completed', '2024-02-10 09:00:00')",
+    "UPDATE orders SET total_price = total_price * 2, quantity = quantity + 1 WHERE id % 2 = 0",
+    "UPDATE orders SET status = 'refunded' WHERE id IN (1, 4)",
+    "UPDATE orders SET order_date = '2023-12-31 23:00:00' WHERE id = 3",
+    "UPDATE products SET category = 'Office' WHERE id = 3",
+    "UPDATE users SET name = 'Robert Smith' WHERE id = 2",
+    "DELETE FROM orders WHERE id = 5",
+    "INSERT OR REPLACE INTO orders (id, user_id, product_id, quantity, total_price, status) "
+    "VALUES (2, 3, 1, 4, 5199.96, 'pending')",
+]
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "sample.db")
+    bootstrap(path, schema=SCHEMA, aggregates=AGGREGATES)
+    conn = sqlite3.connect(path, isolation_level=None)
+    # install() finds the tables current and turns on recursive_triggers, as at server start
+    routed = load_aggregates(AGGREGATES)
+    assert set(routed.install(conn).values()) == {"current"}
+    source = load_aggregates(AGGREGATES)
+    yield conn, routed, source
+    conn.close()
+
+
+def answer(conn, router, request):
+    aggregate, sql, params = router.plan(**request, limit=1000)
+    rows = conn.execute(sql, params).fetchall()
+    return aggregate, sorted(tuple(round(v, 6) if isinstance(v, float) else v for v in row) for row in rows)
+
+
+def assert_routed_matches_source(conn, routed, source):
+    for request in REQUESTS:
+        aggregate, from_aggregate = answer(conn, routed, request)
+        fallback, from_source = answer(conn, source, request)
+        assert aggregate is not None and fallback is None, request
+        assert from_aggregate == from_source, request
+
+
+def test_routes_every_request_to_an_aggregate(database):
+    conn, routed, source = database
+    assert_routed_matches_source(conn, routed, source)
+    assert routed.routed == len(REQUESTS) and routed.fallbacks == 0
+
+
+@pytest.mark.parametrize("mutation", MUTATIONS)
+def test_triggers_keep_aggregates_current(database, mutation):
+    conn, routed, source = database
+    conn.execute(mutation)
+    assert_routed_matches_source(conn, routed, source)
+
+
+def test_all_mutations_in_one_transaction(database):
+    conn, routed, source = database
+    conn.execute("BEGIN")
+    for mutation in MUTATIONS:
+        conn.execute(mutation)
+    conn.execute("COMMIT")
+    assert_routed_matches_source(conn, routed, source)
+
+
+def test_aggregate_with_unneeded_join_is_not_used(database):
+    conn, routed, _ = database
+    # An order for a product that does not exist drops out of the products join
+    conn.execute("INSERT INTO orders (user_id, product_id, quantity, total_price) VALUES (1, 999, 1, 10.0)")
+    aggregate, sql, params = routed.plan(["order_count"], ["status"])
+    assert aggregate == "agg_sales_by_month"
+    total = sum(row[-1] for row in conn.execute(sql, params))
+    assert total == conn.execute("SELECT count(*) FROM orders").fetchone()[0]
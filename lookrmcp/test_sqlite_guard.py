@@ -0,0 +1,59 @@
+"""
+Tests for the SQLite query guard's scan-size check (sqlite_guard.py)
+Run with: python -m pytest test_sqlite_guard.py
+"""
+import sqlite3
+
+import pytest
+
+from sqlite_guard import QueryGuard, QueryRejected
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, total_price REAL)")
+    conn.execute("CREATE INDEX idx_orders_customer ON orders (customer_id)")
+    conn.executemany(
+        "INSERT INTO orders (customer_id, total_price) VALUES (?, ?)",
+        ((i % 50, float(i)) for i in range(2000)),
+    )
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def guard():
+    return QueryGuard(max_rows=10, max_scan_rows=1000)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT count(*) FROM orders",
+    "SELECT * FROM orders WHERE total_price < 0",
+    "SELECT * FROM orders ORDER BY total_price",
+    "SELECT DISTINCT customer_id, total_price FROM orders",
+    "SELECT * FROM orders LIMIT 5 OFFSET 1500",
+])
+def test_full_scans_the_limit_cannot_stop_are_rejected(conn, guard, sql):
+    with pytest.raises(QueryRejected, match="full scan of orders"):
+        guard.prepare(conn, sql)
+    assert guard.rejected == 1
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM orders",
+    "SELECT id, total_price FROM orders LIMIT 5",
+    "SELECT * FROM orders WHERE customer_id = 7",
+    "SELECT * FROM orders ORDER BY id DESC",
+])
+def test_streaming_scans_and_index_searches_are_allowed(conn, guard, sql):
+    statement, row_cap = guard.prepare(conn, sql)
+    assert row_cap == 10
+    assert len(conn.execute(statement).fetchall()) <= 11
+    assert guard.rejected == 0
+
+
+def test_small_tables_may_be_scanned_in_full(conn):
+    guard = QueryGuard(max_rows=10, max_scan_rows=5000)
+    statement, _ = guard.prepare(conn, "SELECT count(*) FROM orders WHERE total_price < 0")
+    assert conn.execute(statement).fetchall() == [(0,)]
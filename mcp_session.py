@@ -0,0 +1,354 @@
+"""
+Long-lived MCP client sessions for agents
+One initialized streamable-HTTP session per server URL, kept open by a
+background task and re-established when it drops, with the tools/list result
+cached until the server sends notifications/tools/list_changed
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from mcp import ClientSession, types
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+
+logger = logging.getLogger(__name__)
+
+# Errors the MCP SDK itself raises for a dead transport and for a session the
+# server no longer knows (HTTP 404); both mean "reconnect". Servers also use
+# -32000 (CONNECTION_CLOSED) for ordinary failures, so the code alone is not
+# enough: those are raised to the caller, not retried.
+RECONNECT_ERRORS = {
+    (types.CONNECTION_CLOSED, "Connection closed"),
+    (32600, "Session terminated"),
+}
+
+
+def _session_lost(error: McpError) -> bool:
+    return (error.error.code, error.error.message) in RECONNECT_ERRORS
+
+
+def _describe(error: BaseException) -> str:
+    # anyio task groups wrap the transport's real error
+    while isinstance(error, BaseExceptionGroup) and error.exceptions:
+        error = error.exceptions[0]
+    return f"{type(error).__name__}: {error}"
+
+
+class _HeaderAuth(httpx.Auth):
+    """Adds header_provider() headers (e.g. a cached, refreshed ID token) to every request."""
+
+    def __init__(self, header_provider: Callable[[], Dict[str, str]]):
+        self.header_provider = header_provider
+
+    def auth_flow(self, request):
+        request.headers.update(self.header_provider())
+        yield request
+
+
+class WarmSession:
+    """
+    One MCP session to `url` shared by every caller on the event loop.
+
+    - connect()/prewarm() open and initialize the session ahead of the first
+      call; otherwise the first call does
+    - list_tools() is answered from cache; the server's list_changed
+      notification (or a reconnect) makes the next call refetch
+    - call_tool() reconnects and retries once when the session or the
+      connection was lost (the tools behind these agents are read-only; pass
+      retry_calls=False for servers where a repeated call is not safe)
+
+    `header_provider` is consulted per HTTP request, so a long-lived session
+    keeps working across ID token refreshes. Sessions are bound to the event
+    loop that first used them; use from a new loop starts a fresh connection.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        header_provider: Optional[Callable[[], Dict[str, str]]] = None,
+        timeout: float = 10.0,
+        sse_read_timeout: float = 300.0,
+        verify_ssl: bool = True,
+        retry_calls: bool = True,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 30.0,
+    ):
+        self.url = url
+        self.header_provider = header_provider
+        self.timeout = timeout
+        self.sse_read_timeout = sse_read_timeout
+        self.verify_ssl = verify_ssl
+        self.retry_calls = retry_calls
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connects = 0
+        self.reconnects = 0
+        self.tool_list_fetches = 0
+        self.tool_list_hits = 0
+        self.list_changed = 0
+        self.calls = 0
+        self.last_error: Optional[str] = None
+        self.connected_at: Optional[float] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._session: Optional[ClientSession] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._drop: Optional[asyncio.Event] = None
+        self._lost: Optional[asyncio.Event] = None
+        self._tools_lock: Optional[asyncio.Lock] = None
+        self._tools: Optional[List[types.Tool]] = None
+        self._tools_version = 0
+        self._closed = False
+
+    # -- connection -------------------------------------------------------
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # First use, or the previous loop is gone (e.g. one asyncio.run per CLI turn)
+        self._loop = loop
+        self._runner = None
+        self._session = None
+        self._ready = asyncio.Event()
+        self._drop = asyncio.Event()
+        self._tools_lock = asyncio.Lock()
+        self._closed = False
+
+    def _http_client(self, headers=None, timeout=None, auth=None) -> httpx.AsyncClient:
+        # Same shape as mcp's default factory, plus verify and a warm keep-alive pool
+        return httpx.AsyncClient(
+            headers=headers,
+            timeout=timeout,
+            auth=auth,
+            verify=self.verify_ssl,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=300.0),
+        )
+
+    async def _on_message(self, message: Any) -> None:
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            self.list_changed += 1
+            self._tools = None
+            logger.info("MCP server %s changed its tool list; refetching on next use", self.url)
+        elif isinstance(message, Exception):
+            self.last_error = _describe(message)
+
+    async def _run(self) -> None:
+        """Hold the session open until it is dropped, then reconnect with backoff."""
+        delay = self.reconnect_delay
+        auth = _HeaderAuth(self.header_provider) if self.header_provider else None
+        lost: Optional[asyncio.Event] = None
+        while not self._closed:
+            self._drop.clear()
+            try:
+                async with streamablehttp_client(
+                    self.url,
+                    timeout=self.timeout,
+                    sse_read_timeout=self.sse_read_timeout,
+                    httpx_client_factory=self._http_client,
+                    auth=auth,
+                ) as (read, write, _):
+                    async with ClientSession(
+                        read,
+                        write,
+                        read_timeout_seconds=timedelta(seconds=self.sse_read_timeout),
+                        message_handler=self._on_message,
+                    ) as session:
+                        # A refused connection surfaces as a hung request, not an exception
+                        await asyncio.wait_for(session.initialize(), self.timeout)
+                        if self.connects:
+                            self.reconnects += 1
+                            # Tools may have changed while we were away
+                            self._tools = None
+                        self.connects += 1
+                        self.connected_at = time.time()
+                        lost = self._lost = asyncio.Event()
+                        self._session = session
+                        delay = self.reconnect_delay
+                        self._ready.set()
+                        logger.info("MCP session open: %s", self.url)
+                        await self._drop.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = _describe(e)
+                logger.warning("MCP session to %s failed: %s", self.url, self.last_error)
+            finally:
+                self._ready.clear()
+                self._session = None
+                if lost is not None:
+                    # The SDK does not reliably fail requests pending on a dead transport
+                    lost.set()
+                    lost = None
+            if self._closed:
+                return
+            if not self._drop.is_set():
+                # Connect failure rather than a requested reconnect: back off
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def connect(self) -> ClientSession:
+        """The open session, connecting (or waiting for a reconnect) if needed."""
+        self._bind()
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name=f"mcp-session {self.url}")
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.timeout * 2)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"MCP server {self.url} unreachable: {self.last_error or 'timed out'}") from None
+        return self._session
+
+    def prewarm(self) -> bool:
+        """
+        Start connecting and listing tools in the background on the running
+        loop; returns False (and does nothing) when called outside one.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        task = loop.create_task(self.list_tools())
+        task.add_done_callback(self._log_prewarm)
+        return True
+
+    def _log_prewarm(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.warning("MCP prewarm for %s failed: %s", self.url, task.exception())
+        else:
+            logger.info("MCP session for %s warm with %d tools", self.url, len(task.result()))
+
+    def _reconnect(self) -> None:
+        if self._drop is not None:
+            # Callers wait for the next session rather than reusing this one
+            self._ready.clear()
+            self._session = None
+            self._drop.set()
+
+    # -- MCP calls --------------------------------------------------------
+
+    async def _with_reconnect(self, request: Callable[[ClientSession], Any], retry: bool = True) -> Any:
+        for attempt in range(2):
+            session = await self.connect()
+            call = asyncio.ensure_future(request(session))
+            watch = asyncio.ensure_future(self._lost.wait())
+            try:
+                done, _ = await asyncio.wait({call, watch}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                watch.cancel()
+                if not call.done():
+                    call.cancel()
+            if call in done:
+                try:
+                    return call.result()
+                except McpError as e:
+                    if not _session_lost(e):
+                        raise
+                    reason = e.error.message
+                    self._reconnect()
+                    if attempt or not retry:
+                        raise
+            else:
+                reason = self.last_error or "connection lost"
+                if attempt or not retry:
+                    raise ConnectionError(f"MCP session to {self.url} lost: {reason}")
+            logger.info("MCP session to %s lost (%s); reconnecting", self.url, reason)
+
+    async def list_tools(self) -> List[types.Tool]:
+        """The server's tools, fetched once per session and tool-list change."""
+        self._bind()
+        tools = self._tools
+        if tools is not None:
+            self.tool_list_hits += 1
+            return tools
+        async with self._tools_lock:
+            if self._tools is not None:
+                self.tool_list_hits += 1
+                return self._tools
+            tools = []
+            cursor = None
+            while True:
+                page = await self._with_reconnect(lambda session: session.list_tools(cursor=cursor))
+                tools.extend(page.tools)
+                cursor = page.nextCursor
+                if not cursor:
+                    break
+            self.tool_list_fetches += 1
+            self._tools_version += 1
+            self._tools = tools
+            return tools
+
+    @property
+    def tools_version(self) -> int:
+        """Bumped on every refetch of the tool list (for callers caching derived objects)."""
+        return self._tools_version
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        read_timeout_seconds: Optional[timedelta] = None,
+        **kwargs: Any,
+    ) -> types.CallToolResult:
+        self.calls += 1
+        return await self._with_reconnect(
+            lambda session: session.call_tool(name, arguments, read_timeout_seconds=read_timeout_seconds, **kwargs),
+            retry=self.retry_calls,
+        )
+
+    async def aclose(self) -> None:
+        """Close the session (DELETE on the server) and stop reconnecting."""
+        self._closed = True
+        self._reconnect()
+        runner = self._runner
+        if runner is not None and not runner.done():
+            if runner.get_loop() is asyncio.get_running_loop():
+                try:
+                    await asyncio.wait_for(asyncio.shield(runner), self.timeout)
+                except Exception:
+                    runner.cancel()
+        self._runner = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "connected": self._session is not None,
+            "connected_at": self.connected_at,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "tools_cached": None if self._tools is None else len(self._tools),
+            "tool_list_fetches": self.tool_list_fetches,
+            "tool_list_hits": self.tool_list_hits,
+            "list_changed_notifications": self.list_changed,
+            "calls": self.calls,
+            "last_error": self.last_error,
+        }
+
+
+_sessions: Dict[str, WarmSession] = {}
+
+
+def get_session(url: str, **kwargs: Any) -> WarmSession:
+    """
+    The process-wide WarmSession for `url`; keyword arguments apply only
+    when the session is first created.
+    """
+    session = _sessions.get(url)
+    if session is None:
+        session = _sessions[url] = WarmSession(url, **kwargs)
+    return session
+
+
+async def close_all() -> None:
+    for session in list(_sessions.values()):
+        await session.aclose()
+    _sessions.clear()
@@ -0,0 +1,305 @@
+"""
+In-memory index of LookML models, explores and fields
+Built once at startup and refreshed incrementally in the background so the
+metadata tools never wait on a Looker API round trip
+"""
+import asyncio
+import os
+import sys
+import time
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+from looker_client import LookerClient
+
+FIELD_KINDS = ("dimensions", "measures", "filters", "parameters")
+
+
+def summarize_field(field: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the LookML field attributes that are useful to an agent."""
+    return {
+        "name": field.get("name"),
+        "type": field.get("type"),
+        "label": field.get("label"),
+        "label_short": field.get("label_short"),
+        "description": field.get("description"),
+        "view": field.get("view"),
+    }
+
+
+class ExploreEntry:
+    """Fields of one explore plus precomputed search text."""
+
+    def __init__(self, model: str, explore: str, fields: Dict[str, Any]):
+        self.model = model
+        self.explore = explore
+        self.fetched_at = time.monotonic()
+        self.fields: Dict[str, List[Dict[str, Any]]] = {
+            kind: [summarize_field(field) for field in fields.get(kind) or []]
+            for kind in FIELD_KINDS
+        }
+        # (kind, field, lowercase haystack) for search_fields
+        self.search_rows: List[Tuple[str, Dict[str, Any], str]] = [
+            (
+                kind,
+                field,
+                " ".join(str(field.get(key) or "") for key in ("name", "label", "description")).lower(),
+            )
+            for kind in FIELD_KINDS
+            for field in self.fields[kind]
+        ]
+
+
+class LookMLIndex:
+    """
+    Models/explores/fields index answering the metadata tools from memory.
+
+    Every refresh cycle re-lists models (one API call) to pick up added or
+    removed explores, then re-fetches only the `batch_size` stalest explores,
+    so a large instance is walked gradually instead of all at once.
+
+    With a shared `store` (see shared_store.py) one worker at a time holds a
+    lease and talks to Looker; it publishes a snapshot of the index that the
+    other workers adopt instead of walking the API themselves.
+    """
+
+    SNAPSHOT_KEY = "lookml_index:snapshot"
+    LEASE_KEY = "lookml_index:lease"
+    LEASE_SECONDS = 60
+
+    def __init__(
+        self,
+        client: LookerClient,
+        refresh_interval: float = 300.0,
+        batch_size: int = 25,
+        concurrency: int = 8,
+        store=None,
+    ):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.store = store
+
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.explores: Dict[Tuple[str, str], ExploreEntry] = {}
+        self.built_at: Optional[float] = None
+        # Wall-clock time of the data behind built_at, comparable across processes
+        self.built_wall = 0.0
+        self.adopted = 0
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @property
+    def ready(self) -> bool:
+        return self.built_at is not None
+
+    async def refresh_models(self) -> List[Tuple[str, str]]:
+        """Reload the model/explore listing; returns the explores now known."""
+        models = await self.client.get_models()
+        self.models = {
+            model["name"]: {
+                "name": model.get("name"),
+                "label": model.get("label"),
+                "project_name": model.get("project_name"),
+                "explores": [
+                    {
+                        "name": explore.get("name"),
+                        "label": explore.get("label"),
+                        "group_label": explore.get("group_label"),
+                        "description": explore.get("description"),
+                    }
+                    for explore in model.get("explores") or []
+                    if not explore.get("hidden")
+                ],
+            }
+            for model in models
+        }
+        known = [
+            (model_name, explore["name"])
+            for model_name, model in self.models.items()
+            for explore in model["explores"]
+        ]
+        # Forget explores that no longer exist
+        for key in set(self.explores) - set(known):
+            del self.explores[key]
+        return known
+
+    async def load_explore(self, model: str, explore: str) -> ExploreEntry:
+        """Fetch one explore's fields from Looker and store them."""
+        async with self._semaphore:
+            lookml_explore = await self.client.get_explore(model, explore)
+        entry = ExploreEntry(model, explore, lookml_explore.get("fields") or {})
+        self.explores[(model, explore)] = entry
+        return entry
+
+    async def build(self) -> None:
+        """Full build: every model and every explore."""
+        known = await self.refresh_models()
+        await asyncio.gather(*(self.load_explore(model, explore) for model, explore in known))
+        self.built_at = time.monotonic()
+        self.built_wall = time.time()
+
+    async def refresh(self) -> None:
+        """One incremental refresh cycle."""
+        known = await self.refresh_models()
+        missing = [key for key in known if key not in self.explores]
+        stale = sorted(
+            (key for key in known if key in self.explores),
+            key=lambda key: self.explores[key].fetched_at,
+        )
+        batch = missing + stale[: max(self.batch_size - len(missing), 0)]
+        await asyncio.gather(*(self.load_explore(model, explore) for model, explore in batch))
+        self.built_at = time.monotonic()
+        self.built_wall = time.time()
+
+    def _publish(self) -> None:
+        now = time.monotonic()
+        self.store.set(self.SNAPSHOT_KEY, {
+            "built_at": self.built_wall,
+            "models": self.models,
+            "explores": [
+                [model, explore, entry.fields, now - entry.fetched_at]
+                for (model, explore), entry in self.explores.items()
+            ],
+        })
+
+    def _adopt_snapshot(self) -> bool:
+        """Take another worker's snapshot if it is newer than ours and not yet due a refresh."""
+        if self.store is None:
+            return False
+        snapshot = self.store.get(self.SNAPSHOT_KEY)
+        if not snapshot or snapshot["built_at"] <= self.built_wall:
+            return False
+        age = time.time() - snapshot["built_at"]
+        if age >= self.refresh_interval:
+            return False
+        now = time.monotonic()
+        explores = {}
+        for model, explore, fields, entry_age in snapshot["explores"]:
+            entry = ExploreEntry(model, explore, fields)
+            entry.fetched_at = now - entry_age - age
+            explores[(model, explore)] = entry
+        self.models = snapshot["models"]
+        self.explores = explores
+        self.built_at = now - age
+        self.built_wall = snapshot["built_at"]
+        self.adopted += 1
+        return True
+
+    async def _cycle(self) -> None:
+        if self._adopt_snapshot():
+            return
+        if self.store is not None and not self.store.add(self.LEASE_KEY, os.getpid(), ttl=self.LEASE_SECONDS):
+            # Another worker is refreshing; pick up its snapshot when it lands
+            for _ in range(self.LEASE_SECONDS):
+                await asyncio.sleep(1)
+                if self._adopt_snapshot():
+                    return
+            return
+        try:
+            if self.ready:
+                await self.refresh()
+            else:
+                await self.build()
+            if self.store is not None:
+                self._publish()
+        finally:
+            if self.store is not None and self.store.get(self.LEASE_KEY) == os.getpid():
+                self.store.delete(self.LEASE_KEY)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._cycle()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"WARNING: LookML index refresh failed: {e}", file=sys.stderr)
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start the background build/refresh loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def get_models(self) -> List[Dict[str, Any]]:
+        if not self.models:
+            await self.refresh_models()
+        return [
+            {"name": model["name"], "label": model["label"], "project_name": model["project_name"]}
+            for model in self.models.values()
+        ]
+
+    async def get_explores(self, model: str) -> List[Dict[str, Any]]:
+        if model not in self.models:
+            await self.refresh_models()
+        if model not in self.models:
+            raise ValueError(f"Unknown LookML model: {model}")
+        return self.models[model]["explores"]
+
+    async def get_fields(self, model: str, explore: str, kind: str) -> List[Dict[str, Any]]:
+        """Fields of one kind (dimensions, measures, filters, parameters)."""
+        entry = self.explores.get((model, explore))
+        if entry is None:
+            entry = await self.load_explore(model, explore)
+        return entry.fields[kind]
+
+    def search_fields(
+        self,
+        text: str,
+        model: Optional[str] = None,
+        explore: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Fuzzy-match fields by name, label and description."""
+        needle = text.lower().strip()
+        tokens = needle.split()
+        scored = []
+        for (entry_model, entry_explore), entry in self.explores.items():
+            if model and entry_model != model:
+                continue
+            if explore and entry_explore != explore:
+                continue
+            for kind, field, haystack in entry.search_rows:
+                if tokens and all(token in haystack for token in tokens):
+                    # Every token present: rank above fuzzy-only matches
+                    score = 1.0 + len(needle) / max(len(haystack), 1)
+                else:
+                    name = (field.get("name") or "").lower()
+                    label = (field.get("label") or "").lower()
+                    score = max(
+                        SequenceMatcher(None, needle, name).ratio(),
+                        SequenceMatcher(None, needle, label).ratio(),
+                    )
+                    if score < 0.5:
+                        continue
+                scored.append((score, entry_model, entry_explore, kind, field))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [
+            {"model": m, "explore": e, "kind": kind[:-1], "score": round(score, 3), **field}
+            for score, m, e, kind, field in scored[:limit]
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "models": len(self.models),
+            "explores": len(self.explores),
+            "fields": sum(len(entry.search_rows) for entry in self.explores.values()),
+            "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+            "adopted_snapshots": self.adopted,
+            "last_error": self.last_error,
+        }
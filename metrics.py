@@ -0,0 +1,290 @@
+"""
+Prometheus metrics for the Looker MCP server
+Request counts, in-flight requests and latency histograms per MCP method and
+tool, Looker API time kept apart from server overhead, and cache/token counters
+"""
+import contextvars
+import functools
+import json
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+
+# Latency buckets (seconds) spanning cached metadata lookups to long Looker queries
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+# Method names outside this set are reported as "other" to bound label cardinality
+MCP_METHODS = {
+    "initialize", "ping",
+    "tools/list", "tools/call",
+    "resources/list", "resources/read", "resources/templates/list",
+    "prompts/list", "prompts/get",
+    "completion/complete", "logging/setLevel",
+    "notifications/initialized", "notifications/cancelled",
+    "notifications/progress", "notifications/roots/list_changed",
+}
+
+MCP_REQUESTS = Counter(
+    "mcp_requests_total",
+    "MCP requests by JSON-RPC method, tool and outcome",
+    ["method", "tool", "outcome"],
+)
+MCP_IN_FLIGHT = Gauge(
+    "mcp_requests_in_flight",
+    "MCP requests currently being handled",
+)
+MCP_LATENCY = Histogram(
+    "mcp_request_duration_seconds",
+    "End-to-end MCP request latency by JSON-RPC method and tool",
+    ["method", "tool"],
+    buckets=LATENCY_BUCKETS,
+)
+TOOL_UPSTREAM = Histogram(
+    "mcp_tool_upstream_seconds",
+    "Time a tool call spent waiting on the Looker API",
+    ["tool"],
+    buckets=LATENCY_BUCKETS,
+)
+TOOL_OVERHEAD = Histogram(
+    "mcp_tool_overhead_seconds",
+    "Time a tool call spent in the server itself (total minus Looker API time)",
+    ["tool"],
+    buckets=LATENCY_BUCKETS,
+)
+LOOKER_REQUESTS = Counter(
+    "looker_api_requests_total",
+    "Looker API requests by HTTP method, endpoint and status code",
+    ["method", "endpoint", "status"],
+)
+LOOKER_LATENCY = Histogram(
+    "looker_api_request_duration_seconds",
+    "Looker API request latency by HTTP method and endpoint",
+    ["method", "endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Looker time accumulated by the tool call running in the current context
+_upstream_seconds: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar(
+    "looker_upstream_seconds", default=None
+)
+
+# Path segments that are identifiers, collapsed so endpoints stay low-cardinality
+_PATH_IDS = re.compile(
+    r"/(lookml_models|explores|looks|queries|dashboards|running_queries|query_tasks)/(?!run/)[^/]+"
+)
+
+
+def endpoint_template(path: str) -> str:
+    """/lookml_models/ecommerce/explores/orders -> /lookml_models/{id}/explores/{id}"""
+    return _PATH_IDS.sub(lambda m: f"/{m.group(1)}/{{id}}", path)
+
+
+def observe_looker_request(method: str, path: str, status: int, seconds: float) -> None:
+    """LookerClient observer: record one API round trip."""
+    endpoint = endpoint_template(path)
+    LOOKER_REQUESTS.labels(method, endpoint, str(status)).inc()
+    LOOKER_LATENCY.labels(method, endpoint).observe(seconds)
+    upstream = _upstream_seconds.get()
+    if upstream is not None:
+        upstream[0] += seconds
+
+
+def instrument_tool(fn: Callable) -> Callable:
+    """
+    Wrap an async MCP tool so its Looker API time and its own overhead are
+    recorded separately. Apply below @mcp.tool() so the signature is preserved.
+    """
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        upstream = [0.0]
+        token = _upstream_seconds.set(upstream)
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _upstream_seconds.reset(token)
+            TOOL_UPSTREAM.labels(name).observe(upstream[0])
+            TOOL_OVERHEAD.labels(name).observe(max(0.0, elapsed - upstream[0]))
+
+    return wrapper
+
+
+class StatsCollector:
+    """
+    Exposes the cache/index/spool/token counters the server already keeps as
+    Prometheus metrics, read at scrape time.
+    """
+
+    def __init__(self, result_cache=None, metadata_index=None, result_store=None, looker=None, toolbox=None, single_flight=None,
+                 query_guard=None, admission=None, query_jobs=None):
+        self.result_cache = result_cache
+        self.metadata_index = metadata_index
+        self.result_store = result_store
+        self.looker = looker
+        self.toolbox = toolbox
+        self.single_flight = single_flight
+        self.query_guard = query_guard
+        self.admission = admission
+        self.query_jobs = query_jobs
+
+    def collect(self):
+        if self.result_cache is not None:
+            stats = self.result_cache.stats()
+            for key in ("hits", "misses", "evictions", "invalidations"):
+                yield CounterMetricFamily(f"result_cache_{key}", f"Result cache {key}", value=stats[key])
+            yield GaugeMetricFamily("result_cache_entries", "Cached query results", value=stats["entries"])
+        if self.result_store is not None:
+            stats = self.result_store.stats()
+            yield GaugeMetricFamily("result_spool_results", "Spooled results on disk", value=stats["results"])
+            yield GaugeMetricFamily("result_spool_spooling", "Results still streaming from Looker", value=stats["spooling"])
+            yield GaugeMetricFamily("result_spool_bytes", "Bytes spooled to disk", value=stats["bytes"])
+        if self.metadata_index is not None:
+            stats = self.metadata_index.stats()
+            yield GaugeMetricFamily("metadata_index_ready", "1 once the LookML index is built", value=int(stats["ready"]))
+            yield GaugeMetricFamily("metadata_index_explores", "Explores in the LookML index", value=stats["explores"])
+            yield GaugeMetricFamily("metadata_index_fields", "Fields in the LookML index", value=stats["fields"])
+            if stats["age_seconds"] is not None:
+                yield GaugeMetricFamily("metadata_index_age_seconds", "Seconds since the last index refresh", value=stats["age_seconds"])
+        if self.looker is not None:
+            yield CounterMetricFamily("looker_token_refreshes", "Looker /login calls", value=self.looker.logins)
+            yield CounterMetricFamily(
+                "looker_token_rejections", "Requests retried after Looker rejected the token", value=self.looker.token_rejections
+            )
+
+        if self.toolbox is not None:
+            stats = self.toolbox.stats()
+            yield GaugeMetricFamily("toolbox_workers_ready", "Toolbox workers accepting calls", value=stats["ready"])
+            yield CounterMetricFamily("toolbox_worker_restarts", "Toolbox workers restarted after dying", value=stats["restarts"])
+            yield CounterMetricFamily("toolbox_worker_recycles", "Toolbox workers replaced after max requests or memory", value=stats["recycles"])
+            inflight = GaugeMetricFamily("toolbox_worker_inflight", "In-flight calls per toolbox worker", labels=["slot"])
+            for worker in stats["workers"]:
+                inflight.add_metric([str(worker["slot"])], worker.get("inflight", 0))
+            yield inflight
+        if self.single_flight is not None:
+            stats = self.single_flight.stats()
+            yield CounterMetricFamily("single_flight_calls", "Tool calls through the single-flight layer", value=stats["calls"])
+            yield CounterMetricFamily(
+                "single_flight_coalesced", "Tool calls that joined an identical in-flight call", value=stats["coalesced"]
+            )
+            yield GaugeMetricFamily("single_flight_inflight", "Distinct tool calls currently executing", value=stats["inflight"])
+        if self.query_guard is not None:
+            stats = self.query_guard.stats()
+            yield CounterMetricFamily("query_guard_clamped", "Looker queries whose row limit was capped", value=stats["clamped"])
+            yield CounterMetricFamily("query_guard_timeouts", "Looker queries abandoned at QUERY_TIMEOUT", value=stats["timeouts"])
+            yield CounterMetricFamily("query_guard_cancelled", "Timed-out queries killed on Looker", value=stats["cancelled"])
+        if self.admission is not None:
+            stats = self.admission.stats()
+            yield CounterMetricFamily("admission_admitted", "Tool calls admitted", value=stats["admitted"])
+            yield CounterMetricFamily("admission_rate_limited", "Tool calls refused by a client's token bucket", value=stats["rate_limited"])
+            yield CounterMetricFamily("admission_overloaded", "Tool calls refused because the wait queue was full or timed out", value=stats["overloaded"])
+            yield GaugeMetricFamily("admission_inflight", "Admitted tool calls currently running", value=stats["inflight"])
+            yield GaugeMetricFamily("admission_queued", "Tool calls waiting for a slot", value=stats["queued"])
+        if self.query_jobs is not None:
+            stats = self.query_jobs.stats()
+            yield CounterMetricFamily("query_jobs_submitted", "Asynchronous query jobs submitted", value=stats["submitted"])
+            yield CounterMetricFamily("query_jobs_completed", "Asynchronous query jobs completed", value=stats["completed"])
+            yield CounterMetricFamily("query_jobs_failed", "Asynchronous query jobs that failed or timed out", value=stats["failed"])
+            yield GaugeMetricFamily("query_jobs_running", "Asynchronous query jobs still running", value=stats["running"])
+
+    def register(self, registry=REGISTRY) -> "StatsCollector":
+        registry.register(self)
+        return self
+
+
+def render_metrics(registry=REGISTRY) -> bytes:
+    return generate_latest(registry)
+
+
+def _rpc_labels(message: Any, known_tools: Iterable[str]) -> Dict[str, str]:
+    if isinstance(message, list):
+        return {"method": "batch", "tool": ""}
+    if not isinstance(message, dict):
+        return {"method": "invalid", "tool": ""}
+    method = message.get("method")
+    method = method if method in MCP_METHODS else "other"
+    tool = ""
+    if method == "tools/call":
+        params = message.get("params")
+        name = params.get("name") if isinstance(params, dict) else None
+        tool = name if name in known_tools else "other"
+    return {"method": method, "tool": tool}
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-method and per-tool MCP latency.
+
+    Only single JSON-RPC POSTs to `path` are labelled; install it inside
+    JSONRPCBatchMiddleware so every batch element is measured on its own.
+    Tool names outside `known_tools` are reported as "other".
+    """
+
+    def __init__(self, app, path: str = "/mcp", known_tools: Iterable[str] = ()):
+        self.app = app
+        self.path = path.rstrip("/")
+        self.known_tools = known_tools
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") != self.path
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        try:
+            labels = _rpc_labels(json.loads(body), self.known_tools)
+        except ValueError:
+            labels = {"method": "invalid", "tool": ""}
+
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = 500
+        tool_error = False
+
+        async def send_wrapper(message):
+            nonlocal status, tool_error
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and labels["tool"]:
+                chunk = message.get("body", b"")
+                if b'"isError":true' in chunk or b'"isError": true' in chunk:
+                    tool_error = True
+            await send(message)
+
+        MCP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, replay, send_wrapper)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            MCP_IN_FLIGHT.dec()
+            MCP_LATENCY.labels(labels["method"], labels["tool"]).observe(time.perf_counter() - start)
+            outcome = "error" if status >= 400 else "tool_error" if tool_error else "ok"
+            MCP_REQUESTS.labels(labels["method"], labels["tool"], outcome).inc()
+
@@ -0,0 +1,91 @@
+"""
+Guardrails for the Looker query tools
+Clamps row and pivot-column limits before a query runs and cancels queries
+(client side and on Looker via running_queries) that overrun a deadline
+"""
+import asyncio
+import sys
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+
+class QueryGuard:
+    """
+    Limits applied to query/run_look before they reach Looker.
+
+    Looker has no query plan to inspect, so the cost bound is the result size:
+    `limit` is clamped to max_limit (unlimited, -1, becomes max_limit too) and
+    pivoted queries get a column_limit of max_pivot_columns. A query still
+    streaming after `timeout` seconds is abandoned and killed on Looker so it
+    stops holding a connection and warehouse slot (0 disables the timeout),
+    unless other callers are running the same query (see kill_query).
+    """
+
+    def __init__(self, max_limit: int = 5000, max_pivot_columns: int = 50, timeout: float = 300.0):
+        self.max_limit = max_limit
+        self.max_pivot_columns = max_pivot_columns
+        self.timeout = timeout
+        self.clamped = 0
+        self.timeouts = 0
+        self.cancelled = 0
+
+    def limit(self, limit: Optional[int]) -> int:
+        """The row limit to run with: at most max_limit, never unlimited."""
+        if self.max_limit <= 0:
+            return limit if limit is not None else -1
+        if limit is None or limit <= 0 or limit > self.max_limit:
+            if limit is not None:
+                self.clamped += 1
+            return self.max_limit
+        return limit
+
+    def check_query(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the limits to an inline query body (limit is a string in the Looker API)."""
+        body = dict(body)
+        limit = body.get("limit")
+        body["limit"] = str(self.limit(int(limit) if limit not in (None, "") else None))
+        if body.get("pivots") and self.max_pivot_columns > 0:
+            column_limit = body.get("column_limit")
+            if column_limit in (None, "") or not 0 < int(column_limit) <= self.max_pivot_columns:
+                body["column_limit"] = str(self.max_pivot_columns)
+        return body
+
+    async def bounded(
+        self, chunks: AsyncIterator[bytes], cancel: Callable[[], Awaitable[Any]]
+    ) -> AsyncIterator[bytes]:
+        """
+        Pass `chunks` through until the deadline; past it, close the stream,
+        await cancel() to stop the query on Looker, and raise TimeoutError.
+        """
+        if self.timeout <= 0:
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        iterator = chunks.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), max(0.0, deadline - loop.time()))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                await iterator.aclose()
+                try:
+                    if await cancel():
+                        self.cancelled += 1
+                except Exception as e:
+                    print(f"⚠️  Could not cancel timed-out Looker query: {e}", file=sys.stderr)
+                raise TimeoutError(f"Looker query cancelled after {self.timeout:g}s (QUERY_TIMEOUT)") from None
+            yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_limit": self.max_limit,
+            "max_pivot_columns": self.max_pivot_columns,
+            "timeout": self.timeout,
+            "clamped": self.clamped,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+        }
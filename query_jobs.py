@@ -0,0 +1,289 @@
+"""
+Asynchronous Looker query jobs
+A submitted query runs as a Looker async query task that is polled in the
+background; finished results are spooled for paging, so a slow query holds
+neither an open MCP request nor a tool call slot while it runs
+"""
+import asyncio
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from result_pages import ResultStore, iter_json_array
+
+# Looker query task states that will not change any more
+LOOKER_FAILED = ("error", "failure", "killed", "expired")
+
+
+class QueryJobsFull(RuntimeError):
+    """Every slot in the job table holds a job that is still running."""
+
+
+class QueryJob:
+    """One submitted query: its Looker task, state and (once done) spooled result."""
+
+    def __init__(self, query_id: Optional[str] = None, model: Optional[str] = None):
+        self.job_id = uuid.uuid4().hex
+        self.query_id = query_id
+        self.model = model
+        self.task_id: Optional[str] = None
+        # queued -> running -> fetching -> complete | error | cancelled
+        self.status = "queued"
+        self.looker_status: Optional[str] = None
+        self.result_id: Optional[str] = None
+        self.error: Optional[str] = None
+        self.cached = False
+        self.polls = 0
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("complete", "error", "cancelled")
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "looker_status": self.looker_status,
+            "query_id": self.query_id,
+            "query_task_id": self.task_id,
+            "model": self.model,
+            "result_id": self.result_id,
+            "cached": self.cached,
+            "error": self.error,
+            "polls": self.polls,
+            "created_at": self.created_at,
+            "elapsed_seconds": round(end - self.created_at, 3),
+        }
+
+
+class QueryJobs:
+    """
+    Bounded table of query jobs.
+
+    submit() saves the query and creates a Looker query task, then returns;
+    a background task polls the task (every `poll_interval` seconds, backing
+    off to `max_poll_interval`) and, once Looker reports it complete, streams
+    the results into the ResultStore. Jobs still running after `timeout`
+    seconds are killed on Looker. Finished jobs are forgotten `ttl` seconds
+    after they finish, or earlier when the table is full. A job's spooled
+    result is pinned in the ResultStore until then, so fetch_results works
+    for as long as job_status reports the job.
+
+    With a shared `store`, job state is published there so any worker
+    process can answer status and fetch calls; polling stays with the
+    worker that accepted the job.
+    """
+
+    PREFIX = "query_job:"
+
+    def __init__(
+        self,
+        looker,
+        result_store: ResultStore,
+        max_jobs: int = 100,
+        ttl: float = 3600.0,
+        timeout: float = 1800.0,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 10.0,
+        store=None,
+    ):
+        self.looker = looker
+        self.result_store = result_store
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.store = store
+        self._jobs: "OrderedDict[str, QueryJob]" = OrderedDict()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+
+    def _publish(self, job: QueryJob) -> None:
+        if self.store is not None:
+            self.store.set(self.PREFIX + job.job_id, job.to_dict(), ttl=self.ttl + self.timeout)
+
+    def _expire(self) -> None:
+        now = time.time()
+        for job_id in [jid for jid, job in self._jobs.items() if job.done and now - job.finished_at > self.ttl]:
+            self._forget(job_id)
+        if len(self._jobs) < self.max_jobs:
+            return
+        finished = [jid for jid, job in self._jobs.items() if job.done]
+        for job_id in finished[: len(self._jobs) - self.max_jobs + 1]:
+            self._forget(job_id)
+        if len(self._jobs) >= self.max_jobs:
+            raise QueryJobsFull(
+                f"{len(self._jobs)} query jobs are still running (QUERY_JOBS_MAX); "
+                "wait for one to finish or use the query tool"
+            )
+
+    def _forget(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id, None)
+        if job is not None and job.result_id:
+            self.result_store.unpin(job.result_id)
+        if self.store is not None:
+            self.store.delete(self.PREFIX + job_id)
+
+    def _add(self, job: QueryJob) -> QueryJob:
+        self._jobs[job.job_id] = job
+        self.submitted += 1
+        self._publish(job)
+        return job
+
+    def from_result(self, result_id: str, model: Optional[str] = None) -> QueryJob:
+        """A job that is already complete, e.g. for a result served from the cache."""
+        self._expire()
+        job = QueryJob(model=model)
+        job.result_id = result_id
+        self.result_store.pin(result_id)
+        job.cached = True
+        job.finish("complete")
+        self.completed += 1
+        return self._add(job)
+
+    async def submit(
+        self,
+        body: Dict[str, Any],
+        model: Optional[str] = None,
+        on_result: Optional[Callable[[str], None]] = None,
+    ) -> QueryJob:
+        """
+        Save `body`, start it as a Looker query task and poll it in the
+        background. Errors in the query itself (unknown fields, bad filters)
+        are raised here rather than reported later. `on_result(result_id)` is
+        called once the results are being spooled, e.g. to cache them.
+        """
+        self._expire()
+        query = await self.looker.create_query(body)
+        job = QueryJob(query_id=str(query["id"]), model=model)
+        task = await self.looker.create_query_task(job.query_id)
+        job.task_id = task["id"]
+        job.looker_status = task.get("status")
+        job.status = "running"
+        self._add(job)
+        job.task = asyncio.create_task(self._follow(job, on_result))
+        return job
+
+    async def _follow(self, job: QueryJob, on_result: Optional[Callable[[str], None]]) -> None:
+        delay = self.poll_interval
+        try:
+            while True:
+                await asyncio.sleep(delay)
+                task = await self.looker.get_query_task(job.task_id)
+                job.polls += 1
+                job.looker_status = task.get("status")
+                if job.looker_status == "complete":
+                    break
+                if job.looker_status in LOOKER_FAILED:
+                    raise RuntimeError(f"Looker query task {job.looker_status}")
+                if self.timeout > 0 and time.time() - job.created_at > self.timeout:
+                    self.timeouts += 1
+                    try:
+                        await self.looker.kill_query_task(job.task_id)
+                    except Exception as e:
+                        print(f"⚠️  Could not kill timed-out Looker query task: {e}", file=sys.stderr)
+                    raise TimeoutError(f"Looker query cancelled after {self.timeout:g}s (QUERY_JOB_TIMEOUT)")
+                self._publish(job)
+                delay = min(delay * 1.5, self.max_poll_interval)
+
+            job.status = "fetching"
+            result = self.result_store.start(iter_json_array(self.looker.stream_query_task_results(job.task_id)))
+            job.result_id = result.result_id
+            self.result_store.pin(result.result_id)
+            self._publish(job)
+            if on_result is not None:
+                on_result(result.result_id)
+            await asyncio.shield(result.task)
+            if result.error:
+                raise RuntimeError(result.error)
+            job.finish("complete")
+            self.completed += 1
+        except asyncio.CancelledError:
+            job.finish("cancelled", "server shutting down")
+            raise
+        except Exception as e:
+            job.finish("error", str(e))
+            self.failed += 1
+        finally:
+            self._publish(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's state from this worker's table or, failing that, the shared store."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.store is not None:
+            return self.store.get(self.PREFIX + job_id)
+        return None
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """Job state plus spooling progress of its result."""
+        state = self.get(job_id)
+        if state is None:
+            raise ValueError(f"Unknown or expired job {job_id!r}; submit the query again")
+        result = self.result_store.get(state["result_id"]) if state["result_id"] else None
+        state["rows_ready"] = result.rows_ready if result is not None else 0
+        state["result_complete"] = bool(result is not None and result.complete)
+        return state
+
+    async def fetch(
+        self,
+        job_id: str,
+        cursor: Optional[str] = None,
+        page_size: int = 500,
+        output_format: str = "rows",
+    ) -> Dict[str, Any]:
+        """
+        A page of a job's results. Before Looker has finished, returns the
+        job status with no data; afterwards pages are served from the spool
+        (cursors are interchangeable with fetch_page's).
+        """
+        if cursor:
+            return await self.result_store.page_from_cursor(cursor, page_size=page_size, output_format=output_format)
+        state = self.status(job_id)
+        if state["status"] == "error":
+            raise RuntimeError(f"Query job failed: {state['error']}")
+        if state["status"] == "cancelled":
+            raise RuntimeError("Query job was cancelled; submit the query again")
+        if not state["result_id"]:
+            return {"job": state, "data": None, "next_cursor": None}
+        result = self.result_store.get(state["result_id"])
+        if result is None:
+            raise ValueError("Result expired; submit the query again")
+        page = await self.result_store.page(result, page_size=page_size, output_format=output_format)
+        page["job"] = state
+        return page
+
+    async def stop(self) -> None:
+        """Stop following running jobs (their Looker tasks keep their own lifetime)."""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": len(self._jobs),
+            "running": sum(1 for job in self._jobs.values() if not job.done),
+            "max_jobs": self.max_jobs,
+            "ttl_seconds": self.ttl,
+            "timeout": self.timeout,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+        }
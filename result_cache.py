@@ -0,0 +1,148 @@
+"""
+In-memory result cache for Looker query tools
+Maps a canonical query to the result_id of its spooled result; entries expire
+after a TTL and are evicted least-recently-used past a maximum entry count
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def canonical_query_key(
+    model: str,
+    view: str,
+    fields: List[str],
+    filters: Optional[Dict[str, str]] = None,
+    limit: Optional[int] = None,
+    **extra: Any,
+) -> str:
+    """
+    Build a stable cache key for a Looker query.
+
+    Filter order does not change the result set, so it is normalized. Field
+    order sets the column order of the result and is kept as given, as is
+    anything in `extra` (sorts, pivots, timezone).
+    """
+    canonical = {
+        "model": model,
+        "view": view,
+        "fields": list(fields),
+        "filters": {key: str(value) for key, value in sorted((filters or {}).items())},
+        "limit": None if limit is None else int(limit),
+    }
+    canonical.update({key: value for key, value in extra.items() if value})
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    TTL + size-bounded LRU cache of tool results.
+
+    Values are small (a result_id into the ResultStore), so the cache is
+    bounded by entry count; the rows themselves are held by the spool, whose
+    TTL and max_results bound memory and disk.
+
+    Every entry is tagged with the LookML model it came from so all results
+    for a model can be dropped when its data changes.
+
+    With a shared `store` (see shared_store.py) entries live there instead,
+    so every worker process sees the others' results; expiry is by TTL only.
+    """
+
+    PREFIX = "result_cache:"
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024, enabled: bool = True, store=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.store = store
+        # key -> (expires_at, model, value)
+        self._entries: "OrderedDict[str, Tuple[float, Optional[str], Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value) for a key, counting the hit or miss."""
+        if not self.enabled:
+            return False, None
+        if self.store is not None:
+            value = self.store.get(self.PREFIX + key)
+            if value is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            return True, value
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        expires_at, _, value = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def set(self, key: str, value: Any, model: Optional[str] = None, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries past max_entries."""
+        if not self.enabled:
+            return
+        if self.store is not None:
+            self.store.set(self.PREFIX + key, value, ttl=self.ttl if ttl is None else ttl, tag=model)
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, model, value)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate_model(self, model: str) -> int:
+        """Drop every cached result produced by a model; returns the count."""
+        if self.store is not None:
+            count = self.store.delete_prefix(self.PREFIX, tag=model)
+            self.invalidations += count
+            return count
+        keys = [key for key, entry in self._entries.items() if entry[1] == model]
+        for key in keys:
+            self._remove(key)
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self) -> int:
+        """Drop every cached result; returns the count."""
+        if self.store is not None:
+            count = self.store.delete_prefix(self.PREFIX)
+            self.invalidations += count
+            return count
+        count = len(self._entries)
+        self._entries.clear()
+        self.invalidations += count
+        return count
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the /config route."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": self.store.count(self.PREFIX) if self.store is not None else len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,410 @@
+"""
+Disk-spooled, cursor-paginated query results
+Rows are streamed from Looker straight into a temporary NDJSON file, so server
+memory stays flat no matter how large a result is; agents read it back one
+page at a time
+"""
+import asyncio
+import base64
+import codecs
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import arrow_format
+from fast_json import dumps_bytes, loads, to_columns
+
+OUTPUT_FORMATS = ("rows", "columns", "csv") + arrow_format.ARROW_FORMATS
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Incrementally decode a top-level JSON array, yielding one element at a time.
+
+    Only the element currently being read is held in memory, which is what lets
+    a 500k-row Looker response be spooled without buffering the whole body.
+    """
+    decoder = json.JSONDecoder()
+    # Multi-byte characters may be split across network chunks
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    async for chunk in chunks:
+        buffer += text_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        position = 0
+        while True:
+            # Skip whitespace and separators between elements
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                element, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Element continues in the next chunk
+                break
+            yield element
+        buffer = buffer[position:]
+
+
+def encode_page(rows: List[Dict[str, Any]], fields: List[str], output_format: str) -> Any:
+    """
+    Encode a page of rows as row objects, column arrays, CSV text, or a
+    base64 Arrow IPC stream / Parquet file (needs pyarrow).
+    """
+    if output_format == "rows":
+        return rows
+    if output_format == "columns":
+        return to_columns(rows, fields)
+    if output_format == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([row.get(field) for field in fields])
+        return out.getvalue()
+    if output_format in arrow_format.ARROW_FORMATS:
+        return arrow_format.encode(to_columns(rows, fields), output_format)
+    raise ValueError(f"Unknown output_format {output_format!r}; expected one of {', '.join(OUTPUT_FORMATS)}")
+
+
+def encode_cursor(result_id: str, offset: int, row_index: int) -> str:
+    raw = json.dumps([result_id, offset, row_index], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int, int]:
+    try:
+        result_id, offset, row_index = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return result_id, int(offset), int(row_index)
+    except Exception:
+        raise ValueError("Invalid or corrupted cursor")
+
+
+def read_ndjson(path: str, offset: int, limit: int, page_size: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Up to `page_size` complete lines from byte `offset` to `limit`; returns (rows, next_offset)."""
+    rows: List[Dict[str, Any]] = []
+    with open(path, "rb") as reader:
+        reader.seek(offset)
+        while len(rows) < page_size and offset < limit:
+            line = reader.readline()
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            rows.append(loads(line))
+    return rows, offset
+
+
+class SpooledResult:
+    """
+    One result set being written to (and read from) a temporary file.
+
+    A background task appends rows while readers page through what has been
+    written so far; `changed` wakes readers waiting for more rows.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.result_id = uuid.uuid4().hex
+        fd, self.path = tempfile.mkstemp(prefix="mcp-result-", suffix=".ndjson", dir=directory)
+        self._writer = os.fdopen(fd, "wb")
+        self.fields: List[str] = []
+        self.rows_written = 0
+        self.bytes_written = 0
+        # Rows/bytes visible to readers (written and flushed)
+        self.rows_ready = 0
+        self.bytes_ready = 0
+        self.complete = False
+        self.error: Optional[str] = None
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def append(self, row: Dict[str, Any]) -> None:
+        if not self.fields:
+            self.fields = list(row.keys())
+        line = dumps_bytes(row) + b"\n"
+        self._writer.write(line)
+        self.rows_written += 1
+        self.bytes_written += len(line)
+
+    def flush(self) -> None:
+        self._writer.flush()
+        self.rows_ready = self.rows_written
+        self.bytes_ready = self.bytes_written
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def finish(self, error: Optional[str] = None) -> None:
+        self.error = error
+        self.complete = True
+        self._writer.close()
+        self.rows_ready = self.rows_written
+        self.bytes_ready = self.bytes_written
+        self.changed.set()
+
+    async def wait_for_rows(self, row_index: int) -> None:
+        """Block until rows past `row_index` exist or the spool is done."""
+        while not self.complete and self.rows_ready <= row_index:
+            await self.changed.wait()
+
+    def read_page(self, offset: int, page_size: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Read up to `page_size` rows starting at byte `offset`; returns (rows, next_offset)."""
+        self.last_access = time.monotonic()
+        return read_ndjson(self.path, offset, self.bytes_ready, page_size)
+
+    def discard(self) -> None:
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        if not self._writer.closed:
+            self._writer.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class SharedResult:
+    """
+    Read-only view of a result another worker process is spooling, followed
+    through the shared store: the spool file is read directly and progress
+    is polled from the metadata the owner publishes.
+    """
+
+    def __init__(self, result_id: str, meta: Dict[str, Any], store, poll_interval: float = 0.05):
+        self.result_id = result_id
+        self.store = store
+        self.poll_interval = poll_interval
+        self._apply(meta)
+
+    def _apply(self, meta: Dict[str, Any]) -> None:
+        self.path = meta["path"]
+        self.fields = meta["fields"]
+        self.rows_ready = self.rows_written = meta["rows_ready"]
+        self.bytes_ready = meta["bytes_ready"]
+        self.complete = meta["complete"]
+        self.error = meta["error"]
+
+    async def wait_for_rows(self, row_index: int) -> None:
+        while not self.complete and self.rows_ready <= row_index:
+            await asyncio.sleep(self.poll_interval)
+            meta = self.store.get(ResultStore.PREFIX + self.result_id)
+            if meta is None:
+                raise ValueError("Result expired; re-run the query")
+            self._apply(meta)
+
+    def read_page(self, offset: int, page_size: int) -> Tuple[List[Dict[str, Any]], int]:
+        # Tells the owning worker the result is still in use
+        self.store.set(ResultStore.ACCESS_PREFIX + self.result_id, time.time(), ttl=86400)
+        return read_ndjson(self.path, offset, self.bytes_ready, page_size)
+
+
+class ResultStore:
+    """
+    Bounded table of spooled results; the oldest ones and the ones idle for
+    longer than `ttl` are deleted along with their files. Pinned results
+    (see pin()) are exempt from both until they are unpinned.
+
+    With a shared `store` (see shared_store.py), spool progress is published
+    there so other worker processes on the host can page through results
+    this one owns (cursors work whichever worker receives them).
+    """
+
+    PREFIX = "result:"
+    ACCESS_PREFIX = "result_access:"
+
+    def __init__(
+        self,
+        ttl: float = 900.0,
+        max_results: int = 64,
+        chunk_rows: int = 1000,
+        directory: Optional[str] = None,
+        store=None,
+    ):
+        self.ttl = ttl
+        self.max_results = max_results
+        self.chunk_rows = chunk_rows
+        self.directory = directory
+        self.store = store
+        self._results: "OrderedDict[str, SpooledResult]" = OrderedDict()
+        # result_id -> number of holders (e.g. query jobs) keeping it
+        self._pins: Dict[str, int] = {}
+
+    def _idle(self, result: SpooledResult, now: float) -> float:
+        idle = now - result.last_access
+        if idle > self.ttl and self.store is not None:
+            accessed = self.store.get(self.ACCESS_PREFIX + result.result_id)
+            if accessed is not None:
+                idle = min(idle, time.time() - accessed)
+        return idle
+
+    def _discard(self, result: SpooledResult) -> None:
+        result.discard()
+        if self.store is not None:
+            self.store.delete(self.PREFIX + result.result_id)
+            self.store.delete(self.ACCESS_PREFIX + result.result_id)
+
+    def _publish(self, result: SpooledResult) -> None:
+        if self.store is None:
+            return
+        meta = {
+            "path": result.path,
+            "fields": result.fields,
+            "rows_ready": result.rows_ready,
+            "bytes_ready": result.bytes_ready,
+            "complete": result.complete,
+            "error": result.error,
+        }
+        self.store.set(self.PREFIX + result.result_id, meta, ttl=None if result.result_id in self._pins else self.ttl)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for result_id in [
+            rid for rid, r in self._results.items() if rid not in self._pins and self._idle(r, now) > self.ttl
+        ]:
+            self._discard(self._results.pop(result_id))
+        # Make room for one more, oldest first; pinned results count towards
+        # max_results but stay
+        excess = len(self._results) - self.max_results + 1
+        if excess > 0:
+            unpinned = [rid for rid in self._results if rid not in self._pins]
+            for result_id in unpinned[:excess]:
+                self._discard(self._results.pop(result_id))
+
+    def pin(self, result_id: str) -> None:
+        """
+        Keep a local result past `ttl` and `max_results` until every pin()
+        is matched by an unpin(), e.g. while a query job points at it.
+        Results owned by another worker process stay under that worker's limits.
+        """
+        self._pins[result_id] = self._pins.get(result_id, 0) + 1
+        result = self._results.get(result_id)
+        if result is not None:
+            self._publish(result)
+
+    def unpin(self, result_id: str) -> None:
+        """Release a pin; the result then idles out from now like any other."""
+        count = self._pins.pop(result_id, 0) - 1
+        if count > 0:
+            self._pins[result_id] = count
+            return
+        result = self._results.get(result_id)
+        if result is not None:
+            result.last_access = time.monotonic()
+            self._publish(result)
+
+    def get(self, result_id: str):
+        """The local SpooledResult, a SharedResult owned by another worker, or None."""
+        result = self._results.get(result_id)
+        if result is not None:
+            self._results.move_to_end(result_id)
+            result.last_access = time.monotonic()
+            return result
+        if self.store is not None:
+            meta = self.store.get(self.PREFIX + result_id)
+            # The file is gone if the owning worker exited without cleaning up
+            if meta is not None and os.path.exists(meta["path"]):
+                return SharedResult(result_id, meta, self.store)
+        return None
+
+    def start(self, rows: AsyncIterator[Dict[str, Any]], progress=None) -> SpooledResult:
+        """
+        Spool an async row iterator in a background task.
+
+        `progress`, if given, is awaited as progress(rows_written) after each
+        chunk, e.g. to forward MCP progress notifications while the caller waits.
+        """
+        self._expire()
+        result = SpooledResult(self.directory)
+        self._results[result.result_id] = result
+
+        async def spool() -> None:
+            try:
+                async for row in rows:
+                    result.append(row)
+                    if result.rows_written % self.chunk_rows == 0:
+                        result.flush()
+                        self._publish(result)
+                        if progress is not None:
+                            await progress(result.rows_written)
+                result.flush()
+                result.finish()
+            except asyncio.CancelledError:
+                result.finish(error="cancelled")
+                raise
+            except Exception as e:
+                result.finish(error=str(e))
+            finally:
+                self._publish(result)
+
+        self._publish(result)
+        result.task = asyncio.create_task(spool())
+        return result
+
+    async def page(
+        self,
+        result: SpooledResult,
+        offset: int = 0,
+        row_index: int = 0,
+        page_size: int = 500,
+        output_format: str = "rows",
+    ) -> Dict[str, Any]:
+        """Wait for and encode one page, with a cursor for the next one."""
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output_format {output_format!r}; expected one of {', '.join(OUTPUT_FORMATS)}")
+        await result.wait_for_rows(row_index + page_size - 1)
+        rows, next_offset = result.read_page(offset, page_size)
+        next_index = row_index + len(rows)
+        has_more = not result.complete or next_index < result.rows_written
+        # A spool that stopped early (timeout, upstream error) is a failed
+        # query, not a short result: the page that reaches its end raises
+        if result.error and not has_more:
+            raise RuntimeError(f"Query failed after {result.rows_written} rows: {result.error}")
+        return {
+            "format": output_format,
+            "fields": result.fields,
+            "data": encode_page(rows, result.fields, output_format),
+            "row_offset": row_index,
+            "row_count": len(rows),
+            "total_rows": result.rows_written if result.complete and not result.error else None,
+            "complete": result.complete and not result.error,
+            "error": result.error,
+            "next_cursor": encode_cursor(result.result_id, next_offset, next_index) if has_more else None,
+        }
+
+    async def page_from_cursor(
+        self, cursor: str, page_size: int = 500, output_format: str = "rows"
+    ) -> Dict[str, Any]:
+        result_id, offset, row_index = decode_cursor(cursor)
+        result = self.get(result_id)
+        if result is None:
+            raise ValueError("Result expired; re-run the query")
+        return await self.page(result, offset, row_index, page_size, output_format)
+
+    def close(self) -> None:
+        while self._results:
+            _, result = self._results.popitem()
+            self._discard(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "results": len(self._results),
+            "pinned": sum(1 for rid in self._results if rid in self._pins),
+            "spooling": sum(1 for r in self._results.values() if not r.complete),
+            "rows": sum(r.rows_written for r in self._results.values()),
+            "bytes": sum(r.bytes_written for r in self._results.values()),
+        }
@@ -1,22 +1,68 @@
 """
 FastMCP-based Looker MCP Server
-Uses Google GenAI Toolbox prebuilt Looker configuration
+Serves Looker tools natively through a shared, pooled async Looker API client
 """
 import os
 import sys
-from fastmcp import FastMCP
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+import fastmcp
+from fastmcp import Context, FastMCP
 from starlette.requests import Request
-from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 from dotenv import load_dotenv
 
+from admission import Admission, AdmissionMiddleware, FairLimiter
+from dashboards import plan_tiles, run_tiles
+from fast_json import tool_serializer
+from health import HealthMonitor
+from jsonrpc_batch import JSONRPCBatchMiddleware
+from lifecycle import Lifecycle
+from looker_client import LookerClient
+from metadata_index import LookMLIndex
+from metrics import (
+    CONTENT_TYPE_LATEST, MetricsMiddleware, StatsCollector, instrument_tool,
+    observe_looker_request, render_metrics,
+)
+from query_guard import QueryGuard
+from query_jobs import QueryJobs
+from result_cache import ResultCache, canonical_query_key
+from result_pages import ResultStore, iter_json_array
+from shared_store import open_store
+from singleflight import SingleFlight
+from startup import worker_count
+from toolbox_pool import ToolboxPool, unwrap_result
+
 # Load environment variables from .env file if present
 load_dotenv()
 
+# Uvicorn worker processes ("auto" = one per available CPU). With more than
+# one, the access token, result cache, spooled-result index and LookML index
+# are shared through SHARED_STORE ("memory" or "sqlite:///path/to/file.db";
+# the default for several workers is a SQLite file on /dev/shm)
+WORKERS = worker_count(os.getenv("WORKERS", "1"))
+SHARED_STORE = os.getenv("SHARED_STORE") or (
+    "memory" if WORKERS == 1
+    else f"sqlite://{'/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()}/looker-mcp-store.db"
+)
+
+shared_store = open_store(SHARED_STORE)
+# Components only go through the store when it is visible to other processes
+_store = shared_store if shared_store.shared else None
+
+# MCP sessions live in one process, and a load-balanced worker may not hold
+# the client's session, so several workers serve the MCP endpoint statelessly
+MCP_STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "true" if WORKERS > 1 else "false").lower() not in ("false", "0", "no")
+fastmcp.settings.stateless_http = MCP_STATELESS_HTTP
+
 # Initialize FastMCP server
 mcp = FastMCP(
     name="Looker MCP Server",
     version="1.0.0",
-    description="FastMCP server providing Looker data access via Google GenAI Toolbox"
+    description="FastMCP server providing native Looker data access tools",
+    # Compact JSON (orjson when installed) for tool results
+    tool_serializer=tool_serializer,
 )
 
 # Get Looker configuration from environment variables
@@ -28,12 +74,194 @@ LOOKER_CONFIG = {
     "LOOKER_API_VERSION": os.getenv("LOOKER_API_VERSION", "4.0"),
 }
 
+# Looker HTTP connection pool and token refresh settings
+LOOKER_MAX_CONNECTIONS = int(os.getenv("LOOKER_MAX_CONNECTIONS", "20"))
+LOOKER_TIMEOUT = float(os.getenv("LOOKER_TIMEOUT", "120"))
+LOOKER_TOKEN_REFRESH_MARGIN = float(os.getenv("LOOKER_TOKEN_REFRESH_MARGIN", "60"))
+
+# One shared client for every tool call; connections and the access token are reused
+looker = LookerClient.from_config(
+    LOOKER_CONFIG,
+    timeout=LOOKER_TIMEOUT,
+    max_connections=LOOKER_MAX_CONNECTIONS,
+    token_refresh_margin=LOOKER_TOKEN_REFRESH_MARGIN,
+    observer=observe_looker_request,
+    token_store=_store,
+)
+
+# Result cache for query/run_look, mapping a canonical query to its spooled
+# result; TTL in seconds. Entries are only result ids, so the cache is capped
+# by count and the spool's own TTL and RESULT_SPOOL_MAX_RESULTS bound the rows
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() not in ("false", "0", "no")
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+
+result_cache = ResultCache(
+    ttl=RESULT_CACHE_TTL,
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    enabled=RESULT_CACHE_ENABLED,
+    store=_store,
+)
+
+# Spooled, paginated results; idle results expire after RESULT_SPOOL_TTL seconds
+RESULT_SPOOL_TTL = float(os.getenv("RESULT_SPOOL_TTL", "900"))
+RESULT_SPOOL_MAX_RESULTS = int(os.getenv("RESULT_SPOOL_MAX_RESULTS", "64"))
+RESULT_SPOOL_DIR = os.getenv("RESULT_SPOOL_DIR") or None
+RESULT_PAGE_MAX_ROWS = int(os.getenv("RESULT_PAGE_MAX_ROWS", "5000"))
+
+result_store = ResultStore(
+    ttl=RESULT_SPOOL_TTL,
+    max_results=RESULT_SPOOL_MAX_RESULTS,
+    directory=RESULT_SPOOL_DIR,
+    store=_store,
+)
+
+# LookML metadata index; refresh interval in seconds, batch = explores re-fetched per cycle
+METADATA_REFRESH_INTERVAL = float(os.getenv("METADATA_REFRESH_INTERVAL", "300"))
+METADATA_REFRESH_BATCH = int(os.getenv("METADATA_REFRESH_BATCH", "25"))
+METADATA_INDEX_CONCURRENCY = int(os.getenv("METADATA_INDEX_CONCURRENCY", "8"))
+
+metadata_index = LookMLIndex(
+    looker,
+    refresh_interval=METADATA_REFRESH_INTERVAL,
+    batch_size=METADATA_REFRESH_BATCH,
+    concurrency=METADATA_INDEX_CONCURRENCY,
+    store=_store,
+)
+
+# Concurrent identical read-only tool calls share one upstream execution
+# (independent of the result cache)
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() not in ("false", "0", "no")
+
+single_flight = SingleFlight(enabled=SINGLE_FLIGHT_ENABLED)
+
+# Guardrails for query/run_look: row limit cap, pivot column cap, and seconds
+# before a running query is cancelled on Looker (0 disables each)
+QUERY_MAX_LIMIT = int(os.getenv("QUERY_MAX_LIMIT", "5000"))
+QUERY_MAX_PIVOT_COLUMNS = int(os.getenv("QUERY_MAX_PIVOT_COLUMNS", "50"))
+QUERY_TIMEOUT = float(os.getenv("QUERY_TIMEOUT", "300"))
+
+query_guard = QueryGuard(
+    max_limit=QUERY_MAX_LIMIT,
+    max_pivot_columns=QUERY_MAX_PIVOT_COLUMNS,
+    timeout=QUERY_TIMEOUT,
+)
+
+# Asynchronous query jobs (submit_query / job_status / fetch_results): at most
+# QUERY_JOBS_MAX jobs are tracked, finished ones (and their spooled results,
+# kept past RESULT_SPOOL_TTL until then) are forgotten after QUERY_JOB_TTL
+# seconds, and a job still running on Looker after QUERY_JOB_TIMEOUT seconds
+# is killed (0 = no limit). Looker is polled every QUERY_JOB_POLL_INTERVAL
+# seconds, backing off to QUERY_JOB_MAX_POLL_INTERVAL
+QUERY_JOBS_MAX = int(os.getenv("QUERY_JOBS_MAX", "100"))
+QUERY_JOB_TTL = float(os.getenv("QUERY_JOB_TTL", "3600"))
+QUERY_JOB_TIMEOUT = float(os.getenv("QUERY_JOB_TIMEOUT", "1800"))
+QUERY_JOB_POLL_INTERVAL = float(os.getenv("QUERY_JOB_POLL_INTERVAL", "1"))
+QUERY_JOB_MAX_POLL_INTERVAL = float(os.getenv("QUERY_JOB_MAX_POLL_INTERVAL", "10"))
+
+query_jobs = QueryJobs(
+    looker,
+    result_store,
+    max_jobs=QUERY_JOBS_MAX,
+    ttl=QUERY_JOB_TTL,
+    timeout=QUERY_JOB_TIMEOUT,
+    poll_interval=QUERY_JOB_POLL_INTERVAL,
+    max_poll_interval=QUERY_JOB_MAX_POLL_INTERVAL,
+    store=_store,
+)
+
+# Distinct tile queries run_dashboard executes at once per call
+DASHBOARD_TILE_CONCURRENCY = int(os.getenv("DASHBOARD_TILE_CONCURRENCY", "6"))
+
+# JSON-RPC batch arrays accepted on the MCP endpoint (max requests per batch)
+MCP_PATH = os.getenv("MCP_PATH", "/mcp")
+MCP_BATCH_MAX = int(os.getenv("MCP_BATCH_MAX", "50"))
+
+# Admission control for tools/call: per-client token bucket (calls/second and
+# burst; clients keyed by bearer token hash, ADMISSION_CLIENT_HEADER or address),
+# in-flight caps, and a fair wait queue; overflow gets HTTP 429 + Retry-After.
+# Limits are for the whole server and are split evenly across WORKERS
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() not in ("false", "0", "no")
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "10"))
+ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", "20"))
+ADMISSION_CLIENT_HEADER = os.getenv("ADMISSION_CLIENT_HEADER", "x-client-id")
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", str(LOOKER_MAX_CONNECTIONS)))
+ADMISSION_CLIENT_MAX_INFLIGHT = int(os.getenv("ADMISSION_CLIENT_MAX_INFLIGHT", "8"))
+ADMISSION_QUEUE_MAX = int(os.getenv("ADMISSION_QUEUE_MAX", "256"))
+ADMISSION_CLIENT_QUEUE_MAX = int(os.getenv("ADMISSION_CLIENT_QUEUE_MAX", "16"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+
+admission = Admission(
+    FairLimiter(
+        max_inflight=max(1, ADMISSION_MAX_INFLIGHT // WORKERS),
+        client_max_inflight=max(1, ADMISSION_CLIENT_MAX_INFLIGHT // WORKERS),
+        max_queue=max(1, ADMISSION_QUEUE_MAX // WORKERS),
+        client_max_queue=max(1, ADMISSION_CLIENT_QUEUE_MAX // WORKERS),
+        queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    ),
+    rate=ADMISSION_RATE / WORKERS,
+    burst=max(1.0, ADMISSION_BURST / WORKERS),
+    client_header=ADMISSION_CLIENT_HEADER,
+    enabled=ADMISSION_ENABLED,
+)
+
+# Supervised GenAI Toolbox workers serving the tools not implemented natively.
+# Workers are replaced after TOOLBOX_MAX_REQUESTS calls or above
+# TOOLBOX_MAX_RSS_MB of memory (0 disables either limit); size 0 disables the pool
+TOOLBOX_POOL_SIZE = int(os.getenv("TOOLBOX_POOL_SIZE", "1"))
+TOOLBOX_COMMAND = os.getenv("TOOLBOX_COMMAND", "toolbox --prebuilt looker")
+TOOLBOX_MAX_REQUESTS = int(os.getenv("TOOLBOX_MAX_REQUESTS", "0"))
+TOOLBOX_MAX_RSS_MB = float(os.getenv("TOOLBOX_MAX_RSS_MB", "0"))
+TOOLBOX_STARTUP_TIMEOUT = float(os.getenv("TOOLBOX_STARTUP_TIMEOUT", "30"))
+
+toolbox = ToolboxPool(
+    size=TOOLBOX_POOL_SIZE,
+    command=TOOLBOX_COMMAND.split(),
+    max_requests=TOOLBOX_MAX_REQUESTS,
+    max_rss_mb=TOOLBOX_MAX_RSS_MB,
+    startup_timeout=TOOLBOX_STARTUP_TIMEOUT,
+    call_timeout=LOOKER_TIMEOUT,
+    observer=observe_looker_request,
+)
+
+# Cache, index, spool, token and toolbox counters exported on /metrics at scrape time
+StatsCollector(
+    result_cache=result_cache,
+    metadata_index=metadata_index,
+    result_store=result_store,
+    looker=looker,
+    toolbox=toolbox,
+    single_flight=single_flight,
+    query_guard=query_guard,
+    admission=admission,
+    query_jobs=query_jobs,
+).register()
+
+# Background services started from the ASGI lifespan (see create_app)
+lifecycle = Lifecycle()
+
+NATIVE_TOOLS = [
+    "get_models", "get_explores", "get_dimensions", "get_measures",
+    "get_filters", "get_parameters", "search_fields", "query", "run_look", "fetch_page",
+    "submit_query", "job_status", "fetch_results", "run_dashboard",
+]
+
+# Served by the toolbox worker pool
+TOOLBOX_TOOLS = [
+    "query_sql", "query_url", "get_looks", "make_look",
+    "get_dashboards", "make_dashboard", "add_dashboard_element",
+]
+
+def missing_credentials() -> List[str]:
+    """Return the names of required Looker settings that are not set."""
+    return [
+        key for key in ["LOOKER_BASE_URL", "LOOKER_CLIENT_ID", "LOOKER_CLIENT_SECRET"]
+        if not LOOKER_CONFIG[key]
+    ]
+
 def validate_credentials():
     """Validate that all required Looker credentials are provided."""
-    missing = []
-    for key in ["LOOKER_BASE_URL", "LOOKER_CLIENT_ID", "LOOKER_CLIENT_SECRET"]:
-        if not LOOKER_CONFIG[key]:
-            missing.append(key)
+    missing = missing_credentials()
     
     if missing:
         print(f"ERROR: Missing required environment variables: {', '.join(missing)}", file=sys.stderr)
@@ -44,41 +272,517 @@ def validate_credentials():
         return False
     return True
 
+def require_credentials() -> None:
+    """Fail a tool call early when the server has no Looker credentials."""
+    missing = missing_credentials()
+    if missing:
+        raise RuntimeError(f"Looker credentials not configured: {', '.join(missing)}")
+
+# Credentials come from the environment and cannot change while the server runs
+LOOKER_CONFIGURED = not missing_credentials()
+
+# Readiness is recomputed every HEALTH_CHECK_INTERVAL seconds in the background;
+# probes are answered from the cached result
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "30"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "5"))
+
+health = HealthMonitor(
+    interval=HEALTH_CHECK_INTERVAL,
+    timeout=HEALTH_CHECK_TIMEOUT,
+    info={
+        "toolbox": "Looker",
+        "version": "1.0.0",
+        "configured": LOOKER_CONFIGURED,
+        "message": f"Looker MCP Server - {len(NATIVE_TOOLS)} native tools available" if LOOKER_CONFIGURED else "Missing Looker credentials",
+    },
+)
+
+@health.check("credentials")
+async def check_credentials():
+    missing = missing_credentials()
+    return not missing, f"missing {', '.join(missing)}" if missing else "configured"
+
+@health.check("looker")
+async def check_looker():
+    if not LOOKER_CONFIGURED:
+        return False, "not configured"
+    status = await looker.ping()
+    return status < 500, f"HTTP {status}"
+
+@health.check("toolbox", critical=toolbox.enabled)
+async def check_toolbox():
+    if not toolbox.enabled:
+        return False, "disabled"
+    ready = len(toolbox.ready_workers())
+    return ready > 0, f"{ready}/{toolbox.size} workers ready" + (f" ({toolbox.last_error})" if not ready and toolbox.last_error else "")
+
+@health.check("metadata_index", critical=False)
+async def check_metadata_index():
+    stats = metadata_index.stats()
+    if stats["last_error"]:
+        return False, stats["last_error"]
+    return True, f"{stats['explores']} explores" if stats["ready"] else "building"
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def get_models() -> List[Dict[str, Any]]:
+    """List the LookML models available on the Looker instance."""
+    require_credentials()
+    return await metadata_index.get_models()
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def get_explores(model: str) -> List[Dict[str, Any]]:
+    """List the explores of a LookML model."""
+    require_credentials()
+    return await metadata_index.get_explores(model)
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def get_dimensions(model: str, explore: str) -> List[Dict[str, Any]]:
+    """List the dimensions of an explore."""
+    require_credentials()
+    return await metadata_index.get_fields(model, explore, "dimensions")
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def get_measures(model: str, explore: str) -> List[Dict[str, Any]]:
+    """List the measures of an explore."""
+    require_credentials()
+    return await metadata_index.get_fields(model, explore, "measures")
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def get_filters(model: str, explore: str) -> List[Dict[str, Any]]:
+    """List the filter-only fields of an explore."""
+    require_credentials()
+    return await metadata_index.get_fields(model, explore, "filters")
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def get_parameters(model: str, explore: str) -> List[Dict[str, Any]]:
+    """List the parameters of an explore."""
+    require_credentials()
+    return await metadata_index.get_fields(model, explore, "parameters")
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def search_fields(
+    text: str,
+    model: Optional[str] = None,
+    explore: Optional[str] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Fuzzy search for dimensions, measures, filters and parameters by name,
+    label or description, optionally scoped to one model or explore.
+    """
+    require_credentials()
+    return metadata_index.search_fields(text, model=model, explore=explore, limit=limit)
+
+async def spool_and_page(
+    cache_key: str,
+    chunks,
+    model: Optional[str],
+    page_size: int,
+    output_format: str,
+    ctx: Optional[Context],
+) -> Dict[str, Any]:
+    """
+    Serve the first page of a result, spooling the rest to disk in the background.
+    Cached queries reuse the spool of an earlier identical run.
+    """
+    page_size = max(1, min(page_size, RESULT_PAGE_MAX_ROWS))
+    found, result_id = result_cache.get(cache_key)
+    result = result_store.get(result_id) if found else None
+    if result is None or result.error:
+        async def report_progress(rows: int) -> None:
+            if ctx is not None:
+                try:
+                    await ctx.report_progress(rows, None, f"{rows} rows received")
+                except Exception:
+                    pass
+
+        result = result_store.start(iter_json_array(chunks), progress=report_progress)
+        result_cache.set(cache_key, result.result_id, model=model)
+    return await result_store.page(result, page_size=page_size, output_format=output_format)
+
+def inline_query(
+    model: str,
+    explore: str,
+    fields: List[str],
+    filters: Optional[Dict[str, str]],
+    pivots: Optional[List[str]],
+    sorts: Optional[List[str]],
+    limit: int,
+    query_timezone: Optional[str],
+):
+    """Guarded Looker inline query body and its result cache key."""
+    body: Dict[str, Any] = {
+        "model": model,
+        "view": explore,
+        "fields": fields,
+        "filters": filters or {},
+        "pivots": pivots or [],
+        "sorts": sorts or [],
+        "limit": str(limit),
+    }
+    if query_timezone:
+        body["query_timezone"] = query_timezone
+    body = query_guard.check_query(body)
+
+    cache_key = canonical_query_key(
+        model, explore, fields, filters, int(body["limit"]),
+        pivots=pivots, sorts=sorts, query_timezone=query_timezone,
+        column_limit=body.get("column_limit"),
+    )
+    return body, cache_key
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def query(
+    model: str,
+    explore: str,
+    fields: List[str],
+    filters: Optional[Dict[str, str]] = None,
+    pivots: Optional[List[str]] = None,
+    sorts: Optional[List[str]] = None,
+    limit: int = 500,
+    query_timezone: Optional[str] = None,
+    page_size: int = 500,
+    output_format: str = "rows",
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Run a Looker query against an explore and return the first page of rows.
+    output_format is "rows" (objects), "columns" (arrays per field), "csv", or
+    "arrow" / "parquet" (typed columns as a base64 Arrow IPC stream / Parquet
+    file, when the server has pyarrow).
+    Pass the returned next_cursor to fetch_page for the following pages.
+    limit is capped at the server's QUERY_MAX_LIMIT.
+    """
+    require_credentials()
+    body, cache_key = inline_query(model, explore, fields, filters, pivots, sorts, limit, query_timezone)
+
+    async def chunks():
+        # Saved first so a timed-out run can be found and killed by query id
+        query_id = (await looker.create_query(body))["id"]
+        async for chunk in query_guard.bounded(
+            looker.stream_query(query_id), cancel=lambda: looker.kill_query(query_id)
+        ):
+            yield chunk
+
+    return await spool_and_page(cache_key, chunks(), model, page_size, output_format, ctx)
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def run_look(
+    look_id: str,
+    limit: Optional[int] = None,
+    page_size: int = 500,
+    output_format: str = "rows",
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Run a saved Look and return the first page of rows.
+    Pass the returned next_cursor to fetch_page for the following pages.
+    limit defaults to the Look's own and is capped at QUERY_MAX_LIMIT.
+    """
+    require_credentials()
+    cache_key = f"look:{look_id}:{limit}"
+
+    async def chunks():
+        look = await looker.get_look(look_id)
+        saved_limit = (look.get("query") or {}).get("limit")
+        run_limit = query_guard.limit(
+            limit if limit is not None else int(saved_limit) if saved_limit not in (None, "") else None
+        )
+        async for chunk in query_guard.bounded(
+            looker.stream_look(look_id, limit=run_limit), cancel=lambda: looker.kill_query(look["query_id"])
+        ):
+            yield chunk
+
+    return await spool_and_page(cache_key, chunks(), None, page_size, output_format, ctx)
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def run_dashboard(
+    dashboard_id: str,
+    page_size: int = 100,
+    output_format: str = "rows",
+    stream_tiles: bool = True,
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Run every query tile of a dashboard concurrently and return the first page
+    of each tile, in dashboard order. Tiles that share a query run it once.
+    Each tile is also sent as a log notification (and progress update) as soon
+    as it finishes unless stream_tiles is false. Use fetch_page with a tile's
+    next_cursor for more rows. Tiles run with their saved filters and limits
+    (capped at QUERY_MAX_LIMIT).
+    """
+    require_credentials()
+    started = time.perf_counter()
+    dashboard = await looker.get_dashboard(dashboard_id)
+    groups, skipped = plan_tiles(dashboard)
+    total = sum(len(group["tiles"]) for group in groups.values())
+    finished = 0
+
+    async def run(query: Dict[str, Any]) -> Dict[str, Any]:
+        query_id = query["query_id"]
+        saved_limit = query.get("limit")
+        limit = query_guard.limit(int(saved_limit) if saved_limit not in (None, "") else None)
+
+        async def chunks():
+            async for chunk in query_guard.bounded(
+                looker.stream_query(query_id, limit=limit), cancel=lambda: looker.kill_query(query_id)
+            ):
+                yield chunk
+
+        return await spool_and_page(f"query_id:{query_id}:{limit}", chunks(), query.get("model"), page_size, output_format, None)
+
+    async def on_tile(tile: Dict[str, Any]) -> None:
+        nonlocal finished
+        finished += 1
+        if ctx is None:
+            return
+        try:
+            await ctx.report_progress(finished, total, f"tile {tile['title'] or tile['element_id']}: {tile['status']}")
+            if stream_tiles:
+                await ctx.info(f"tile {tile['element_id']} {tile['status']}", logger_name="run_dashboard", extra={"tile": tile})
+        except Exception:
+            pass
+
+    tiles = await run_tiles(groups, run, DASHBOARD_TILE_CONCURRENCY, on_tile)
+    order = {str(element.get("id")): index for index, element in enumerate(dashboard.get("dashboard_elements") or [])}
+    tiles.sort(key=lambda tile: order.get(tile["element_id"], len(order)))
+    return {
+        "dashboard_id": str(dashboard.get("id", dashboard_id)),
+        "title": dashboard.get("title"),
+        "tiles": tiles,
+        "tile_count": total,
+        "distinct_queries": len(groups),
+        "failed_tiles": sum(1 for tile in tiles if tile["status"] == "error"),
+        "skipped": skipped,
+        "seconds": round(time.perf_counter() - started, 3),
+        "slowest_tile_seconds": max((tile["seconds"] for tile in tiles), default=0.0),
+    }
+
+@mcp.tool()
+@instrument_tool
+async def fetch_page(cursor: str, page_size: int = 500, output_format: str = "rows") -> Dict[str, Any]:
+    """Fetch the next page of a query or run_look result using its next_cursor."""
+    page_size = max(1, min(page_size, RESULT_PAGE_MAX_ROWS))
+    return await result_store.page_from_cursor(cursor, page_size=page_size, output_format=output_format)
+
+@mcp.tool()
+@instrument_tool
+async def submit_query(
+    model: str,
+    explore: str,
+    fields: List[str],
+    filters: Optional[Dict[str, str]] = None,
+    pivots: Optional[List[str]] = None,
+    sorts: Optional[List[str]] = None,
+    limit: int = 500,
+    query_timezone: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Start a long-running Looker query in the background and return its job_id
+    immediately. Poll job_status until status is "complete", then read the rows
+    with fetch_results. Same arguments and limits as query.
+    """
+    require_credentials()
+    body, cache_key = inline_query(model, explore, fields, filters, pivots, sorts, limit, query_timezone)
+    found, result_id = result_cache.get(cache_key)
+    result = result_store.get(result_id) if found else None
+    if result is not None and not result.error:
+        job = query_jobs.from_result(result.result_id, model=model)
+    else:
+        job = await query_jobs.submit(
+            body, model=model, on_result=lambda result_id: result_cache.set(cache_key, result_id, model=model)
+        )
+    return job.to_dict()
+
+@mcp.tool()
+@instrument_tool
+async def job_status(job_id: str) -> Dict[str, Any]:
+    """
+    Status of a submit_query job: queued, running (on Looker), fetching (rows
+    arriving; fetch_results can already page), complete, error or cancelled,
+    with elapsed time and rows received so far.
+    """
+    return query_jobs.status(job_id)
+
+@mcp.tool()
+@instrument_tool
+async def fetch_results(
+    job_id: str,
+    cursor: Optional[str] = None,
+    page_size: int = 500,
+    output_format: str = "rows",
+) -> Dict[str, Any]:
+    """
+    Read a submit_query job's results one page at a time. Without a cursor
+    returns the first page (or just the job status while it is still running);
+    pass the returned next_cursor for the following pages.
+    """
+    page_size = max(1, min(page_size, RESULT_PAGE_MAX_ROWS))
+    return await query_jobs.fetch(job_id, cursor=cursor, page_size=page_size, output_format=output_format)
+
+async def call_toolbox(tool: str, **arguments: Any) -> Any:
+    """Run a toolbox tool on the worker pool; None arguments are omitted."""
+    require_credentials()
+    result = await toolbox.call_tool(tool, {k: v for k, v in arguments.items() if v is not None})
+    return unwrap_result(result)
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def query_sql(
+    model: str,
+    explore: str,
+    fields: List[str],
+    filters: Optional[Dict[str, str]] = None,
+    pivots: Optional[List[str]] = None,
+    sorts: Optional[List[str]] = None,
+    limit: int = 500,
+    query_timezone: Optional[str] = None,
+) -> Any:
+    """Return the SQL Looker generates for a query, without running it."""
+    return await call_toolbox(
+        "query_sql", model=model, explore=explore, fields=fields, filters=filters,
+        pivots=pivots, sorts=sorts, limit=limit, tz=query_timezone,
+    )
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def query_url(
+    model: str,
+    explore: str,
+    fields: List[str],
+    filters: Optional[Dict[str, str]] = None,
+    pivots: Optional[List[str]] = None,
+    sorts: Optional[List[str]] = None,
+    limit: int = 500,
+    query_timezone: Optional[str] = None,
+) -> Any:
+    """Return a Looker explore URL for a query."""
+    return await call_toolbox(
+        "query_url", model=model, explore=explore, fields=fields, filters=filters,
+        pivots=pivots, sorts=sorts, limit=limit, tz=query_timezone,
+    )
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def get_looks(
+    title: Optional[str] = None,
+    desc: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> Any:
+    """Search saved Looks by title or description."""
+    return await call_toolbox("get_looks", title=title, desc=desc, limit=limit, offset=offset)
+
+@mcp.tool()
+@instrument_tool
+async def make_look(
+    title: str,
+    model: str,
+    explore: str,
+    fields: List[str],
+    description: Optional[str] = None,
+    filters: Optional[Dict[str, str]] = None,
+    pivots: Optional[List[str]] = None,
+    sorts: Optional[List[str]] = None,
+    limit: int = 500,
+    query_timezone: Optional[str] = None,
+) -> Any:
+    """Save a query as a new Look."""
+    return await call_toolbox(
+        "make_look", title=title, description=description, model=model, explore=explore,
+        fields=fields, filters=filters, pivots=pivots, sorts=sorts, limit=limit, tz=query_timezone,
+    )
+
+@mcp.tool()
+@instrument_tool
+@single_flight.coalesce()
+async def get_dashboards(
+    title: Optional[str] = None,
+    desc: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> Any:
+    """Search dashboards by title or description."""
+    return await call_toolbox("get_dashboards", title=title, desc=desc, limit=limit, offset=offset)
+
+@mcp.tool()
+@instrument_tool
+async def make_dashboard(title: str, description: Optional[str] = None) -> Any:
+    """Create an empty dashboard."""
+    return await call_toolbox("make_dashboard", title=title, description=description)
+
+@mcp.tool()
+@instrument_tool
+async def add_dashboard_element(
+    dashboard_id: str,
+    title: str,
+    model: str,
+    explore: str,
+    fields: List[str],
+    filters: Optional[Dict[str, str]] = None,
+    pivots: Optional[List[str]] = None,
+    sorts: Optional[List[str]] = None,
+    limit: int = 500,
+    query_timezone: Optional[str] = None,
+) -> Any:
+    """Add a query tile to a dashboard."""
+    return await call_toolbox(
+        "add_dashboard_element", dashboard_id=dashboard_id, title=title, model=model,
+        explore=explore, fields=fields, filters=filters, pivots=pivots, sorts=sorts,
+        limit=limit, tz=query_timezone,
+    )
+
+def health_response(body: bytes, status_code: int = 200) -> Response:
+    return Response(body, status_code=status_code, media_type="application/json")
+
 @mcp.custom_route("/health", methods=["GET"])
-async def health_endpoint(request: Request) -> JSONResponse:
+async def health_endpoint(request: Request) -> Response:
     """
     Health check endpoint (short path) for Cloud Run and monitoring.
-    Returns HTTP 200 with server status.
+    Returns HTTP 200 with the last cached readiness result.
     """
-    is_configured = validate_credentials()
-    
-    health_status = {
-        "status": "ok" if is_configured else "error",
-        "toolbox": "Looker",
-        "version": "1.0.0",
-        "configured": is_configured,
-        "message": "Looker MCP Toolbox - 15 prebuilt tools available" if is_configured else "Missing Looker credentials"
-    }
-    
-    return JSONResponse(health_status)
+    return health_response(health.ready_body)
 
 @mcp.custom_route("/service/health", methods=["GET"])
-async def service_health_check(request: Request) -> JSONResponse:
+async def service_health_check(request: Request) -> Response:
     """
     Health check endpoint (service path) for monitoring and load balancing.
-    Returns HTTP 200 with server status.
+    Returns HTTP 200 with the last cached readiness result.
     """
-    is_configured = validate_credentials()
-    
-    health_status = {
-        "status": "ok" if is_configured else "error",
-        "toolbox": "Looker",
-        "version": "1.0.0",
-        "configured": is_configured,
-        "message": "Looker MCP Toolbox - 15 prebuilt tools available" if is_configured else "Missing Looker credentials"
-    }
-    
-    return JSONResponse(health_status)
+    return health_response(health.ready_body)
+
+@mcp.custom_route("/health/live", methods=["GET"])
+async def liveness(request: Request) -> Response:
+    """Liveness probe: the process is up and serving requests."""
+    return health_response(health.live_body)
+
+@mcp.custom_route("/health/ready", methods=["GET"])
+async def readiness(request: Request) -> Response:
+    """Readiness probe: HTTP 503 until credentials and Looker checks pass."""
+    return health_response(health.ready_body, 200 if health.ready else 503)
 
 @mcp.custom_route("/config", methods=["GET"])
 async def config_check(request: Request) -> JSONResponse:
@@ -92,29 +796,130 @@ async def config_check(request: Request) -> JSONResponse:
         "looker_client_secret": "***" if LOOKER_CONFIG["LOOKER_CLIENT_SECRET"] else "NOT_SET",
         "looker_verify_ssl": LOOKER_CONFIG["LOOKER_VERIFY_SSL"],
         "looker_api_version": LOOKER_CONFIG["LOOKER_API_VERSION"],
+        "result_cache": result_cache.stats(),
+        "metadata_index": metadata_index.stats(),
+        "result_spool": result_store.stats(),
+        "toolbox_pool": toolbox.stats(),
+        "single_flight": single_flight.stats(),
+        "query_guard": query_guard.stats(),
+        "query_jobs": query_jobs.stats(),
+        "admission": admission.stats(),
+        "workers": WORKERS,
+        "pid": os.getpid(),
+        "shared_store": shared_store.stats(),
     }
     return JSONResponse(config_status)
 
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> Response:
+    """
+    Prometheus metrics: MCP request counts, in-flight requests and latency per
+    method and tool, Looker API time, and cache/index/token counters.
+    """
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+@mcp.custom_route("/cache/invalidate", methods=["POST"])
+async def cache_invalidate(request: Request) -> JSONResponse:
+    """
+    Drop cached query results.
+    Pass ?model=<name> to invalidate a single LookML model (e.g. from an ETL
+    or datagroup trigger); without it the whole cache is cleared.
+    """
+    model = request.query_params.get("model")
+    if model:
+        removed = result_cache.invalidate_model(model)
+    else:
+        removed = result_cache.clear()
+    return JSONResponse({"model": model, "invalidated": removed})
+
 @mcp.custom_route("/", methods=["GET"])
 async def root(request: Request) -> PlainTextResponse:
     """Root endpoint with server information."""
-    is_configured = validate_credentials()
+    is_configured = LOOKER_CONFIGURED
     return PlainTextResponse(
         "Looker MCP Server\n"
         "================\n\n"
         "Endpoints:\n"
         "  GET /              - This information page\n"
-        "  GET /service/health - Health check endpoint\n"
-        "  GET /config        - Configuration status (masked)\n"
-        "  POST /mcp/         - MCP protocol endpoint\n\n"
+        "  GET /service/health - Health check endpoint (cached)\n"
+        "  GET /health/live   - Liveness probe\n"
+        "  GET /health/ready  - Readiness probe (503 until Looker is reachable)\n"
+        "  GET /config        - Configuration status (masked) and cache stats\n"
+        "  GET /metrics       - Prometheus metrics\n"
+        "  POST /cache/invalidate?model=<name> - Drop cached query results\n"
+        "  POST /mcp/         - MCP protocol endpoint (JSON-RPC batches accepted)\n\n"
         f"Status: {'Ready' if is_configured else 'Not Configured - Set environment variables'}\n\n"
-        "Prebuilt Looker Tools (via Google GenAI Toolbox v0.14.0):\n"
+        "Native Looker Tools:\n"
         "  - get_models, get_explores, get_dimensions, get_measures\n"
-        "  - get_filters, get_parameters, query, query_sql, query_url\n"
-        "  - get_looks, run_look, make_look\n\n"
-        "Note: All tools are provided by the Google GenAI Toolbox --prebuilt looker\n"
+        "  - get_filters, get_parameters, search_fields\n"
+        "  - query, run_look, fetch_page (paginated: rows, columns, csv, arrow or parquet)\n"
+        "  - submit_query, job_status, fetch_results (background jobs for slow queries)\n"
+        "  - run_dashboard (all tiles concurrently, shared queries run once)\n\n"
+        "Toolbox Tools (supervised worker pool):\n"
+        "  - query_sql, query_url, get_looks, make_look\n"
+        "  - get_dashboards, make_dashboard, add_dashboard_element\n\n"
+        "Note: Tools call the Looker API in-process over a pooled, token-caching client\n"
     )
 
+@lifecycle.on_startup
+async def start_health_checks() -> None:
+    health.start()
+
+@lifecycle.on_startup
+async def start_toolbox_pool() -> None:
+    """Pre-warm the toolbox workers in the background; readiness waits for them."""
+    if toolbox.enabled:
+        toolbox.start()
+    elif TOOLBOX_POOL_SIZE > 0:
+        print(f"WARNING: toolbox command {TOOLBOX_COMMAND.split()[0]!r} not found; toolbox tools disabled", file=sys.stderr)
+
+@lifecycle.on_startup
+async def start_metadata_index() -> None:
+    """Build the LookML index in the background once credentials are present."""
+    if LOOKER_CONFIGURED:
+        metadata_index.start()
+
+@lifecycle.on_shutdown
+async def close_looker_client() -> None:
+    await looker.aclose()
+
+@lifecycle.on_shutdown
+async def discard_spooled_results() -> None:
+    result_store.close()
+
+@lifecycle.on_shutdown
+async def close_shared_store() -> None:
+    shared_store.close()
+
+# Shutdown hooks run in reverse: background work is registered after the
+# client, spool and store it uses, so it stops before they close
+@lifecycle.on_shutdown
+async def stop_toolbox_pool() -> None:
+    await toolbox.stop()
+
+@lifecycle.on_shutdown
+async def stop_metadata_index() -> None:
+    await metadata_index.stop()
+
+@lifecycle.on_shutdown
+async def stop_query_jobs() -> None:
+    # Before the spool, store and client they use are closed
+    await query_jobs.stop()
+
+@lifecycle.on_shutdown
+async def stop_health_checks() -> None:
+    # Registered last so it runs first: no checks against a closed client
+    await health.stop()
+
+def create_app():
+    """Build the ASGI app with admission control, metrics, batch support and background services bound to its lifespan."""
+    # Admission and metrics sit inside the batch middleware so each batch
+    # element is admitted and measured on its own; refusals show up in metrics
+    app = AdmissionMiddleware(mcp.get_asgi_app(), admission, path=MCP_PATH)
+    app = MetricsMiddleware(app, path=MCP_PATH, known_tools=NATIVE_TOOLS + TOOLBOX_TOOLS)
+    app = JSONRPCBatchMiddleware(app, path=MCP_PATH, max_batch=MCP_BATCH_MAX)
+    return lifecycle.wrap(app)
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -129,7 +934,11 @@ if __name__ == "__main__":
     
     if validate_credentials():
         print("✓ Looker credentials configured")
-        print("✓ Google GenAI Toolbox will provide 15 prebuilt Looker tools")
+        print(f"✓ {len(NATIVE_TOOLS)} native Looker tools registered: {', '.join(NATIVE_TOOLS)}")
+        if toolbox.enabled:
+            print(f"✓ {TOOLBOX_POOL_SIZE} toolbox worker(s) serving: {', '.join(TOOLBOX_TOOLS)}")
+        else:
+            print("✗ Toolbox pool disabled; toolbox tools will not function")
     else:
         print("✗ WARNING: Looker credentials not configured")
         print("  Server will start but tools will not function")
@@ -146,9 +955,21 @@ if __name__ == "__main__":
     print(f"MCP endpoint: http://{host}:{port}/mcp/")
     print(f"Info page: http://{host}:{port}/")
     
-    uvicorn.run(
-        mcp.get_asgi_app(),
-        host=host,
-        port=port,
-        log_level="info"
-    )
+    if WORKERS > 1:
+        # Each worker process imports this module and builds its own app
+        print(f"Workers: {WORKERS} (shared store: {SHARED_STORE})")
+        uvicorn.run(
+            "server:create_app",
+            factory=True,
+            workers=WORKERS,
+            host=host,
+            port=port,
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            create_app(),
+            host=host,
+            port=port,
+            log_level="info"
+        )
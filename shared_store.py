@@ -0,0 +1,182 @@
+"""
+Pluggable key-value store for state shared between server worker processes
+In-memory for a single process, or a local SQLite file (put it on /dev/shm for
+a shared-memory file) so several workers on one host reuse the same caches
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fast_json import dumps, loads
+
+
+class MemoryStore:
+    """Process-local store: a dict of key -> (expires_at, tag, value)."""
+
+    shared = False
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], Optional[str], Any]] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at is not None and time.time() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tag: Optional[str] = None) -> None:
+        self._data[key] = (time.time() + ttl if ttl else None, tag, value)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set only if absent (or expired); True if this call set it."""
+        if self.get(key) is not None:
+            return False
+        self.set(key, value, ttl)
+        return True
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str, tag: Optional[str] = None) -> int:
+        """Delete keys starting with `prefix` (and carrying `tag`, if given)."""
+        keys = [
+            key for key, (_, entry_tag, _) in self._data.items()
+            if key.startswith(prefix) and (tag is None or entry_tag == tag)
+        ]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def count(self, prefix: str = "") -> int:
+        now = time.time()
+        return sum(
+            1 for key, (expires_at, _, _) in self._data.items()
+            if key.startswith(prefix) and (expires_at is None or expires_at > now)
+        )
+
+    def close(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "keys": self.count()}
+
+
+class SQLiteStore:
+    """
+    Store backed by one SQLite file in WAL mode, shared by every process that
+    opens it. Values are JSON. Calls are synchronous: a local WAL read or write
+    takes tens of microseconds, less than handing it to a thread would cost.
+    """
+
+    shared = True
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS kv ("
+        " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, tag TEXT)"
+    )
+
+    def __init__(self, path: str, purge_every: int = 500):
+        self.path = path
+        self.purge_every = purge_every
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened per process: a connection must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(self.SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tag: Optional[str] = None) -> None:
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at, tag) VALUES (?, ?, ?, ?)",
+                (key, dumps(value), time.time() + ttl if ttl else None, tag),
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self.conn.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set only if absent (or expired); True if this call set it. Atomic across processes."""
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM kv WHERE key = ? AND expires_at <= ?", (key, time.time()))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, dumps(value), time.time() + ttl if ttl else None),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str, tag: Optional[str] = None) -> int:
+        """Delete keys starting with `prefix` (and carrying `tag`, if given)."""
+        sql = "DELETE FROM kv WHERE substr(key, 1, ?) = ?"
+        params: Tuple = (len(prefix), prefix)
+        if tag is not None:
+            sql += " AND tag = ?"
+            params += (tag,)
+        with self._lock:
+            return self.conn.execute(sql, params).rowcount
+
+    def count(self, prefix: str = "") -> int:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT count(*) FROM kv WHERE substr(key, 1, ?) = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (len(prefix), prefix, time.time()),
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "path": self.path, "keys": self.count()}
+
+
+def open_store(url: str):
+    """
+    "memory" -> MemoryStore; "sqlite:///path/to/file.db" (or "sqlite:relative.db")
+    -> SQLiteStore.
+    """
+    if url in ("", "memory"):
+        return MemoryStore()
+    if url.startswith("sqlite:"):
+        path = url[len("sqlite:"):]
+        if path.startswith("//"):
+            path = path[2:]
+        return SQLiteStore(path)
+    raise ValueError(f"Unknown SHARED_STORE {url!r}; expected 'memory' or 'sqlite:///path'")
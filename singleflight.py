@@ -0,0 +1,150 @@
+"""
+Single-flight coalescing for concurrent identical tool calls
+Callers asking for the same tool with the same arguments while a call is in
+flight share that one execution and its result instead of hitting Looker again;
+progress and log notifications from the shared execution reach all of them
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+
+def call_key(tool: str, arguments: Dict[str, Any]) -> str:
+    """Stable key for a tool call: argument order and None-vs-missing don't matter."""
+    canonical = {k: v for k, v in arguments.items() if v is not None}
+    payload = json.dumps([tool, canonical], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FanOutContext:
+    """
+    Stands in for the first caller's context in a shared execution.
+
+    Progress and log notifications go to every caller joined to the call
+    (a follower gets those sent after it joined); anything else is read from
+    the first caller's context. A follower whose notification fails (e.g. it
+    disconnected) is skipped; the first caller's errors are raised as before.
+    """
+
+    FORWARDED = ("report_progress", "log", "debug", "info", "warning", "error")
+
+    def __init__(self, leader: Any):
+        self.contexts: List[Any] = [leader]
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in self.FORWARDED:
+            return getattr(self.contexts[0], name)
+
+        async def forward(*args, **kwargs):
+            leader, *followers = list(self.contexts)
+            for ctx in followers:
+                try:
+                    await getattr(ctx, name)(*args, **kwargs)
+                except Exception:
+                    pass
+            return await getattr(leader, name)(*args, **kwargs)
+
+        return forward
+
+
+class SingleFlight:
+    """
+    At most one in-flight execution per key.
+
+    The first caller runs the work as a task; callers arriving before it
+    finishes await the same task. A caller that is cancelled (e.g. the client
+    disconnected) does not cancel the shared work for the others.
+
+    Per-caller contexts passed to do() are wrapped in a FanOutContext for the
+    first caller's work; later callers join it, so their clients get the same
+    progress and streamed notifications.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._fan_outs: Dict[str, Dict[str, FanOutContext]] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[..., Awaitable[Any]],
+        contexts: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """
+        Run fn(**contexts), or join the execution already in flight for key.
+        `contexts` are this caller's context objects by name; fn receives them
+        as FanOutContexts shared with every caller that joins.
+        """
+        self.calls += 1
+        contexts = {name: ctx for name, ctx in (contexts or {}).items() if ctx is not None}
+        if not self.enabled:
+            return await fn(**contexts)
+        task = self._inflight.get(key)
+        if task is None:
+            fan_out = {name: FanOutContext(ctx) for name, ctx in contexts.items()}
+            task = asyncio.ensure_future(fn(**fan_out))
+            self._inflight[key] = task
+            self._fan_outs[key] = fan_out
+            task.add_done_callback(lambda done: self._finished(key, done))
+            return await asyncio.shield(task)
+        self.coalesced += 1
+        fan_out = self._fan_outs.get(key, {})
+        joined = [(fan_out[name], ctx) for name, ctx in contexts.items() if name in fan_out]
+        for shared, ctx in joined:
+            shared.contexts.append(ctx)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            for shared, ctx in joined:
+                shared.contexts.remove(ctx)
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        self._fan_outs.pop(key, None)
+        # Mark the exception retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def coalesce(self, ignore: Iterable[str] = ("ctx",)) -> Callable:
+        """
+        Decorator for async MCP tools: concurrent calls with equal arguments
+        share one execution. Parameters in `ignore` (per-caller context
+        objects) are left out of the key and fanned out to every caller
+        sharing the execution. Apply below @mcp.tool().
+        """
+        ignored = set(ignore)
+
+        def decorate(fn: Callable) -> Callable:
+            signature = inspect.signature(fn)
+            name = fn.__name__
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = {k: v for k, v in bound.arguments.items() if k not in ignored}
+                contexts = {k: v for k, v in bound.arguments.items() if k in ignored}
+
+                def run(**shared):
+                    bound.arguments.update(shared)
+                    return fn(*bound.args, **bound.kwargs)
+
+                return await self.do(call_key(name, arguments), run, contexts)
+
+            return wrapper
+
+        return decorate
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
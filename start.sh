@@ -44,5 +44,10 @@ echo "  Port: ${PORT:-8080}"
 echo ""
 echo "=================================="
 
-# Start the FastMCP server
+# Start the FastMCP server. By default behind the startup shim: health probes
+# are answered as soon as the port is open while server.py is imported in the
+# background (LAZY_STARTUP=false runs server.py directly)
+if [ "${LAZY_STARTUP:-true}" = "true" ]; then
+    exec python startup.py server:create_app
+fi
 exec python server.py
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Fast cold starts for the ASGI entry points
+A stdlib-only shim answers health probes as soon as the port is open while the
+real app is imported and started in the background, and reports per-phase
+import/init timings
+
+    python startup.py server:create_app        # factory
+    python startup.py main_module:app --no-factory
+"""
+import argparse
+import asyncio
+import importlib
+import importlib.abc
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Time zero for the report: as close to interpreter start as we can see
+PROCESS_START = time.perf_counter()
+
+
+def worker_count(value: str) -> int:
+    """WORKERS setting: an integer, or "auto" for one per available CPU."""
+    value = (value or "1").strip().lower()
+    if value == "auto":
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+        return max(1, cpus or 1)
+    return max(1, int(value))
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Meta-path hook timing every module executed from source or an extension,
+    cumulative like `python -X importtime` (a package includes its imports).
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self._local = threading.local()
+
+    def find_spec(self, name, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        loader = spec.loader
+        # Only per-module loader instances; shared ones (builtins, frozen) are left alone
+        if loader is not None and hasattr(loader, "path") and hasattr(loader, "exec_module"):
+            exec_module = loader.exec_module
+            timings = self.seconds
+
+            def timed_exec_module(module):
+                start = time.perf_counter()
+                try:
+                    exec_module(module)
+                finally:
+                    timings[module.__name__] = time.perf_counter() - start
+
+            loader.exec_module = timed_exec_module
+        return spec
+
+
+class StartupProfile:
+    """
+    Named phases with wall time and the number of modules each one imported.
+
+    STARTUP_PROFILE=off disables the report, "imports" adds the slowest
+    top-level packages (measured with an import hook).
+    """
+
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = (mode if mode is not None else os.getenv("STARTUP_PROFILE", "phases")).lower()
+        self.phases: List[Tuple[str, float, float, int]] = []
+        self._imports: Optional[_ImportTimer] = None
+        if self.mode == "imports":
+            self._imports = _ImportTimer()
+            sys.meta_path.insert(0, self._imports)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        modules = len(sys.modules)
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phases.append((name, start - PROCESS_START, end - start, len(sys.modules) - modules))
+
+    def mark(self, name: str) -> None:
+        """A point in time (e.g. first health response) rather than a span."""
+        self.phases.append((name, time.perf_counter() - PROCESS_START, 0.0, 0))
+
+    def report(self, top: int = 15) -> str:
+        lines = [f"  {'phase':<34} {'at ms':>8} {'took ms':>8} {'modules':>8}"]
+        for name, at, took, modules in self.phases:
+            lines.append(f"  {name:<34} {at * 1000:>8.0f} {took * 1000:>8.0f} {modules:>8}")
+        if self._imports is not None and self._imports.seconds:
+            lines.append(f"  {'slowest packages (cumulative)':<34} {'':>8} {'took ms':>8}")
+            packages = sorted(
+                ((name, seconds) for name, seconds in self._imports.seconds.items() if "." not in name),
+                key=lambda item: item[1],
+                reverse=True,
+            )
+            for name, seconds in packages[:top]:
+                lines.append(f"    {name:<32} {'':>8} {seconds * 1000:>8.0f}")
+        return "\n".join(lines)
+
+    def print_report(self, title: str) -> None:
+        if self.mode != "off":
+            print(f"Startup profile: {title}\n{self.report()}", file=sys.stderr)
+
+
+profile = StartupProfile()
+
+
+class LazyApp:
+    """
+    ASGI app that is live immediately and loads the real app in the background.
+
+    Until the app at `target` ("module:attribute", or a zero-argument
+    callable returning the app) is imported, built (called, when `factory`)
+    and through its own lifespan startup, `live_paths` answer 200 from a
+    static body and `ready_path` answers 503; other requests wait for the
+    load. Once loaded every request, probes included, goes straight to the
+    real app. Imports and callables run in a worker thread so the event loop
+    keeps answering probes meanwhile.
+
+    With `eager` the load starts as soon as the server is listening;
+    otherwise it waits for the first request that needs the app.
+    """
+
+    def __init__(
+        self,
+        target: Union[str, Callable[[], Any]],
+        factory: bool = True,
+        live_paths: Sequence[str] = ("/health/live",),
+        ready_path: Optional[str] = "/health/ready",
+        eager: bool = True,
+        profile: StartupProfile = profile,
+    ):
+        self.target = target
+        self.factory = factory
+        self.eager = eager
+        self.live_paths = set(live_paths)
+        self.ready_path = ready_path
+        self.profile = profile
+        self.app = None
+        self.error: Optional[str] = None
+        self._loading: Optional[asyncio.Task] = None
+        self._state: Dict[str, Any] = {}
+        self._lifespan_task: Optional[asyncio.Task] = None
+        self._lifespan_in: Optional[asyncio.Queue] = None
+        self._lifespan_out: Optional[asyncio.Queue] = None
+        self._first_probe = True
+
+    @property
+    def name(self) -> str:
+        return self.target if isinstance(self.target, str) else getattr(self.target, "__name__", "app")
+
+    async def _load(self) -> None:
+        try:
+            if callable(self.target):
+                with self.profile.phase(f"build {self.name}"):
+                    app = await asyncio.to_thread(self.target)
+            else:
+                module_name, _, attribute = self.target.partition(":")
+                with self.profile.phase(f"import {module_name}"):
+                    module = await asyncio.to_thread(importlib.import_module, module_name)
+                with self.profile.phase(f"build {attribute}"):
+                    app = getattr(module, attribute)
+                    if self.factory:
+                        app = app()
+            with self.profile.phase("app startup"):
+                await self._start_lifespan(app)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"ERROR: loading {self.name} failed: {self.error}", file=sys.stderr)
+            raise
+        self.app = app
+        self.profile.mark("ready")
+        self.profile.print_report(self.name)
+
+    async def _start_lifespan(self, app) -> None:
+        self._lifespan_in, self._lifespan_out = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "lifespan", "asgi": {"version": "3.0", "spec_version": "2.0"}, "state": self._state}
+        self._lifespan_task = asyncio.create_task(app(scope, self._lifespan_in.get, self._lifespan_out.put))
+        await self._lifespan_in.put({"type": "lifespan.startup"})
+        reply = asyncio.create_task(self._lifespan_out.get())
+        await asyncio.wait({reply, self._lifespan_task}, return_when=asyncio.FIRST_COMPLETED)
+        if not reply.done():
+            # The app returned or raised without answering: it has no lifespan support
+            reply.cancel()
+            self._lifespan_task = None
+            return
+        message = reply.result()
+        if message["type"] == "lifespan.startup.failed":
+            raise RuntimeError(message.get("message") or "lifespan startup failed")
+
+    async def _stop_lifespan(self) -> None:
+        if self._lifespan_task is None or self._lifespan_task.done():
+            return
+        await self._lifespan_in.put({"type": "lifespan.shutdown"})
+        reply = asyncio.create_task(self._lifespan_out.get())
+        await asyncio.wait({self._lifespan_task, reply}, return_when=asyncio.FIRST_COMPLETED)
+        reply.cancel()
+
+    async def _lifespan(self, scope, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # uvicorn copies this dict into every request scope
+                if "state" in scope:
+                    self._state = scope["state"]
+                self.profile.mark("listening")
+                if self.eager:
+                    self._start_loading()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._loading is not None and not self._loading.done():
+                    self._loading.cancel()
+                await self._stop_lifespan()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _start_loading(self) -> None:
+        if self._loading is None:
+            self._loading = asyncio.create_task(self._load())
+            self._loading.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    @staticmethod
+    async def _respond(send, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("ascii"))],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if self.app is not None:
+            await self.app(scope, receive, send)
+            return
+        if scope["type"] == "lifespan":
+            await self._lifespan(scope, receive, send)
+            return
+
+        path = scope.get("path", "")
+        if scope["type"] == "http" and path in self.live_paths:
+            if self._first_probe:
+                self._first_probe = False
+                self.profile.mark("first health response")
+            if self.error:
+                await self._respond(send, 500, {"status": "error", "detail": self.error})
+            else:
+                await self._respond(send, 200, {"status": "ok", "phase": "starting"})
+            return
+        if scope["type"] == "http" and path == self.ready_path:
+            await self._respond(send, 503, {"status": "starting", "detail": self.error})
+            return
+
+        # Lazy mode, or served without a lifespan (e.g. a test client)
+        self._start_loading()
+        try:
+            await asyncio.shield(self._loading)
+        except Exception:
+            if scope["type"] == "http":
+                await self._respond(send, 503, {"status": "error", "detail": self.error})
+            return
+        await self.app(scope, receive, send)
+
+
+def app_from_env() -> LazyApp:
+    """uvicorn factory for worker processes: STARTUP_APP / STARTUP_FACTORY / STARTUP_EAGER pick the target."""
+    return LazyApp(
+        os.environ["STARTUP_APP"],
+        factory=os.getenv("STARTUP_FACTORY", "true").lower() not in ("false", "0", "no"),
+        eager=os.getenv("STARTUP_EAGER", "true").lower() not in ("false", "0", "no"),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve an ASGI app behind a health-first startup shim")
+    parser.add_argument("target", help='"module:attribute", e.g. server:create_app')
+    parser.add_argument("--no-factory", action="store_true", help="attribute is an ASGI app, not a factory")
+    parser.add_argument(
+        "--on-demand", action="store_true",
+        default=os.getenv("STARTUP_EAGER", "true").lower() in ("false", "0", "no"),
+        help="load the app on the first request that needs it instead of right after startup",
+    )
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")))
+    args = parser.parse_args()
+    # The app may import this module (e.g. for worker_count); share this instance
+    sys.modules.setdefault("startup", sys.modules[__name__])
+
+    with profile.phase("import uvicorn"):
+        import uvicorn
+
+    workers = worker_count(os.getenv("WORKERS", "1"))
+    print(f"Starting {args.target} on {args.host}:{args.port} (lazy startup, {workers} worker(s))", file=sys.stderr)
+    if workers > 1:
+        # Each worker process builds its own shim from these
+        os.environ["STARTUP_APP"] = args.target
+        os.environ["STARTUP_FACTORY"] = "false" if args.no_factory else "true"
+        os.environ["STARTUP_EAGER"] = "false" if args.on_demand else "true"
+        uvicorn.run("startup:app_from_env", factory=True, workers=workers, host=args.host, port=args.port, log_level="info")
+    else:
+        app = LazyApp(args.target, factory=not args.no_factory, eager=not args.on_demand)
+        uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Tests for dashboard tile planning and execution (dashboards.py)
+Run with: python -m pytest test_dashboards.py
+"""
+import asyncio
+
+from dashboards import plan_tiles, run_tiles
+from result_pages import ResultStore, iter_json_array
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def dashboard(*elements):
+    return {"id": "1", "title": "Sales", "dashboard_elements": list(elements)}
+
+
+def spooling_runner(store: ResultStore, rows_by_query):
+    """run(query) for run_tiles that pages a spooled result, as run_dashboard does."""
+
+    async def run_query(query):
+        async def body():
+            rows = rows_by_query[query["query_id"]]
+            yield ("[" + ",".join(f'{{"n":{n}}}' for n in rows) + "]").encode()
+
+        result = store.start(iter_json_array(body()))
+        return await store.page(result, page_size=2)
+
+    return run_query
+
+
+def test_tiles_merge_a_result_store_page(tmp_path):
+    async def scenario():
+        store = ResultStore(directory=str(tmp_path))
+        groups, _ = plan_tiles(dashboard({"id": 10, "title": "Orders", "type": "vis", "query_id": 7}))
+        tiles = await run_tiles(groups, spooling_runner(store, {"7": [1, 2, 3]}))
+        [tile] = tiles
+        assert tile["status"] == "ok" and tile["error"] is None
+        assert tile["element_id"] == "10" and tile["query_id"] == "7"
+        assert tile["data"] == [{"n": 1}, {"n": 2}] and tile["next_cursor"]
+        store.close()
+
+    run(scenario())
+
+
+def test_plan_groups_tiles_by_query_and_skips_text_tiles():
+    groups, skipped = plan_tiles(dashboard(
+        {"id": 1, "title": "Revenue", "type": "vis", "query_id": 7, "query": {"model": "shop", "limit": "50"}},
+        {"id": 2, "title_text": "Notes", "type": "text"},
+        {"id": 3, "title": "Revenue (look)", "type": "vis", "look": {"query_id": 7, "query": {"model": "shop"}}},
+        {"id": 4, "title": "Merged", "type": "vis", "result_maker": {"query_id": 9}},
+    ))
+    assert list(groups) == ["7", "9"]
+    assert [tile["element_id"] for tile in groups["7"]["tiles"]] == ["1", "3"]
+    assert groups["7"]["query"] == {"query_id": "7", "model": "shop", "limit": "50"}
+    assert skipped == [{"element_id": "2", "title": "Notes", "type": "text"}]
+
+
+def test_shared_query_runs_once_and_every_tile_gets_the_result():
+    async def scenario():
+        calls = []
+
+        async def run_query(query):
+            calls.append(query["query_id"])
+            return {"data": [{"n": 1}], "next_cursor": None, "error": None}
+
+        groups, _ = plan_tiles(dashboard(
+            {"id": 1, "title": "A", "query_id": 7},
+            {"id": 2, "title": "B", "query_id": 7},
+            {"id": 3, "title": "C", "query_id": 8},
+        ))
+        seen = []
+
+        async def on_tile(tile):
+            seen.append(tile["element_id"])
+
+        tiles = await run_tiles(groups, run_query, concurrency=1, on_tile=on_tile)
+        assert sorted(calls) == ["7", "8"]
+        assert [tile["element_id"] for tile in tiles] == ["1", "2", "3"]
+        assert sorted(seen) == ["1", "2", "3"]
+        assert tiles[0]["shared_with"] == ["2"] and tiles[1]["shared_with"] == ["1"]
+        assert tiles[2]["shared_with"] == []
+        assert all(tile["data"] == [{"n": 1}] for tile in tiles)
+
+    run(scenario())
+
+
+def test_failing_query_marks_only_its_tiles():
+    async def scenario():
+        async def run_query(query):
+            if query["query_id"] == "8":
+                raise RuntimeError("Looker API error 500")
+            return {"data": [], "next_cursor": None, "error": None}
+
+        groups, _ = plan_tiles(dashboard({"id": 1, "query_id": 7}, {"id": 2, "query_id": 8}))
+        ok, failed = await run_tiles(groups, run_query)
+        assert ok["status"] == "ok" and ok["error"] is None and ok["data"] == []
+        assert failed["status"] == "error" and failed["error"] == "Looker API error 500"
+        assert "data" not in failed
+
+    run(scenario())
+
+
+def test_merged_tile_shape():
+    async def scenario():
+        async def run_query(query):
+            # A page cut short upstream: rows so far plus the error
+            return {"data": [{"n": 1}], "fields": ["n"], "next_cursor": "c", "complete": False,
+                    "error": "Looker query cancelled after 300s (QUERY_TIMEOUT)"}
+
+        groups, _ = plan_tiles(dashboard({"id": 5, "title": "Slow", "type": "vis", "query_id": 7}))
+        [tile] = await run_tiles(groups, run_query)
+        assert set(tile) == {
+            "element_id", "title", "type", "query_id", "shared_with", "status", "error", "seconds",
+            "data", "fields", "next_cursor", "complete",
+        }
+        assert tile["status"] == "error" and "QUERY_TIMEOUT" in tile["error"]
+        assert tile["data"] == [{"n": 1}] and isinstance(tile["seconds"], float)
+
+    run(scenario())
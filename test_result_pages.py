@@ -0,0 +1,109 @@
+"""
+Tests for result spooling and paging (result_pages.py) behind the query guard
+Run with: python -m pytest test_result_pages.py
+"""
+import asyncio
+
+import pytest
+
+from query_guard import QueryGuard
+from result_pages import ResultStore, iter_json_array
+
+
+async def stalling_looker(rows, stall: float = 60.0):
+    """A Looker response that sends some rows, then stops sending."""
+    yield b"[" + b",".join(f'{{"a":{i}}}'.encode() for i in rows)
+    await asyncio.sleep(stall)
+    yield b"]"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_timeout_mid_stream_is_an_error_not_a_short_result(tmp_path):
+    async def scenario():
+        cancelled = []
+
+        async def cancel():
+            cancelled.append(True)
+            return True
+
+        guard = QueryGuard(timeout=0.2)
+        store = ResultStore(directory=str(tmp_path))
+        result = store.start(iter_json_array(guard.bounded(stalling_looker([1, 2]), cancel)))
+        with pytest.raises(RuntimeError, match="QUERY_TIMEOUT"):
+            await store.page(result, page_size=100)
+        assert cancelled and guard.timeouts == 1
+        assert result.complete and result.rows_written == 2
+        store.close()
+
+    run(scenario())
+
+
+def test_pages_before_a_failure_are_not_reported_complete(tmp_path):
+    async def scenario():
+        guard = QueryGuard(timeout=0.2)
+        store = ResultStore(directory=str(tmp_path))
+
+        async def cancel():
+            return False
+
+        result = store.start(iter_json_array(guard.bounded(stalling_looker(range(5)), cancel)))
+        await result.task
+        page = await store.page(result, page_size=2)
+        assert page["row_count"] == 2
+        assert page["complete"] is False and page["total_rows"] is None
+        assert "QUERY_TIMEOUT" in page["error"] and page["next_cursor"]
+        with pytest.raises(RuntimeError, match="after 5 rows"):
+            await store.page_from_cursor(page["next_cursor"], page_size=10)
+        store.close()
+
+    run(scenario())
+
+
+def test_finished_result_reports_total_rows(tmp_path):
+    async def scenario():
+        async def body():
+            yield b'[{"a":1},{"a":2}]'
+
+        store = ResultStore(directory=str(tmp_path))
+        result = store.start(iter_json_array(body()))
+        page = await store.page(result, page_size=100)
+        assert page["data"] == [{"a": 1}, {"a": 2}]
+        assert page["complete"] is True and page["total_rows"] == 2 and page["error"] is None
+        assert page["next_cursor"] is None
+        store.close()
+
+    run(scenario())
+
+
+def test_max_results_evicts_only_past_the_cap_and_keeps_pinned(tmp_path):
+    async def scenario():
+        async def body():
+            yield b'[{"a":1}]'
+
+        async def spool():
+            result = store.start(iter_json_array(body()))
+            await result.task
+            return result
+
+        store = ResultStore(max_results=6, directory=str(tmp_path))
+        pinned = await spool()
+        store.pin(pinned.result_id)
+        below = [await spool() for _ in range(4)]
+        assert store.stats()["results"] == 5
+        assert all(store.get(r.result_id) is r for r in below)
+
+        above = [await spool() for _ in range(4)]
+        assert store.stats()["results"] == 6 and store.stats()["pinned"] == 1
+        assert store.get(pinned.result_id) is pinned
+        assert all(store.get(r.result_id) is None for r in below[:3])
+        assert all(store.get(r.result_id) is r for r in below[3:] + above)
+
+        store.unpin(pinned.result_id)
+        await spool()
+        assert store.stats()["results"] == 6 and store.get(pinned.result_id) is None
+        store.close()
+
+    run(scenario())
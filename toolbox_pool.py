@@ -0,0 +1,371 @@
+"""
+Supervised pool of GenAI Toolbox worker processes
+Workers are pre-warmed at startup, tool calls go to the least busy one, and
+dead, worn-out or bloated workers are restarted or replaced in the background
+"""
+import asyncio
+import itertools
+import json
+import shutil
+import socket
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+from jsonrpc_batch import messages_from_body
+
+PROTOCOL_VERSION = "2025-03-26"
+SESSION_HEADER = "mcp-session-id"
+
+
+def free_port() -> int:
+    """An unused localhost TCP port for a new worker."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def unwrap_result(result: Dict[str, Any]) -> Any:
+    """
+    Turn an MCP tools/call result into plain data: each text item is decoded
+    as JSON when possible. Raises RuntimeError for isError results.
+    """
+    items = []
+    for item in result.get("content") or []:
+        text = item.get("text", "")
+        try:
+            items.append(json.loads(text))
+        except (TypeError, ValueError):
+            items.append(text)
+    if result.get("isError"):
+        raise RuntimeError("; ".join(str(item) for item in items) or "toolbox tool call failed")
+    return items[0] if len(items) == 1 else items
+
+
+class ToolboxWorker:
+    """One `toolbox` process listening on a private localhost port."""
+
+    def __init__(self, command: Sequence[str], port: int, timeout: float = 120.0):
+        self.command = list(command)
+        self.port = port
+        self.timeout = timeout
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.http: Optional[httpx.AsyncClient] = None
+        self.session_id: Optional[str] = None
+        self.tools: List[Dict[str, Any]] = []
+        self.ready = False
+        self.draining = False
+        self.inflight = 0
+        self.requests = 0
+        self.started_at: Optional[float] = None
+        self._ids = itertools.count(1)
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def rss_bytes(self) -> Optional[int]:
+        """Resident memory from /proc (Linux); None where unavailable."""
+        if not self.alive:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+        return None
+
+    async def start(self, startup_timeout: float = 30.0) -> None:
+        """Launch the process, wait for it to listen, then open and warm an MCP session."""
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command, "--address", "127.0.0.1", "--port", str(self.port),
+        )
+        self.http = httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{self.port}",
+            timeout=self.timeout,
+            headers={"Content-Type": "application/json", "Accept": "application/json, text/event-stream"},
+        )
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if not self.alive:
+                raise RuntimeError(f"toolbox exited with code {self.process.returncode} during startup")
+            try:
+                response = await self.http.get("/")
+                if response.status_code < 500:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"toolbox did not listen on port {self.port} within {startup_timeout:g}s")
+            await asyncio.sleep(0.1)
+
+        result = await self.rpc(
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "looker-mcp-server", "version": "1.0.0"},
+            },
+        )
+        if result is None:
+            raise RuntimeError("toolbox did not answer initialize")
+        await self.rpc("notifications/initialized")
+        # Listing tools makes the worker load its tool set before real traffic arrives
+        self.tools = (await self.rpc("tools/list") or {}).get("tools", [])
+        self.started_at = time.monotonic()
+        self.ready = True
+
+    async def rpc(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Send one JSON-RPC message; returns the result (None for notifications)."""
+        payload: Dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            payload["params"] = params
+        notification = method.startswith("notifications/")
+        if not notification:
+            payload["id"] = next(self._ids)
+        headers = {SESSION_HEADER: self.session_id} if self.session_id else {}
+        response = await self.http.post("/mcp", json=payload, headers=headers)
+        if response.headers.get(SESSION_HEADER):
+            self.session_id = response.headers[SESSION_HEADER]
+        response.raise_for_status()
+        if notification:
+            return None
+        for message in messages_from_body(response.headers.get("content-type", ""), response.content):
+            if message.get("id") == payload["id"]:
+                if "error" in message:
+                    error = message["error"]
+                    raise RuntimeError(f"toolbox error {error.get('code')}: {error.get('message')}")
+                return message.get("result", {})
+        return None
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.rpc("tools/call", {"name": name, "arguments": arguments}) or {}
+
+    async def stop(self, grace: float = 5.0) -> None:
+        """SIGTERM, then SIGKILL after `grace` seconds."""
+        self.ready = False
+        if self.http is not None:
+            await self.http.aclose()
+        if self.alive:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=grace)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+
+
+class ToolboxPool:
+    """
+    Keeps `size` toolbox workers running.
+
+    - start() launches every worker concurrently in the background
+    - call_tool() goes to the ready worker with the fewest in-flight calls
+    - a supervisor restarts dead workers with exponential backoff and
+      replaces workers after `max_requests` calls or above `max_rss_mb`;
+      replacements are warmed before the old worker is drained and stopped
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        command: Sequence[str] = ("toolbox", "--prebuilt", "looker"),
+        max_requests: int = 0,
+        max_rss_mb: float = 0,
+        startup_timeout: float = 30.0,
+        check_interval: float = 5.0,
+        restart_backoff: float = 1.0,
+        restart_backoff_max: float = 60.0,
+        call_timeout: float = 120.0,
+        observer: Optional[Callable[[str, str, int, float], None]] = None,
+    ):
+        self.size = size
+        self.command = list(command)
+        self.max_requests = max_requests
+        self.max_rss_bytes = int(max_rss_mb * 1024 * 1024)
+        self.startup_timeout = startup_timeout
+        self.check_interval = check_interval
+        self.restart_backoff = restart_backoff
+        self.restart_backoff_max = restart_backoff_max
+        self.call_timeout = call_timeout
+        self.observer = observer
+
+        self.workers: List[Optional[ToolboxWorker]] = [None] * size
+        self.tools: List[Dict[str, Any]] = []
+        self.restarts = 0
+        self.recycles = 0
+        self.last_error: Optional[str] = None
+        self._failures = [0] * size
+        self._next_attempt = [0.0] * size
+        self._available = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and shutil.which(self.command[0]) is not None
+
+    def ready_workers(self) -> List[ToolboxWorker]:
+        return [w for w in self.workers if w is not None and w.ready and w.alive and not w.draining]
+
+    async def _launch(self) -> ToolboxWorker:
+        worker = ToolboxWorker(self.command, free_port(), timeout=self.call_timeout)
+        try:
+            await worker.start(self.startup_timeout)
+        except BaseException:
+            await worker.stop(grace=1.0)
+            raise
+        if not self.tools:
+            self.tools = worker.tools
+        return worker
+
+    async def _spawn(self, slot: int) -> None:
+        """(Re)start the worker in `slot`, backing off after repeated failures."""
+        previous = self.workers[slot]
+        if previous is not None:
+            await previous.stop(grace=1.0)
+            self.restarts += 1
+        try:
+            self.workers[slot] = await self._launch()
+        except Exception as e:
+            self.workers[slot] = None
+            self._failures[slot] += 1
+            delay = min(self.restart_backoff_max, self.restart_backoff * 2 ** (self._failures[slot] - 1))
+            self._next_attempt[slot] = time.monotonic() + delay
+            self.last_error = str(e)
+            print(f"WARNING: toolbox worker {slot} failed to start ({e}); retrying in {delay:g}s", file=sys.stderr)
+            return
+        self._failures[slot] = 0
+        self._available.set()
+
+    async def _recycle(self, slot: int, reason: str) -> None:
+        """Warm a replacement, swap it in, then drain and stop the old worker."""
+        old = self.workers[slot]
+        try:
+            replacement = await self._launch()
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"WARNING: toolbox worker {slot} replacement failed: {e}", file=sys.stderr)
+            return
+        self.workers[slot] = replacement
+        self.recycles += 1
+        self._available.set()
+        print(f"INFO: toolbox worker {slot} recycled ({reason})", file=sys.stderr)
+        old.draining = True
+        deadline = time.monotonic() + self.call_timeout
+        while old.inflight and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        await old.stop()
+
+    async def _maintain(self, slot: int) -> None:
+        worker = self.workers[slot]
+        if worker is None or not worker.alive:
+            if time.monotonic() >= self._next_attempt[slot]:
+                await self._spawn(slot)
+            return
+        if self.max_requests and worker.requests >= self.max_requests:
+            await self._recycle(slot, f"{worker.requests} requests")
+            return
+        rss = worker.rss_bytes()
+        if self.max_rss_bytes and rss and rss > self.max_rss_bytes:
+            await self._recycle(slot, f"RSS {rss // (1024 * 1024)} MB")
+
+    async def _supervise(self) -> None:
+        while True:
+            try:
+                await asyncio.gather(*(self._maintain(slot) for slot in range(self.size)))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"WARNING: toolbox supervisor error: {e}", file=sys.stderr)
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        """Pre-warm every worker and keep supervising them in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._supervise())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.gather(*(w.stop() for w in self.workers if w is not None), return_exceptions=True)
+        self.workers = [None] * self.size
+
+    async def _acquire(self, exclude: Optional[ToolboxWorker] = None) -> ToolboxWorker:
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            candidates = [w for w in self.ready_workers() if w is not exclude]
+            if candidates:
+                return min(candidates, key=lambda w: (w.inflight, w.requests))
+            self._available.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(self.last_error or "No toolbox worker available")
+            try:
+                await asyncio.wait_for(self._available.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _call_on(self, worker: ToolboxWorker, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        worker.inflight += 1
+        worker.requests += 1
+        started = time.perf_counter()
+        try:
+            result = await worker.call_tool(name, arguments)
+        finally:
+            worker.inflight -= 1
+        if self.observer is not None:
+            self.observer("POST", f"/toolbox/{name}", 200, time.perf_counter() - started)
+        return result
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a toolbox tool on the least busy worker, retrying once elsewhere if it refused the connection."""
+        if not self.enabled:
+            raise RuntimeError(f"Toolbox pool disabled (size={self.size}, command={self.command[0]!r})")
+        worker = await self._acquire()
+        try:
+            return await self._call_on(worker, name, arguments)
+        except httpx.ConnectError:
+            # The request never reached the worker, so retrying elsewhere is safe
+            worker.ready = False
+        return await self._call_on(await self._acquire(exclude=worker), name, arguments)
+
+    def stats(self) -> Dict[str, Any]:
+        workers = []
+        for slot, worker in enumerate(self.workers):
+            if worker is None:
+                workers.append({"slot": slot, "state": "down", "failures": self._failures[slot]})
+                continue
+            rss = worker.rss_bytes()
+            workers.append({
+                "slot": slot,
+                "state": "ready" if worker.ready and worker.alive else "starting" if worker.alive else "dead",
+                "pid": worker.pid,
+                "port": worker.port,
+                "inflight": worker.inflight,
+                "requests": worker.requests,
+                "rss_mb": round(rss / (1024 * 1024), 1) if rss else None,
+                "uptime_seconds": round(time.monotonic() - worker.started_at, 1) if worker.started_at else None,
+            })
+        return {
+            "enabled": self.enabled,
+            "size": self.size,
+            "ready": len(self.ready_workers()),
+            "restarts": self.restarts,
+            "recycles": self.recycles,
+            "last_error": self.last_error,
+            "workers": workers,
+        }